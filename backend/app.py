@@ -1,4 +1,5 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, g
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import json
 import os
@@ -6,34 +7,116 @@ import io
 import base64
 from datetime import datetime
 from pathlib import Path
+import time
 import uuid
-import random
 
 from config import Config
-from models import MentalHealthModel, RecommendationEngine
+import fast_json
+import metrics
+from profiling import RequestProfiler
+from models import RecommendationEngine
+from model_registry import ModelRegistry
+from inference_scheduler import InferenceScheduler
+from questionnaire import QuestionnaireCache
+from append_log import get_append_log, install_signal_handlers
+from share_store import ShareStore
+from feature_index import invalid_answer_keys
+from population_stats import PopulationStats, prediction_score
+from rendering import ResultRenderer
+from jobs import JobQueue
+
+
+class MindScopeJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by fast_json (orjson when installed); also serializes the read-only questionnaire views"""
+
+    def dumps(self, obj, **kwargs):
+        return fast_json.dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return fast_json.loads(s)
+
+    def response(self, *args, **kwargs):
+        if args and kwargs:
+            raise TypeError('jsonify() behavior undefined when passed both args and kwargs')
+        obj = kwargs or (args[0] if len(args) == 1 else list(args) if args else None)
+        # Encode straight to bytes, skipping the str round trip
+        return self._app.response_class(fast_json.dumps(obj) + b'\n', mimetype=self.mimetype)
+
 
 app = Flask(__name__)
+app.json = MindScopeJSONProvider(app)
 CORS(app, origins=Config.CORS_ORIGINS)
 
-# Initialize models
-mental_health_model = MentalHealthModel()
+Config.ensure_directories()
+
+# Initialize models; the registry loads and warms the bundle before serving
+model_registry = ModelRegistry()
+inference_scheduler = InferenceScheduler(model_registry)
 recommendation_engine = RecommendationEngine()
+questionnaire_cache = QuestionnaireCache()
+share_store = ShareStore()
+job_queue = JobQueue()
+population_stats = PopulationStats(target_columns=model_registry.current().target_columns)
+result_renderer = ResultRenderer(recommendation_engine, population_stats)
+request_profiler = RequestProfiler()
+
+# Assessment modes accepted from clients; the mode also keys the render cache
+ASSESSMENT_MODES = ('full', 'quick')
+
+# Queued assessment/feedback/share records must reach disk on `docker stop`, not just at normal exit
+install_signal_handlers()
+
+if Config.WARM_UP_ON_START:
+    try:
+        model_registry.load()
+    except Exception as e:
+        print(f"Model warm-up failed, using rule-based fallback: {e}")
+
+
+@app.before_request
+def start_request_timer():
+    # Also (re)starts this worker process's metrics snapshot writer after a fork
+    metrics.REGISTRY.start()
+    # Follow bundles promoted in other worker processes (reads the pointer at most once per interval)
+    model_registry.watch()
+    g.request_started = time.perf_counter()
+    # A single attribute read unless an admin armed the profiler
+    if request_profiler.armed and request.url_rule is not None:
+        g.profile_token = request_profiler.begin(request.url_rule.rule)
+
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # Route patterns, not raw paths, keep label cardinality bounded
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        metrics.REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint)
+        if response.status_code >= 400:
+            metrics.ERRORS.inc(endpoint, str(response.status_code))
+    return response
+
+
+@app.teardown_request
+def finish_request_profile(exc):
+    token = g.pop('profile_token', None)
+    if token is not None:
+        request_profiler.end(token)
+
+
+def is_admin_request():
+    """Simple password protection for admin endpoints (enhance for production)"""
+    return request.headers.get('X-Admin-Password') == Config.ADMIN_PASSWORD
 
 
 def load_questions():
-    """Load questions from JSON file"""
+    """Return the cached questionnaire, reloading it only if questions.json changed"""
     try:
-        print(f"Loading questions from: {Config.QUESTIONS_FILE}")
-        with open(Config.QUESTIONS_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            print(f"Successfully loaded questions data")
-            return data
+        with metrics.STAGE_SECONDS.time('questionnaire_load'):
+            return questionnaire_cache.get()
     except FileNotFoundError:
         print(f"Questions file not found: {Config.QUESTIONS_FILE}")
-        return {"error": "Questions file not found"}
-    except Exception as e:
-        print(f"Error loading questions: {e}")
-        return {"error": str(e)}
+        return None
 
 
 @app.route('/api/health', methods=['GET'])
@@ -47,83 +130,54 @@ def health_check():
     })
 
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Pipeline metrics aggregated over all worker processes, in Prometheus text format"""
+    body = metrics.REGISTRY.render() if metrics.REGISTRY.enabled else ''
+    return app.response_class(body, mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
 @app.route('/api/questions', methods=['GET'])
 def get_questions():
     """Get assessment questions with mode support"""
     try:
         mode = request.args.get('mode', 'full')  # 'full' or 'quick'
-        questions_data = load_questions()
+        questionnaire = load_questions()
 
-        if 'error' in questions_data:
-            return jsonify(questions_data), 500
+        if questionnaire is None:
+            return jsonify({'error': 'Questions file not found'}), 500
 
-        # If quick mode, select subset of questions
+        # Bodies are pre-encoded (and pre-compressed) per questionnaire version
+        payloads = fast_json.questionnaire_payloads(questionnaire)
         if mode == 'quick':
-            # Flatten questions first
-            all_questions = []
-            if 'sections' in questions_data:
-                for section in questions_data['sections']:
-                    for question in section['questions']:
-                        question['section_name'] = section['category']
-                        all_questions.append(question)
-
-            # Select balanced quick questions (12 questions)
-            quick_questions = select_quick_questions(all_questions, questions_data.get('option_sets', {}))
-
-            # Rebuild structure for quick mode
-            questions_data['mode'] = 'quick'
-            questions_data['total_questions'] = len(quick_questions)
-            questions_data['quick_questions'] = quick_questions
+            # Balanced quick questions (12); pass ?seed=N for a reproducible, cacheable selection
+            payload = payloads.quick(questionnaire, request.args.get('seed', type=int))
         else:
-            questions_data['mode'] = 'full'
-            # Count total questions
-            total = sum(len(section['questions']) for section in questions_data.get('sections', []))
-            questions_data['total_questions'] = total
+            payload = payloads.full
 
-        return jsonify(questions_data)
+        return payload_response(payload)
     except Exception as e:
         print(f"Error in get_questions: {e}")
         return jsonify({'error': str(e)}), 500
 
 
-def select_quick_questions(all_questions, option_sets, num_questions=12):
-    """Select balanced questions for quick assessment"""
-    try:
-        # Group by section for balanced selection
-        sections = {}
-        for q in all_questions:
-            section = q.get('section_name', 'general')
-            if section not in sections:
-                sections[section] = []
-            sections[section].append(q)
-
-        selected = []
-        questions_per_section = max(1, num_questions // len(sections))
-
-        # Select from each section
-        for section_name, section_questions in sections.items():
-            sample_size = min(questions_per_section, len(section_questions))
-            section_sample = random.sample(section_questions, sample_size)
-            selected.extend(section_sample)
-
-        # If we need more questions, randomly select from remaining
-        if len(selected) < num_questions:
-            remaining = [q for q in all_questions if q not in selected]
-            if remaining:
-                additional_needed = num_questions - len(selected)
-                additional = random.sample(remaining, min(additional_needed, len(remaining)))
-                selected.extend(additional)
-
-        # Add option data to each question
-        for question in selected:
-            if 'options_id' in question and question['options_id'] in option_sets:
-                question['options'] = option_sets[question['options_id']]
-
-        return selected[:num_questions]
+def payload_response(payload):
+    """Serve an EncodedPayload with Accept-Encoding negotiation and ETag/If-None-Match revalidation"""
+    encoding = fast_json.negotiate(request.accept_encodings)
+    if len(payload.body) < Config.MIN_COMPRESS_SIZE:
+        encoding = None
 
-    except Exception as e:
-        print(f"Error selecting quick questions: {e}")
-        return all_questions[:num_questions]
+    response = app.response_class(payload.variant(encoding), mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.content_encoding = encoding
+
+    etag = payload.etag_for(encoding)
+    if etag:
+        response.set_etag(etag)
+        response.cache_control.no_cache = True  # always revalidate; a match costs a 304
+        response.make_conditional(request)
+    return response
 
 
 @app.route('/api/assess', methods=['POST'])
@@ -136,210 +190,216 @@ def assess_mental_health():
             return jsonify({'error': 'No answers provided'}), 400
 
         answers = data['answers']
+        answers_problem = invalid_answers_message(answers)
+        if answers_problem:
+            return jsonify({'error': answers_problem}), 400
+
         timestamp = data.get('timestamp', datetime.now().isoformat())
         assessment_mode = data.get('mode', 'full')
+        if not is_valid_mode(assessment_mode):
+            return jsonify({'error': f"Invalid mode; expected one of {', '.join(ASSESSMENT_MODES)}"}), 400
 
         print(f"Processing {assessment_mode} assessment with {len(answers)} answers")
 
         # Load questions for context
-        questions_data = load_questions()
-
-        # Get predictions from enhanced model
-        predictions = mental_health_model.predict_from_answers(answers, questions_data, assessment_mode)
-
-        # Get personalized recommendations
-        recommendations = recommendation_engine.get_recommendations(predictions, limit=4)
-
-        # Format results for frontend
-        results = {}
-        for target, prediction in predictions.items():
-            # Map to user-friendly names
-            display_names = {
-                'Depression_Category': 'Mood & Energy',
-                'Anxiety_Category': 'Anxiety Level',
-                'Stress_Category': 'Stress Management',
-                'Wellbeing_Category': 'Overall Wellbeing',
-                'Overall_Wellbeing_Category': 'General Health'
-            }
-
-            category_level = prediction['category']
-            confidence = prediction['confidence']
-
-            # Calculate percentage for visualization
-            level_mapping = {
-                'Low Concern': 20, 'Low Well-being': 25,
-                'Mild to Moderate Concern': 55, 'Moderate Well-being': 60,
-                'High Concern': 85, 'High Well-being': 90,
-                'Good Well-being': 80
-            }
+        questionnaire = load_questions()
+        questions_data = questionnaire.data if questionnaire is not None else {}
+
+        # Get predictions, micro-batched with concurrent requests when enabled
+        feature_report = []
+        if Config.INFERENCE_BATCHING:
+            predictions = inference_scheduler.predict(
+                answers, questions_data, assessment_mode, feature_report=feature_report
+            )
+        else:
+            predictions = model_registry.current().predict_from_answers(
+                answers, questions_data, assessment_mode, feature_report=feature_report
+            )
 
-            percentage = level_mapping.get(category_level, 50)
-
-            # Enhanced descriptions
-            descriptions = {
-                'Low Concern': 'Your responses suggest this area is well-managed. Keep up the good work!',
-                'Mild to Moderate Concern': 'Some areas may benefit from attention and self-care practices.',
-                'High Concern': 'This area shows signs that may benefit from professional support or focused attention.',
-                'Low Well-being': 'There are opportunities to enhance your wellbeing in this area through small, positive changes.',
-                'Moderate Well-being': 'Your wellbeing shows room for growth. Consider exploring new wellness practices.',
-                'High Well-being': 'Excellent! You demonstrate strong wellbeing in this area.',
-                'Good Well-being': 'You show positive wellbeing patterns. Continue nurturing this strength.'
-            }
+        response = build_assessment_response(answers, predictions, timestamp, assessment_mode)
+        add_feature_warnings(response, feature_report[0] if feature_report else None)
 
-            description = descriptions.get(category_level, 'Assessment completed successfully.')
+        return jsonify(response)
 
-            # Add population comparison (simulated for now)
-            population_percentile = min(95, max(5, percentage + random.randint(-15, 15)))
+    except Exception as e:
+        print(f"Assessment error: {e}")
+        return jsonify({'error': 'Assessment processing failed', 'details': str(e)}), 500
 
-            results[target] = {
-                'name': display_names.get(target, target.replace('_', ' ').title()),
-                'level': category_level,
-                'score': percentage,
-                'confidence': round(confidence * 100, 1),
-                'description': description,
-                'population_percentile': population_percentile,
-                'assessment_mode': assessment_mode
-            }
 
-        # Generate unique assessment ID
-        assessment_id = str(uuid.uuid4())[:8]
+@app.route('/api/assess/batch', methods=['POST'])
+def assess_mental_health_batch():
+    """Score many assessments in one request with a single vectorized model pass"""
+    try:
+        data = request.get_json()
 
-        # Save assessment data
-        save_assessment_data(answers, predictions, timestamp, assessment_id, assessment_mode)
+        if not data or not isinstance(data.get('assessments'), list):
+            return jsonify({'error': 'No assessments provided'}), 400
+
+        submissions = data['assessments']
+        if len(submissions) > Config.MAX_BATCH_SIZE:
+            return jsonify({'error': f'Batch size exceeds limit of {Config.MAX_BATCH_SIZE}'}), 413
+
+        # Validate every submission up front so one bad row can't downgrade the rest
+        invalid = {}
+        for i, submission in enumerate(submissions):
+            if not isinstance(submission, dict) or 'answers' not in submission:
+                invalid[i] = 'No answers provided'
+            else:
+                answers_problem = invalid_answers_message(submission['answers'])
+                if answers_problem:
+                    invalid[i] = answers_problem
+        if invalid:
+            return jsonify({
+                'error': f"Invalid assessments at indices {', '.join(map(str, invalid))}",
+                'invalid': {str(i): problem for i, problem in invalid.items()}
+            }), 400
+
+        default_mode = data.get('mode', 'full')
+        answers_list = [submission['answers'] for submission in submissions]
+        modes = [submission.get('mode', default_mode) for submission in submissions]
+        for i, mode in enumerate(modes):
+            if not is_valid_mode(mode):
+                return jsonify({
+                    'error': f"Invalid mode for assessment {i}; expected one of {', '.join(ASSESSMENT_MODES)}"
+                }), 400
+
+        print(f"Processing batch of {len(submissions)} assessments")
+
+        questionnaire = load_questions()
+        questions_data = questionnaire.data if questionnaire is not None else {}
+
+        feature_reports = []
+        batch_predictions = model_registry.current().predict_batch(
+            answers_list, questions_data, modes, feature_report=feature_reports
+        )
+
+        responses = []
+        for i, (submission, predictions, mode) in enumerate(zip(submissions, batch_predictions, modes)):
+            timestamp = submission.get('timestamp', datetime.now().isoformat())
+            response = build_assessment_response(submission['answers'], predictions, timestamp, mode)
+            add_feature_warnings(response, feature_reports[i] if i < len(feature_reports) else None)
+            responses.append(response)
+
+        return jsonify({'count': len(responses), 'assessments': responses})
 
-        # Calculate overall wellness score
-        overall_score = calculate_overall_wellness_score(results)
+    except Exception as e:
+        print(f"Batch assessment error: {e}")
+        return jsonify({'error': 'Batch assessment processing failed', 'details': str(e)}), 500
 
-        response = {
-            'results': results,
-            'recommendations': recommendations,
-            'overall_score': overall_score,
-            'assessment_mode': assessment_mode,
-            'timestamp': timestamp,
-            'assessment_id': assessment_id,
-            'chart_data': generate_chart_data(results)
-        }
 
-        return jsonify(response)
+def invalid_answers_message(answers):
+    """Why an answer set can't be scored (answers must map question IDs to numbers), or None"""
+    if not isinstance(answers, dict):
+        return 'Answers must be an object of question IDs to numbers'
+    invalid = invalid_answer_keys(answers)
+    if invalid:
+        return f"Non-numeric answers: {', '.join(map(str, invalid))}"
+    return None
 
-    except Exception as e:
-        print(f"Assessment error: {e}")
-        return jsonify({'error': 'Assessment processing failed', 'details': str(e)}), 500
 
+def is_valid_mode(mode):
+    """Only known modes pass; anything else (including unhashable JSON values) is rejected"""
+    return isinstance(mode, str) and mode in ASSESSMENT_MODES
 
-def calculate_overall_wellness_score(results):
-    """Calculate overall wellness score from individual results"""
-    total_score = 0
-    count = 0
 
-    for target, result in results.items():
-        score = result['score']
-        # Weight wellbeing categories positively, concerns negatively
-        if 'wellbeing' in target.lower() or 'Well-being' in result['level']:
-            total_score += score
-        else:
-            total_score += (100 - score)  # Invert concern scores
-        count += 1
+def add_feature_warnings(response, feature_report):
+    """Tell the client about answers the model ignored and, for full assessments, unanswered features"""
+    if not feature_report:
+        return
+    if feature_report.unknown_keys:
+        response['ignored_answer_keys'] = feature_report.unknown_keys
+    # Quick assessments answer a subset by design; long lists are cut to a count plus the first few
+    if response.get('assessment_mode') == 'full' and feature_report.n_missing:
+        response['missing_feature_count'] = feature_report.n_missing
+        response['missing_features'] = feature_report.missing_features(limit=Config.MISSING_FEATURES_LIMIT)
 
-    overall = total_score / count if count > 0 else 50
-    return min(100, max(0, overall))
 
+def build_assessment_response(answers, predictions, timestamp, assessment_mode):
+    """Format predictions for the frontend, then persist the assessment"""
+    # Category-dependent parts come from the renderer's cache; confidence etc. are filled live
+    rendered = result_renderer.render(predictions, assessment_mode)
 
-def generate_chart_data(results):
-    """Generate data for different chart types"""
-    labels = []
-    scores = []
-    colors = []
+    # Label values come from the request body; clamp them to keep the series bounded
+    metrics.ASSESSMENTS.inc(assessment_mode if is_valid_mode(assessment_mode) else 'other')
 
-    color_mapping = {
-        'Mood & Energy': '#6366F1',
-        'Anxiety Level': '#10B981',
-        'Stress Management': '#F59E0B',
-        'Overall Wellbeing': '#EF4444',
-        'General Health': '#8B5CF6'
-    }
+    # Generate unique assessment ID
+    assessment_id = str(uuid.uuid4())[:8]
 
-    for target, result in results.items():
-        labels.append(result['name'])
-        scores.append(result['score'])
-        colors.append(color_mapping.get(result['name'], '#6B7280'))
+    # Save assessment data
+    save_assessment_data(answers, predictions, timestamp, assessment_id, assessment_mode)
 
     return {
-        'radar': {
-            'labels': labels,
-            'datasets': [{
-                'label': 'Your Scores',
-                'data': scores,
-                'backgroundColor': 'rgba(99, 102, 241, 0.2)',
-                'borderColor': '#6366F1',
-                'borderWidth': 2
-            }]
-        },
-        'donut': {
-            'labels': labels,
-            'datasets': [{
-                'data': scores,
-                'backgroundColor': colors,
-                'borderWidth': 2,
-                'borderColor': '#FFFFFF'
-            }]
-        },
-        'bar': {
-            'labels': labels,
-            'datasets': [{
-                'label': 'Wellness Scores',
-                'data': scores,
-                'backgroundColor': colors,
-                'borderRadius': 8
-            }]
-        }
+        'results': rendered['results'],
+        'recommendations': rendered['recommendations'],
+        'overall_score': rendered['overall_score'],
+        'assessment_mode': assessment_mode,
+        'timestamp': timestamp,
+        'assessment_id': assessment_id,
+        'chart_data': rendered['chart_data']
     }
 
 
 @app.route('/api/share', methods=['POST'])
-def create_share_link():
-    """Create shareable link for results"""
+def create_share():
+    """Create shareable results link"""
     try:
         data = request.get_json()
-        assessment_id = data.get('assessment_id')
+        # The frontend sends a client-generated share_id; older clients send assessment_id
+        share_id = data.get('share_id') or data.get('assessment_id')
 
-        if not assessment_id:
-            return jsonify({'error': 'Assessment ID required'}), 400
+        if not share_id:
+            return jsonify({'error': 'Share ID or assessment ID required'}), 400
 
-        # Create share data (without sensitive details)
+        # Create share data (without sensitive details); 'id' stays the first key
         share_data = {
-            'id': assessment_id,
-            'timestamp': data.get('timestamp'),
+            'id': str(share_id),
+            'assessment_id': data.get('assessment_id'),
             'overall_score': data.get('overall_score'),
             'assessment_mode': data.get('assessment_mode', 'full'),
-            'message': 'I just completed a mental health check-in with MindScope!'
+            'timestamp': data.get('timestamp'),
+            'insights': data.get('insights'),
+            'message': 'I just completed a mental health check-in with MindScope!',
+            'created_at': datetime.now().isoformat()
         }
 
-        # Save share data
-        share_file = Config.DATA_DIR / "shared_results.jsonl"
-        with open(share_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(share_data) + '\n')
+        if not share_store.put(share_data):
+            return jsonify({'error': 'Share ID already exists'}), 409
 
-        # Generate share URL (adjust domain for production)
-        share_url = f"http://localhost:8000/share/{assessment_id}"
+        # Return share URL
+        base_url = request.url_root.rstrip('/')
+        share_url = f"{base_url}/#shared-{share_id}"
 
         return jsonify({
+            'success': True,
             'share_url': share_url,
-            'social_text': f"I just took a mental wellness check-in and learned valuable insights about my wellbeing! Take yours at MindScope 🧠✨ {share_url}",
-            'assessment_id': assessment_id
+            'share_id': share_id,
+            'assessment_id': data.get('assessment_id'),
+            'social_text': f"I just took a mental wellness check-in and learned valuable insights about my wellbeing! Take yours at MindScope 🧠✨ {share_url}"
         })
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/share/<share_id>', methods=['GET'])
+def get_share(share_id):
+    """Look up a shared result by its ID"""
+    try:
+        share_data = share_store.get(share_id)
+        if share_data is None:
+            return jsonify({'error': 'Share not found'}), 404
+
+        return jsonify(share_data)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/upload', methods=['POST'])
 def upload_dataset():
     """Admin endpoint for uploading new datasets"""
     try:
-        # Simple password protection (enhance for production)
-        password = request.headers.get('X-Admin-Password')
-        if password != 'mindscope2024':  # Change this!
+        if not is_admin_request():
             return jsonify({'error': 'Unauthorized'}), 401
 
         if 'file' not in request.files:
@@ -359,36 +419,159 @@ def upload_dataset():
 
         file.save(filepath)
 
-        return jsonify({
+        response = {
             'status': 'success',
             'message': 'Dataset uploaded successfully',
             'filename': filename,
             'path': str(filepath)
-        })
+        }
+
+        # Optionally retrain on the new file in the background job worker
+        if request.form.get('retrain', request.args.get('retrain', '')).lower() == 'true':
+            # The base bundle (default: the live one) is grown by an incremental update
+            # with trees fit on this file only; a full retrain reuses its tuned parameters
+            base_version = request.form.get('base_version', request.args.get('base_version'))
+            base_path = (model_registry.resolve_path(base_version) if base_version
+                         else model_registry.info().get('path', str(Config.MODELS_DIR)))
+            params = {'csv_path': str(filepath), 'base_path': str(base_path)}
+            # A successful retrain goes live in every worker unless promote=false
+            if request.form.get('promote', request.args.get('promote', 'true')).lower() == 'false':
+                params.update(promote=False)
+            if request.form.get('mode', request.args.get('mode', 'full')) == 'incremental':
+                params.update(mode='incremental')
+            job_id = job_queue.enqueue('retrain', params)
+            response['job_id'] = job_id
+            response['job_url'] = f"/api/jobs/{job_id}"
+            response['message'] = 'Dataset uploaded; retraining queued'
+            return jsonify(response), 202
+
+        return jsonify(response)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Report progress and metrics of a background job"""
+    if not is_admin_request():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    try:
+        job = job_queue.get(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found'}), 404
+
+        return jsonify(job)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/admin/model', methods=['GET'])
+def get_model_info():
+    """Report which model bundle is live"""
+    if not is_admin_request():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    return jsonify(model_registry.info())
+
+
+@app.route('/api/admin/model/reload', methods=['POST'])
+def reload_model():
+    """Load, validate and warm a model bundle, swap it in without downtime and pin it for restarts and other workers"""
+    if not is_admin_request():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    try:
+        data = request.get_json(silent=True) or {}
+        info = model_registry.load(data.get('version'), require_models=True)
+        return jsonify({'status': 'success', 'model': info})
+
+    except (FileNotFoundError, ValueError) as e:
+        return jsonify({'error': str(e), 'model': model_registry.info()}), 400
+    except Exception as e:
+        return jsonify({'error': str(e), 'model': model_registry.info()}), 500
+
+
+@app.route('/api/admin/profile', methods=['GET', 'POST', 'DELETE'])
+def admin_profile():
+    """Arm (POST), inspect (GET) or stop (DELETE, ?clear=true drops results) this worker's request profiler"""
+    if not is_admin_request():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    if request.method == 'GET':
+        return jsonify(request_profiler.status())
+
+    if request.method == 'DELETE':
+        if request.args.get('clear', 'false').lower() == 'true':
+            request_profiler.clear()
+        return jsonify(request_profiler.stop())
+
+    try:
+        data = request.get_json(silent=True) or {}
+        sample_rate = data.get('sample_rate', 1.0)
+        # Without a request count, a sampled fraction runs until stopped
+        default_requests = Config.PROFILER_DEFAULT_REQUESTS if sample_rate >= 1.0 else None
+        status = request_profiler.start(
+            mode=data.get('mode', 'sampling'),
+            requests=data.get('requests', default_requests),
+            sample_rate=sample_rate,
+            endpoints=data.get('endpoints'),
+            interval_ms=data.get('interval_ms', Config.PROFILER_INTERVAL_MS)
+        )
+        return jsonify({'status': 'armed', 'profiler': status})
+
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+
+@app.route('/api/admin/profile/download', methods=['GET'])
+def download_profile():
+    """Profile for ?endpoint= (all when omitted) as format=collapsed (flame graphs), pstats or text"""
+    if not is_admin_request():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    endpoint = request.args.get('endpoint')
+    fmt = request.args.get('format', 'collapsed' if request_profiler.mode != 'cprofile' else 'pstats')
+    name = (endpoint or 'all').strip('/').replace('/', '_').replace('<', '').replace('>', '') or 'root'
+
+    if fmt == 'collapsed':
+        data = request_profiler.collapsed(endpoint).encode('utf-8')
+        mimetype, filename = 'text/plain', f"{name}.collapsed"
+    elif fmt == 'pstats':
+        data = request_profiler.pstats_bytes(endpoint)
+        mimetype, filename = 'application/octet-stream', f"{name}.pstats"
+    elif fmt == 'text':
+        data = request_profiler.pstats_text(endpoint).encode('utf-8')
+        mimetype, filename = 'text/plain', f"{name}.txt"
+    else:
+        return jsonify({'error': f'Unknown format: {fmt}'}), 400
+
+    if not data:
+        return jsonify({'error': 'No profile data for this endpoint and format', 'profiler': request_profiler.status()}), 404
+
+    return send_file(io.BytesIO(data), mimetype=mimetype, as_attachment=True, download_name=filename)
+
+
 def save_assessment_data(answers, predictions, timestamp, assessment_id, mode):
     """Save assessment data for analytics"""
     try:
-        data_file = Config.DATA_DIR / "user_assessments.jsonl"
-
-        assessment_record = {
-            'id': assessment_id,
-            'timestamp': timestamp,
-            'mode': mode,
-            'answers': answers,
-            'predictions': {k: {
-                'category': v['category'],
-                'confidence': v['confidence']
-            } for k, v in predictions.items()},
-            'question_count': len(answers)
-        }
+        with metrics.STAGE_SECONDS.time('persistence'):
+            assessment_record = {
+                'id': assessment_id,
+                'timestamp': timestamp,
+                'mode': mode,
+                'answers': answers,
+                'predictions': {k: {
+                    'category': v['category'],
+                    'confidence': v['confidence'],
+                    'score': round(prediction_score(v), 3)
+                } for k, v in predictions.items()},
+                'question_count': len(answers)
+            }
 
-        with open(data_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(assessment_record) + '\n')
+            get_append_log(Config.DATA_DIR / "user_assessments.jsonl").append(assessment_record)
 
     except Exception as e:
         print(f"Error saving assessment data: {e}")
@@ -400,8 +583,6 @@ def submit_feedback():
     try:
         data = request.get_json()
 
-        feedback_file = Config.DATA_DIR / "feedback.jsonl"
-
         feedback_record = {
             'timestamp': datetime.now().isoformat(),
             'assessment_id': data.get('assessment_id'),
@@ -411,8 +592,7 @@ def submit_feedback():
             'user_type': data.get('user_type', 'general')  # student, professional, etc.
         }
 
-        with open(feedback_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(feedback_record) + '\n')
+        get_append_log(Config.DATA_DIR / "feedback.jsonl").append(feedback_record)
 
         return jsonify({
             'status': 'success',
@@ -423,46 +603,11 @@ def submit_feedback():
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/api/share', methods=['POST'])
-def create_share():
-    """Create shareable results link"""
-    try:
-        data = request.get_json()
-        share_id = data.get('share_id')
-
-        # Store share data (implement your preferred storage)
-        share_data = {
-            'id': share_id,
-            'overall_score': data.get('overall_score'),
-            'assessment_mode': data.get('assessment_mode'),
-            'timestamp': data.get('timestamp'),
-            'insights': data.get('insights'),
-            'created_at': datetime.now().isoformat()
-        }
-
-        # Save to file or database
-        share_file = Config.DATA_DIR / "shared_results.jsonl"
-        with open(share_file, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(share_data) + '\n')
-
-        # Return share URL
-        base_url = request.url_root.rstrip('/')
-        share_url = f"{base_url}/#shared-{share_id}"
-
-        return jsonify({
-            'success': True,
-            'share_url': share_url,
-            'share_id': share_id
-        })
-
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-
 if __name__ == '__main__':
     print("🚀 Starting MindScope Enhanced Backend")
     print(f"📊 Data directory: {Config.DATA_DIR}")
     print(f"🤖 Models directory: {Config.MODELS_DIR}")
+    print(f"📋 Questions file: {Config.QUESTIONS_FILE}")
     app.run(
         host=Config.API_HOST,
         port=Config.API_PORT,
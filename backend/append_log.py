@@ -0,0 +1,203 @@
+import atexit
+import json
+import os
+import queue
+import signal
+import threading
+import time
+from pathlib import Path
+
+from config import Config
+
+FSYNC_POLICIES = ('always', 'interval', 'never')
+
+
+class AppendLog:
+    """Write-behind JSONL writer with group commit
+
+    append() serializes the record in the caller's thread and hands the line to
+    a bounded queue; a background flusher drains whatever has accumulated and
+    writes it with a single write() call, so request latency no longer depends
+    on disk latency and concurrent requests can't interleave partial lines.
+    When the queue is full, append() blocks, which applies backpressure instead
+    of growing memory without bound.
+    """
+
+    def __init__(self, path, flush_interval=None, fsync=None, max_queue=None, max_batch=None):
+        self.path = Path(path)
+        self.flush_interval = Config.APPEND_LOG_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.fsync = fsync or Config.APPEND_LOG_FSYNC
+        self.max_batch = max_batch or Config.APPEND_LOG_MAX_BATCH
+        if self.fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy: {self.fsync}")
+
+        self._queue = queue.Queue(maxsize=max_queue or Config.APPEND_LOG_MAX_QUEUE)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._closed = False
+        self._last_fsync = 0.0
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Call callback([(tag, byte_offset), ...]) after each batch of tagged records is written"""
+        self._listeners.append(callback)
+
+    def append(self, record, tag=None):
+        """Queue one record (dict) for writing as a JSON line
+
+        tag is passed back to listeners together with the line's byte offset.
+        """
+        if self._closed:
+            raise RuntimeError(f"Append log {self.path} is closed")
+        self._ensure_flusher()
+        self._queue.put(((json.dumps(record) + '\n').encode('utf-8'), tag))
+
+    def flush(self):
+        """Block until everything queued so far has been written"""
+        if self._thread is not None and self._pid == os.getpid():
+            self._queue.join()
+
+    def close(self):
+        """Drain the queue and stop the flusher"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None and self._pid == os.getpid():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _ensure_flusher(self):
+        # Threads don't survive fork, so each worker process starts its own flusher
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                if self._pid is not None:
+                    # Forked: the inherited queue holds the parent's lines (its flusher
+                    # writes them) and possibly a lock held by a thread that is gone
+                    self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                self._pid = os.getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name=f"append-log:{self.path.name}", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Unbuffered O_APPEND: each batch is one write() at the true end of file,
+        # even when several worker processes share the log
+        with open(self.path, 'ab', buffering=0) as f:
+            stopping = False
+            while not stopping:
+                lines = [self._queue.get()]
+                deadline = time.monotonic() + self.flush_interval
+
+                # Group commit: gather what arrives within the flush interval
+                while len(lines) < self.max_batch and lines[-1] is not None:
+                    remaining = deadline - time.monotonic()
+                    try:
+                        lines.append(self._queue.get(timeout=remaining) if remaining > 0
+                                     else self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                if lines[-1] is None:
+                    stopping = True
+                    lines.pop()
+
+                try:
+                    if lines:
+                        data = b''.join(line for line, _ in lines)
+                        written = f.write(data)
+                        while written < len(data):
+                            written += f.write(data[written:])
+                        self._maybe_fsync(f)
+                        self._notify(f.tell() - len(data), lines)
+                except Exception as e:
+                    print(f"Error writing {self.path}: {e}")
+                finally:
+                    for _ in range(len(lines) + stopping):
+                        self._queue.task_done()
+
+    def _notify(self, offset, lines):
+        if not self._listeners:
+            return
+        written = []
+        for line, tag in lines:
+            if tag is not None:
+                written.append((tag, offset))
+            offset += len(line)
+        if written:
+            for callback in self._listeners:
+                callback(written)
+
+    def _maybe_fsync(self, f):
+        if self.fsync == 'never':
+            return
+        now = time.monotonic()
+        if self.fsync == 'always' or now - self._last_fsync >= Config.APPEND_LOG_FSYNC_INTERVAL:
+            os.fsync(f.fileno())
+            self._last_fsync = now
+
+
+_logs = {}
+_logs_lock = threading.Lock()
+
+
+def get_append_log(path):
+    """Return the shared AppendLog for a path, creating it on first use"""
+    key = str(Path(path).resolve())
+    log = _logs.get(key)
+    if log is None:
+        with _logs_lock:
+            log = _logs.get(key)
+            if log is None:
+                log = _logs[key] = AppendLog(path)
+    return log
+
+
+def flush_all():
+    """Block until every shared append log has written what is queued"""
+    with _logs_lock:
+        logs = list(_logs.values())
+    for log in logs:
+        log.flush()
+
+
+def close_all():
+    """Drain and close every shared append log (registered with atexit)"""
+    with _logs_lock:
+        logs = list(_logs.values())
+        _logs.clear()
+    for log in logs:
+        log.close()
+
+
+def install_signal_handlers(signums=(signal.SIGTERM, signal.SIGINT)):
+    """Drain the logs on SIGTERM/SIGINT, which skip atexit (e.g. `docker stop` on PID 1)
+
+    A handler installed by a server (say, a graceful-shutdown one) still runs
+    after the drain and decides when to exit, with atexit closing the logs;
+    otherwise the logs are closed and the process exits. Call from the main thread.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return False
+    for signum in signums:
+        previous = signal.getsignal(signum)
+        if previous is signal.SIG_IGN:
+            continue
+
+        def handler(signum, frame, previous=previous):
+            if callable(previous):
+                flush_all()
+                previous(signum, frame)
+            else:
+                close_all()
+                raise SystemExit(128 + signum)
+
+        signal.signal(signum, handler)
+    return True
+
+
+atexit.register(close_all)
@@ -0,0 +1,309 @@
+"""Offline benchmarks for the assessment pipeline
+
+Builds a throwaway workspace with a synthetic training CSV generated from the
+questionnaire's feature names, trains a model bundle from it, then times each
+stage (questionnaire load, feature vectors, prediction, recommendations,
+rendering, assessment logging) and Flask test-client round trips at single-row
+and batch sizes, plus cold import time of the serving modules in fresh
+interpreters (python -X importtime). Results are written as JSON; pass
+--baseline to compare against an earlier run and flag regressions.
+
+    python benchmark.py --output bench.json
+    python benchmark.py --baseline bench.json --fail-on-regression
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from config import Config
+
+TARGET_SCORES = {
+    'Depression_Category': ('Depression_Score',),
+    'Anxiety_Category': ('Anxiety_Score',),
+    'Stress_Category': ('Stress_Score',),
+    'Wellbeing_Category': ('Wellbeing_Score',),
+    'Overall_Wellbeing_Category': ('Wellbeing_Score', 'Sleep_Quality_Score', 'Social_Support_Score')
+}
+# Serving entry points timed by import_time(), and the training-only packages they should not load
+IMPORT_MODULES = ('models', 'app')
+TRAINING_ONLY_MODULES = ('pandas', 'sklearn', 'scipy')
+
+CONCERN_LEVELS = ('Low Concern', 'Mild to Moderate Concern', 'High Concern')
+WELLBEING_LEVELS = ('Low Well-being', 'Moderate Well-being', 'High Well-being')
+
+
+def questionnaire_features(questions_data):
+    """[(question id, model_target, allowed values)] in questionnaire order"""
+    option_sets = questions_data['option_sets']
+    return [
+        (q['id'], q.get('model_target'), [o['value'] for o in option_sets[q['options_id']]])
+        for section in questions_data['sections'] for q in section['questions']
+    ]
+
+
+def random_answers(features, rng, fraction=1.0):
+    """One answer set; fraction < 1 answers a random subset (like quick mode)"""
+    return {
+        question_id: int(rng.choice(values))
+        for question_id, _, values in features
+        if fraction >= 1.0 or rng.random() < fraction
+    }
+
+
+def generate_training_csv(path, questions_data, rows, seed=0):
+    """Synthetic training data: random answers, targets from tertiles of the summed score groups"""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    features = questionnaire_features(questions_data)
+    df = pd.DataFrame({question_id: rng.choice(values, rows) for question_id, _, values in features})
+
+    for target, score_names in TARGET_SCORES.items():
+        columns = [question_id for question_id, model_target, _ in features if model_target in score_names]
+        score = df[columns].sum(axis=1).to_numpy() + rng.normal(0, 1, rows)
+        levels = WELLBEING_LEVELS if 'Wellbeing' in target else CONCERN_LEVELS
+        df[target] = np.asarray(levels)[np.searchsorted(np.quantile(score, [1 / 3, 2 / 3]), score)]
+
+    df.to_csv(path, index=False)
+    return path
+
+
+def measure(fn, min_time=0.5, max_calls=100000, warmup=3):
+    """Call fn repeatedly for about min_time seconds; per-call latency summary in microseconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < max_calls and (time.perf_counter() - started < min_time or len(samples) < 5):
+        t0 = time.perf_counter_ns()
+        fn()
+        samples.append(time.perf_counter_ns() - t0)
+    us = np.asarray(samples) / 1000.0
+    return {
+        'calls': len(samples),
+        'mean_us': round(float(us.mean()), 2),
+        'p50_us': round(float(np.percentile(us, 50)), 2),
+        'p95_us': round(float(np.percentile(us, 95)), 2),
+        'min_us': round(float(us.min()), 2)
+    }
+
+
+def import_time(module, workdir, repeats=5):
+    """Cold `import module` in fresh interpreters under -X importtime, against workdir's data
+
+    Returns the usual latency summary of the module's cumulative import time
+    plus which training-only packages the import pulled in.
+    """
+    code = (
+        "import sys; from pathlib import Path; from config import Config; "
+        f"Config.DATA_DIR = Path({str(workdir / 'data')!r}); Config.MODELS_DIR = Path({str(workdir / 'models')!r}); "
+        "Config.JOBS_DB = Config.DATA_DIR / 'jobs.sqlite3'; "
+        f"import {module}; "
+        f"print('loaded:' + ','.join(m for m in {TRAINING_ONLY_MODULES!r} if m in sys.modules))"
+    )
+    samples, loaded = [], []
+    for _ in range(repeats):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=Path(__file__).parent,
+                                capture_output=True, text=True, timeout=120)
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed: {result.stderr.strip().splitlines()[-1:]}")
+        for line in result.stderr.splitlines():
+            # "import time: self [us] | cumulative | name", nesting shown by indenting name
+            parts = line.split('|')
+            if len(parts) == 3 and parts[2].rstrip() == f" {module}":
+                samples.append(int(parts[1]))
+        loaded = result.stdout.strip().splitlines()[-1].split(':', 1)[1]
+    us = np.asarray(samples, dtype=float)
+    return {
+        'calls': len(samples),
+        'mean_us': round(float(us.mean()), 2),
+        'p50_us': round(float(np.percentile(us, 50)), 2),
+        'p95_us': round(float(np.percentile(us, 95)), 2),
+        'min_us': round(float(us.min()), 2),
+        'training_modules_loaded': [m for m in loaded.split(',') if m]
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=Path(__file__).parent,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run(args):
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix='mindscope_bench_'))
+    Config.DATA_DIR = workdir / "data"
+    Config.MODELS_DIR = workdir / "models"
+    Config.JOBS_DB = Config.DATA_DIR / "jobs.sqlite3"
+    Config.DATA_DIR.mkdir(parents=True, exist_ok=True)
+    Config.MODELS_DIR.mkdir(parents=True, exist_ok=True)
+
+    with open(Config.QUESTIONS_FILE, 'r', encoding='utf-8') as f:
+        questions_data = json.load(f)
+    features = questionnaire_features(questions_data)
+    rng = np.random.default_rng(args.seed)
+    results = {}
+    quiet = open(os.devnull, 'w') if not args.verbose else None
+
+    def record(name, fn, rows=1):
+        stats = measure(fn, min_time=args.min_time)
+        if rows > 1:
+            stats['rows'] = rows
+            stats['rows_per_s'] = round(rows / (stats['p50_us'] / 1e6), 1)
+        results[name] = stats
+        print(f"{name:42} p50 {stats['p50_us']:>11.1f} us   p95 {stats['p95_us']:>11.1f} us   ({stats['calls']} calls)",
+              file=sys.__stdout__)
+
+    @contextlib.contextmanager
+    def silenced():
+        if not quiet:
+            yield
+            return
+        with contextlib.redirect_stdout(quiet), warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            yield
+
+    # Train (once per workdir)
+    from models import MentalHealthModel
+    if not (Config.MODELS_DIR / "model_metadata.json").exists():
+        csv_path = generate_training_csv(Config.DATA_DIR / "mental_health_data.csv", questions_data,
+                                         args.rows, args.seed)
+        started = time.perf_counter()
+        with silenced():
+            MentalHealthModel().train_models(csv_path, models_dir=Config.MODELS_DIR, n_jobs=args.n_jobs)
+        results['train_models'] = {'rows': args.rows, 'seconds': round(time.perf_counter() - started, 3)}
+        print(f"{'train_models':42} {results['train_models']['seconds']}s for {args.rows} rows", file=sys.__stdout__)
+
+    # Cold start: each serving module imported in a fresh interpreter
+    for module in IMPORT_MODULES:
+        stats = results[f'import {module}'] = import_time(module, workdir, args.import_repeats)
+        loaded = ', '.join(stats['training_modules_loaded']) or 'none'
+        print(f"{'import ' + module:42} p50 {stats['p50_us']:>11.1f} us   training-only modules loaded: {loaded}",
+              file=sys.__stdout__)
+
+    with silenced():
+        import app as app_module
+    client = app_module.app.test_client()
+    model = app_module.model_registry.current()
+    sklearn_model = MentalHealthModel()
+    sklearn_model.load_models(Config.MODELS_DIR, use_bundle=False)
+
+    answers = random_answers(features, rng)
+    batches = {size: [random_answers(features, rng) for _ in range(size)] for size in args.batch_sizes}
+    predictions = model.predict_from_answers(answers, None)
+
+    with silenced():
+        # Questionnaire
+        from questionnaire import QuestionnaireCache
+        record('load_questions', app_module.load_questions)
+        record('load_questions_cold', lambda: QuestionnaireCache(check_interval=0).get())
+
+        # Features and prediction
+        record('create_feature_vector', lambda: model.create_feature_vector_from_answers(answers, None))
+        record('predict_from_answers', lambda: model.predict_from_answers(answers, None))
+        record('predict_from_answers_sklearn',
+               lambda: sklearn_model.predict_from_answers(answers, None, engine='sklearn'))
+        for size, batch in batches.items():
+            record(f'create_feature_matrix[{size}]', lambda b=batch: model.create_feature_matrix_from_answers(b), size)
+            record(f'predict_batch[{size}]', lambda b=batch: model.predict_batch(b), size)
+            record(f'predict_batch_sklearn[{size}]',
+                   lambda b=batch: sklearn_model.predict_batch(b, engine='sklearn'), size)
+
+        # Post-processing
+        record('get_recommendations', lambda: app_module.recommendation_engine.get_recommendations(predictions, 4))
+        record('render_results', lambda: app_module.result_renderer.render(predictions, 'full'))
+        record('save_assessment_data', lambda: app_module.save_assessment_data(
+            answers, predictions, datetime.now().isoformat(), 'bench', 'full'))
+
+        # Flask round trips
+        record('GET /api/questions', lambda: client.get('/api/questions'))
+        record('GET /api/questions (gzip)', lambda: client.get('/api/questions', headers={'Accept-Encoding': 'gzip'}))
+        record('GET /api/questions?mode=quick', lambda: client.get('/api/questions?mode=quick'))
+        record('POST /api/assess', lambda: client.post('/api/assess', json={'answers': answers}))
+        batching = Config.INFERENCE_BATCHING
+        Config.INFERENCE_BATCHING = not batching
+        record(f"POST /api/assess (batching {'on' if not batching else 'off'})",
+               lambda: client.post('/api/assess', json={'answers': answers}))
+        Config.INFERENCE_BATCHING = batching
+        for size, batch in batches.items():
+            if size <= Config.MAX_BATCH_SIZE:
+                body = {'assessments': [{'answers': a} for a in batch]}
+                record(f'POST /api/assess/batch[{size}]', lambda b=body: client.post('/api/assess/batch', json=b), size)
+
+        from append_log import close_all
+        close_all()
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'engine': Config.INFERENCE_ENGINE,
+            'inference_batching': Config.INFERENCE_BATCHING,
+            'training_rows': args.rows,
+            'workdir': str(workdir)
+        },
+        'results': results
+    }
+
+
+def compare(current, baseline, threshold):
+    """Print p50 ratios against a baseline run; return the names that regressed beyond threshold"""
+    regressions = []
+    print(f"\nvs baseline {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')})")
+    for name, stats in current['results'].items():
+        old = baseline['results'].get(name)
+        if not old or 'p50_us' not in stats or 'p50_us' not in old:
+            continue
+        ratio = stats['p50_us'] / old['p50_us'] if old['p50_us'] else float('inf')
+        flag = '  REGRESSION' if ratio > threshold else ''
+        print(f"{name:42} {old['p50_us']:>11.1f} -> {stats['p50_us']:>11.1f} us  x{ratio:.2f}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the MindScope assessment pipeline offline')
+    parser.add_argument('--output', default='benchmark_results.json', help='where to write the results JSON')
+    parser.add_argument('--baseline', help='earlier results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25, help='p50 ratio counted as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true', help='exit 1 when anything regressed')
+    parser.add_argument('--workdir', help='reuse a workspace (and its trained bundle) instead of a temp dir')
+    parser.add_argument('--rows', type=int, default=2000, help='synthetic training rows')
+    parser.add_argument('--batch-sizes', type=lambda s: [int(x) for x in s.split(',')], default=[1, 64, 1000])
+    parser.add_argument('--min-time', type=float, default=0.5, help='seconds spent timing each benchmark')
+    parser.add_argument('--import-repeats', type=int, default=5, help='fresh interpreters per import timing')
+    parser.add_argument('--n-jobs', type=int, default=None, help='training worker processes')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--verbose', action='store_true', help='show training and request logs')
+    args = parser.parse_args()
+
+    current = run(args)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(current, f, indent=2)
+    print(f"\n📊 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressed = compare(current, json.load(f), args.threshold)
+        if regressed and args.fail_on_regression:
+            sys.exit(1)
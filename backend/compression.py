@@ -0,0 +1,326 @@
+"""Post-training model compression with an accuracy / size / latency report
+
+Runs after train_models: rebuilds the trained bundle's held-out split (same
+CSV, same seeded split), builds compressed candidates and scores each one on
+it. A candidate is a comma-separated spec:
+
+  trees=N         keep N trees per forest (bootstrap trees are exchangeable,
+                  so the first N are a random subset)
+  depth=D         cap every tree at depth D; split nodes already carry their
+                  class distribution, so deeper subtrees collapse into leaves
+  float32         float32 thresholds and int32 node indices (prediction-identical)
+  float32-values  additionally store leaf distributions as float32
+  distill         replace the per-target forests by one multi-output forest
+                  (sized by trees/depth) trained on the teacher's labels for
+                  the training split plus synthetic rows
+
+    python compression.py
+    python compression.py --latency-budget-us 400 --apply --output-dir ../models/compressed
+"""
+import argparse
+import copy
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from config import Config
+from forest_engine import CompiledForestEngine
+from models import MentalHealthModel
+from benchmark import measure
+
+DEFAULT_CANDIDATES = (
+    'baseline',
+    'float32',
+    'trees=75,float32',
+    'trees=40,float32',
+    'depth=10,float32',
+    'depth=8,float32',
+    'trees=40,depth=10,float32',
+    'distill,trees=40,depth=12,float32',
+    'distill,trees=20,depth=10,float32',
+)
+
+# Synthetic rows per training row used for distillation
+DISTILL_AUGMENT = 1.0
+
+
+def parse_spec(spec):
+    options = {'trees': None, 'depth': None, 'float32': False, 'float32_values': False, 'distill': False}
+    for token in filter(None, (t.strip() for t in spec.split(','))):
+        key, _, value = token.partition('=')
+        if key in ('trees', 'depth') and value:
+            options[key] = int(value)
+        elif key == 'float32' and not value:
+            options['float32'] = True
+        elif key == 'float32-values' and not value:
+            options['float32'] = options['float32_values'] = True
+        elif key == 'distill' and not value:
+            options['distill'] = True
+        elif key != 'baseline':
+            raise ValueError(f"Unknown compression option: {token}")
+    return options
+
+
+def select_trees(forest, n_trees):
+    """Shallow copy of forest keeping its first n_trees trees"""
+    forest = copy.copy(forest)
+    forest.estimators_ = forest.estimators_[:n_trees]
+    forest.n_estimators = len(forest.estimators_)
+    return forest
+
+
+def _cap_tree(estimator, depth):
+    """Copy of a fitted decision tree with every node at depth `depth` turned into a leaf"""
+    from sklearn.tree._tree import Tree, TREE_LEAF, TREE_UNDEFINED
+
+    tree = estimator.tree_
+    if tree.max_depth <= depth:
+        return estimator
+
+    state = tree.__getstate__()
+    nodes, values = state['nodes'], state['values']
+
+    # Depth-first preorder like sklearn's builder; children are renumbered afterwards
+    keep, node_depths, stack = [], [], [(0, 0)]
+    while stack:
+        node, node_depth = stack.pop()
+        keep.append(node)
+        node_depths.append(node_depth)
+        if node_depth < depth and nodes['left_child'][node] != TREE_LEAF:
+            stack.append((nodes['right_child'][node], node_depth + 1))
+            stack.append((nodes['left_child'][node], node_depth + 1))
+
+    keep = np.asarray(keep)
+    new_ids = np.full(len(nodes), TREE_LEAF, dtype=np.int64)
+    new_ids[keep] = np.arange(len(keep))
+
+    pruned = nodes[keep].copy()
+    leaf = (np.asarray(node_depths) >= depth) | (pruned['left_child'] == TREE_LEAF)
+    pruned['left_child'] = np.where(leaf, TREE_LEAF, new_ids[np.maximum(pruned['left_child'], 0)])
+    pruned['right_child'] = np.where(leaf, TREE_LEAF, new_ids[np.maximum(pruned['right_child'], 0)])
+    pruned['feature'][leaf] = TREE_UNDEFINED
+    pruned['threshold'][leaf] = TREE_UNDEFINED
+
+    n_classes = np.atleast_1d(estimator.n_classes_).astype(np.intp)
+    new_tree = Tree(estimator.n_features_in_, n_classes, estimator.n_outputs_)
+    new_tree.__setstate__({
+        'max_depth': depth,
+        'node_count': len(keep),
+        'nodes': pruned,
+        'values': np.ascontiguousarray(values[keep])
+    })
+    estimator = copy.copy(estimator)
+    estimator.tree_ = new_tree
+    return estimator
+
+
+def cap_depth(forest, depth):
+    """Copy of forest with every tree capped at depth"""
+    forest = copy.copy(forest)
+    forest.estimators_ = [_cap_tree(estimator, depth) for estimator in forest.estimators_]
+    return forest
+
+
+def distill(model, teacher, X_train_scaled, n_trees, depth, augment=DISTILL_AUGMENT, seed=42):
+    """Fit one multi-output forest on the teacher engine's labels (training rows plus synthetic rows)
+
+    Synthetic rows draw every feature independently from its training
+    column, covering answer combinations the training data lacks.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(seed)
+    n_synthetic = int(len(X_train_scaled) * augment)
+    synthetic = np.column_stack([rng.choice(column, n_synthetic) for column in X_train_scaled.T])
+    X = np.vstack([X_train_scaled, synthetic])
+
+    probabilities = teacher.predict_proba(X, scaled=True)
+    Y = np.column_stack([teacher.classes[target].take(probabilities[target].argmax(axis=1))
+                         for target in teacher.target_columns])
+
+    params = model.get_forest_params(teacher.target_columns[0])
+    params.update(n_estimators=n_trees or params['n_estimators'], max_depth=depth or params.get('max_depth'),
+                  n_jobs=Config.TRAINING_N_JOBS)
+    return RandomForestClassifier(**params).fit(X, Y)
+
+
+def build_candidate(spec, model, teacher, X_train_scaled):
+    """Return (engine, forests) for a spec; forests is None for a distilled model"""
+    options = parse_spec(spec)
+    targets = teacher.target_columns
+
+    if options['distill']:
+        student = distill(model, teacher, X_train_scaled, options['trees'], options['depth'])
+        engine, forests = CompiledForestEngine.from_multi_output(student, targets, model.scaler), None
+    else:
+        forests = {target: model.models[target] for target in targets}
+        if options['trees']:
+            forests = {target: select_trees(forest, options['trees']) for target, forest in forests.items()}
+        if options['depth']:
+            forests = {target: cap_depth(forest, options['depth']) for target, forest in forests.items()}
+        engine = CompiledForestEngine(forests, model.scaler, targets)
+
+    if options['float32']:
+        engine = engine.compact(float32_values=options['float32_values'])
+    return engine, forests
+
+
+def predict_labels(engine, X):
+    probabilities = engine.predict_proba(X)
+    return {target: engine.classes[target].take(probabilities[target].argmax(axis=1))
+            for target in engine.target_columns}
+
+
+def evaluate(engine, X_test, y_test, reference_labels, min_time=0.3):
+    """Held-out accuracy, agreement with the uncompressed model, size and scoring latency"""
+    labels = predict_labels(engine, X_test)
+    accuracy = {target: float(np.mean(labels[target] == y_test[target])) for target in engine.target_columns}
+    agreement = float(np.mean([np.mean(labels[t] == reference_labels[t]) for t in engine.target_columns]))
+
+    rows = iter(range(10 ** 9))
+    single = measure(lambda: engine.predict_proba(X_test[next(rows) % len(X_test)]), min_time=min_time)
+    batch = X_test[:64]
+    batched = measure(lambda: engine.predict_proba(batch), min_time=min_time)
+
+    return {
+        'accuracy': {t: round(a, 4) for t, a in accuracy.items()},
+        'mean_accuracy': round(float(np.mean(list(accuracy.values()))), 4),
+        'agreement': round(agreement, 4),
+        'trees': int(len(engine.roots)),
+        'nodes': int(engine.node_count),
+        'max_depth': int(engine.max_depth),
+        'bytes': int(engine.nbytes),
+        'latency_1_row_p50_us': single['p50_us'],
+        'latency_1_row_p95_us': single['p95_us'],
+        'latency_64_rows_p50_us': batched['p50_us'],
+    }
+
+
+def holdout_split(model, csv_path):
+    """Reproduce train_models' split of csv_path: (X_train_scaled, X_test, encoded y_test)"""
+    X, y_dict = model.load_and_prepare_data(csv_path, None)
+    if X is None:
+        raise ValueError(f"Could not load {csv_path}")
+    feature_names = model.metadata.get('feature_names') or list(X.columns)
+    if list(X.columns) != list(feature_names):
+        X = X[feature_names]
+    model.feature_names = list(feature_names)
+
+    X_train, X_test, _, y_test_dict = model.train_test_split_multiple(X, y_dict)
+    y_test = {target: model.label_encoders[target].transform(np.asarray(y_test_dict[target]))
+              for target in model.models if target in y_test_dict}
+    X_train_scaled = model.scaler.transform(np.asarray(X_train, dtype=np.float64))
+    return X_train_scaled, np.asarray(X_test, dtype=np.float64), y_test
+
+
+def pick(results, budget_us):
+    """Most accurate candidate within the single-row latency budget (smaller wins ties)"""
+    eligible = [r for r in results if budget_us is None or r['latency_1_row_p50_us'] <= budget_us]
+    if not eligible:
+        return None
+    return max(eligible, key=lambda r: (r['mean_accuracy'], -r['bytes']))
+
+
+def print_table(results, chosen=None):
+    print(f"\n{'candidate':36} {'trees':>6} {'nodes':>8} {'size KB':>9} {'mean acc':>9} {'Δ acc':>7} "
+          f"{'agree':>6} {'1 row µs':>9} {'64 rows µs':>11}")
+    baseline = results[0]['mean_accuracy']
+    for r in results:
+        mark = ' ★' if chosen is r else ''
+        print(f"{r['candidate']:36} {r['trees']:6d} {r['nodes']:8d} {r['bytes'] / 1024:9.1f} "
+              f"{r['mean_accuracy']:9.4f} {r['mean_accuracy'] - baseline:+7.4f} {r['agreement']:6.3f} "
+              f"{r['latency_1_row_p50_us']:9.1f} {r['latency_64_rows_p50_us']:11.1f}{mark}")
+
+
+def run(args):
+    models_dir = Path(args.models_dir)
+    model = MentalHealthModel()
+    model.load_models(models_dir, use_bundle=False)
+    if not model.models or getattr(model, 'scaler', None) is None:
+        raise ValueError(f"No trained sklearn models and scaler at {models_dir}; run train_models first")
+
+    X_train_scaled, X_test, y_test = holdout_split(model, args.csv)
+    targets = [target for target in model.target_columns if target in model.models and target in y_test]
+    teacher = CompiledForestEngine(model.models, model.scaler, targets)
+    reference = predict_labels(teacher, X_test)
+    print(f"Held-out split: {len(X_test)} rows, {len(targets)} targets; training split {len(X_train_scaled)} rows")
+
+    results, engines = [], {}
+    for spec in args.candidates:
+        started = time.perf_counter()
+        engine, forests = build_candidate(spec, model, teacher, X_train_scaled)
+        result = {'candidate': spec, 'build_seconds': round(time.perf_counter() - started, 3)}
+        result.update(evaluate(engine, X_test, y_test, reference, args.min_time))
+        results.append(result)
+        engines[spec] = (engine, forests)
+        print(f"  {spec:36} mean accuracy {result['mean_accuracy']:.4f}, "
+              f"{result['bytes'] / 1024:.0f} KB, {result['latency_1_row_p50_us']:.0f} µs/row")
+
+    chosen = pick(results, args.latency_budget_us)
+    print_table(results, chosen)
+    if args.latency_budget_us is not None:
+        if chosen:
+            print(f"\n★ Best within {args.latency_budget_us:g} µs/row: {chosen['candidate']}")
+        else:
+            print(f"\nNo candidate meets {args.latency_budget_us:g} µs/row")
+
+    report = {
+        'models_dir': str(models_dir),
+        'bundle_version': model.bundle_version,
+        'holdout_rows': len(X_test),
+        'latency_budget_us': args.latency_budget_us,
+        'chosen': chosen['candidate'] if chosen else None,
+        'candidates': results
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"📊 Report written to {args.output}")
+
+    if args.apply:
+        if not chosen:
+            raise SystemExit('Nothing to apply')
+        engine, forests = engines[chosen['candidate']]
+        save_compressed(model, engine, forests, chosen, args.csv, args.output_dir)
+    return report
+
+
+def save_compressed(model, engine, forests, result, csv_path, output_dir):
+    """Write the chosen candidate as a new servable bundle
+
+    Pruned forests are saved as regular sklearn pickles too, so incremental
+    updates keep working; a distilled model is served from the bundle only.
+    """
+    parent_version = model.bundle_version
+    model.models = dict(forests) if forests is not None else {}
+    model._compiled_engine = engine  # keeps float32 arrays; save_models bundles the cached engine
+    model.training_run = {
+        'mode': 'compressed',
+        'parent_version': parent_version,
+        'compression': result['candidate'],
+        'holdout_accuracy': result['accuracy'],
+        'data_sources': [str(csv_path)],
+        'samples': None
+    }
+    model.save_models(output_dir)
+    print(f"🗜️  {result['candidate']} saved as bundle {model.metadata['bundle_version']} in {output_dir}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compress the trained models and report accuracy vs size vs latency')
+    parser.add_argument('--models-dir', default=str(Config.MODELS_DIR))
+    parser.add_argument('--csv', default=str(Config.DATA_DIR / "mental_health_data.csv"),
+                        help='the training CSV (its held-out split is rebuilt for evaluation)')
+    parser.add_argument('--candidates', nargs='+', default=list(DEFAULT_CANDIDATES), help='specs, e.g. trees=40,depth=10,float32')
+    parser.add_argument('--latency-budget-us', type=float, help='single-row p50 budget for picking a candidate')
+    parser.add_argument('--min-time', type=float, default=0.3, help='seconds spent timing each candidate')
+    parser.add_argument('--output', help='write the report as JSON')
+    parser.add_argument('--apply', action='store_true', help='save the picked candidate as a new bundle')
+    parser.add_argument('--output-dir', help='where --apply writes the bundle (default <models-dir>/compressed)')
+    args = parser.parse_args()
+    if args.apply and not args.output_dir:
+        args.output_dir = str(Path(args.models_dir) / 'compressed')
+
+    run(args)
@@ -13,15 +13,97 @@ class Config:
     API_PORT = int(os.getenv('API_PORT', 5000))
     DEBUG = os.getenv('DEBUG', 'True').lower() == 'true'
 
+    # Admin endpoints (/api/upload, /api/admin/*)
+    ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'mindscope2024')  # Change this!
+
     # CORS settings
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:8000,http://127.0.0.1:8000').split(',')
 
+    # Maximum number of submissions accepted by /api/assess/batch
+    MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', 1000))
+
+    # Load, validate and warm the model bundle at startup instead of on first request
+    WARM_UP_ON_START = os.getenv('WARM_UP_ON_START', 'True').lower() == 'true'
+    # Seconds between checks of MODELS_DIR/CURRENT for a bundle promoted by another worker
+    MODEL_POINTER_CHECK_INTERVAL = float(os.getenv('MODEL_POINTER_CHECK_INTERVAL', 5.0))
+
+    # Inference backend for MentalHealthModel: 'compiled' or 'sklearn'
+    INFERENCE_ENGINE = os.getenv('INFERENCE_ENGINE', 'compiled')
+
+    # Serve from the single-file model_bundle.joblib when present, memory-mapping
+    # its node arrays so pre-forked workers share one page-cache copy
+    USE_MODEL_BUNDLE = os.getenv('USE_MODEL_BUNDLE', 'True').lower() == 'true'
+    MODEL_BUNDLE_MMAP = os.getenv('MODEL_BUNDLE_MMAP', 'True').lower() == 'true'
+
+    # Micro-batch concurrent /api/assess predictions: wait up to the window (or row cap)
+    # for more requests, and fall back to the rule-based scorer after the timeout
+    INFERENCE_BATCHING = os.getenv('INFERENCE_BATCHING', 'True').lower() == 'true'
+    INFERENCE_BATCH_WINDOW_MS = float(os.getenv('INFERENCE_BATCH_WINDOW_MS', 2.0))
+    INFERENCE_BATCH_MAX_ROWS = int(os.getenv('INFERENCE_BATCH_MAX_ROWS', 64))
+    INFERENCE_TIMEOUT = float(os.getenv('INFERENCE_TIMEOUT', 2.0))  # seconds
+
+    # Pipeline metrics served on /metrics; each worker process snapshots its own to
+    # METRICS_DIR (default DATA_DIR/metrics) every flush interval for aggregation
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+    METRICS_DIR = os.getenv('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5.0))  # seconds
+
+    # On-demand request profiler (/api/admin/profile): requests profiled when none
+    # are specified, and the stack sampling interval
+    PROFILER_DEFAULT_REQUESTS = int(os.getenv('PROFILER_DEFAULT_REQUESTS', 100))
+    PROFILER_INTERVAL_MS = float(os.getenv('PROFILER_INTERVAL_MS', 5.0))
+
+    # Write-behind JSONL logs (assessments, feedback, shares)
+    APPEND_LOG_FLUSH_INTERVAL = float(os.getenv('APPEND_LOG_FLUSH_INTERVAL', 0.05))  # seconds
+    APPEND_LOG_FSYNC = os.getenv('APPEND_LOG_FSYNC', 'interval')  # 'always', 'interval' or 'never'
+    APPEND_LOG_FSYNC_INTERVAL = float(os.getenv('APPEND_LOG_FSYNC_INTERVAL', 1.0))  # seconds
+    APPEND_LOG_MAX_QUEUE = int(os.getenv('APPEND_LOG_MAX_QUEUE', 10000))
+    APPEND_LOG_MAX_BATCH = int(os.getenv('APPEND_LOG_MAX_BATCH', 1000))
+
+    # Persist the share ID -> offset index after this many new shares
+    SHARE_INDEX_SNAPSHOT_EVERY = int(os.getenv('SHARE_INDEX_SNAPSHOT_EVERY', 1000))
+
+    # Population percentile sketches (see population_stats.py)
+    POPULATION_SKETCH_K = int(os.getenv('POPULATION_SKETCH_K', 200))
+    POPULATION_MIN_SAMPLES = int(os.getenv('POPULATION_MIN_SAMPLES', 30))
+    POPULATION_REFRESH_INTERVAL = float(os.getenv('POPULATION_REFRESH_INTERVAL', 1.0))  # seconds
+    POPULATION_SNAPSHOT_EVERY = int(os.getenv('POPULATION_SNAPSHOT_EVERY', 500))
+    POPULATION_SEED_CHUNK_SIZE = int(os.getenv('POPULATION_SEED_CHUNK_SIZE', 10000))
+
+    # Worker processes for (target x CV fold) training fits; -1 uses every core
+    TRAINING_N_JOBS = int(os.getenv('TRAINING_N_JOBS', 1))
+
+    # Rows per chunk when streaming training CSVs (0 reads the whole file at once)
+    TRAINING_CSV_CHUNKSIZE = int(os.getenv('TRAINING_CSV_CHUNKSIZE', 20000))
+
+    # Trees added per target by an incremental update (POST /api/upload mode=incremental)
+    INCREMENTAL_TREES = int(os.getenv('INCREMENTAL_TREES', 25))
+
+    # Background jobs (retraining after uploads)
+    JOBS_DB = DATA_DIR / "jobs.sqlite3"
+    JOB_WORKER_NICE = int(os.getenv('JOB_WORKER_NICE', 10))
+    JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 5.0))  # seconds, for `jobs.py --forever`
+
     # Questions file
     QUESTIONS_FILE = DATA_DIR / "questions.json"
+    # Seconds between mtime checks of the cached questionnaire
+    QUESTIONS_CHECK_INTERVAL = float(os.getenv('QUESTIONS_CHECK_INTERVAL', 2.0))
+
+    # Optional recommendation catalog ({category level: [recommendation, ...]}); built-in list if absent
+    RECOMMENDATIONS_FILE = DATA_DIR / "recommendations.json"
+
+    # Pre-encoded /api/questions payloads: seeded quick selections kept, smallest body worth compressing
+    QUICK_PAYLOAD_CACHE_SIZE = int(os.getenv('QUICK_PAYLOAD_CACHE_SIZE', 256))
+    MIN_COMPRESS_SIZE = int(os.getenv('MIN_COMPRESS_SIZE', 1024))
+
+    # Unanswered features named in a full assessment's response (the total is always reported)
+    MISSING_FEATURES_LIMIT = int(os.getenv('MISSING_FEATURES_LIMIT', 20))
 
-    # Ensure directories exist
-    DATA_DIR.mkdir(exist_ok=True)
-    MODELS_DIR.mkdir(exist_ok=True)
+    # Memoized result renderings, keyed by predicted categories + mode
+    RENDER_CACHE_SIZE = int(os.getenv('RENDER_CACHE_SIZE', 2048))
 
-    # Debug: Print the path
-    print(f"Looking for questions at: {QUESTIONS_FILE}")
+    @classmethod
+    def ensure_directories(cls):
+        """Create the data and models directories; called by entry points, not at import"""
+        cls.DATA_DIR.mkdir(parents=True, exist_ok=True)
+        cls.MODELS_DIR.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,168 @@
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from config import Config
+
+try:
+    import orjson
+except ImportError:  # optional; falls back to the standard library encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is still offered
+    brotli = None
+
+# Preferred first when the client accepts several equally
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def _default(o):
+    if isinstance(o, Mapping):
+        return dict(o)
+    if hasattr(o, 'item') and hasattr(o, 'dtype'):
+        return o.item()  # NumPy scalars
+    if hasattr(o, 'isoformat'):
+        return o.isoformat()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """Serialize obj to compact UTF-8 JSON bytes (sorted keys, like Flask's default provider)"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_default, sort_keys=True, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def compress(body, encoding, fast=False):
+    """Encode body with 'br' or 'gzip'; fast trades ratio for speed on per-request bodies"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=5 if fast else 11)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6 if fast else 9, mtime=0)
+    return body
+
+
+def negotiate(accept_encodings):
+    """Best of ENCODINGS for a werkzeug Accept-Encoding header, or None for identity"""
+    best, best_quality = None, 0
+    for encoding in ENCODINGS:
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class EncodedPayload:
+    """A response body serialized once, with compressed variants built on first use and kept
+
+    etag (without quotes) is suffixed per content encoding, since each
+    encoding is a different representation. fast=True selects cheaper
+    compression for one-off, per-request bodies.
+    """
+
+    def __init__(self, body, etag=None, fast=False):
+        self.body = body
+        self.etag = etag
+        self.fast = fast
+        self._variants = {None: body}
+        self._lock = threading.Lock()
+
+    def precompress(self):
+        for encoding in ENCODINGS:
+            self.variant(encoding)
+        return self
+
+    def variant(self, encoding):
+        data = self._variants.get(encoding)
+        if data is None:
+            with self._lock:
+                data = self._variants.get(encoding)
+                if data is None:
+                    data = self._variants[encoding] = compress(self.body, encoding, self.fast)
+        return data
+
+    def etag_for(self, encoding):
+        if self.etag is None:
+            return None
+        return f"{self.etag}.{encoding}" if encoding else self.etag
+
+
+class QuestionnairePayloads:
+    """Pre-encoded /api/questions bodies for one questionnaire version
+
+    The full payload is serialized and compressed once. Quick payloads are
+    spliced from a pre-encoded prefix and per-question fragments, so a
+    random quick quiz costs a byte join; seeded (reproducible) quick payloads
+    are cached in a bounded LRU with their compressed variants.
+    """
+
+    QUICK_KEYS = ('mode', 'seed', 'total_questions', 'quick_questions')
+
+    def __init__(self, questionnaire):
+        self.version = questionnaire.version
+        self.full = EncodedPayload(
+            dumps(dict(questionnaire.data, mode='full', total_questions=questionnaire.total_questions)),
+            etag=f"{self.version}-full"
+        ).precompress()
+
+        base = {k: v for k, v in questionnaire.data.items() if k not in self.QUICK_KEYS}
+        self._quick_prefix = dumps(base)[:-1] + (b',' if base else b'')
+        self._question_bytes = tuple(dumps(question) for question in questionnaire.questions)
+        self._seeded = OrderedDict()
+        self._lock = threading.Lock()
+
+    def quick_body(self, indices, seed=None):
+        parts = [self._quick_prefix, b'"mode":"quick"']
+        if seed is not None:
+            parts.append(b',"seed":' + dumps(seed))
+        parts.append(b',"total_questions":%d,"quick_questions":[' % len(indices))
+        parts.append(b','.join(self._question_bytes[i] for i in indices))
+        parts.append(b']}')
+        return b''.join(parts)
+
+    def quick(self, questionnaire, seed=None, num_questions=12):
+        """EncodedPayload for a quick selection; only seeded selections are cached (and get an ETag)"""
+        if seed is None:
+            return EncodedPayload(self.quick_body(questionnaire.quick_sampler.select(num_questions)), fast=True)
+
+        key = (seed, num_questions)
+        with self._lock:
+            payload = self._seeded.get(key)
+            if payload is not None:
+                self._seeded.move_to_end(key)
+                return payload
+
+        indices = questionnaire.quick_sampler.select(num_questions, seed)
+        payload = EncodedPayload(self.quick_body(indices, seed), etag=f"{self.version}-quick-{seed}")
+        with self._lock:
+            self._seeded[key] = payload
+            while len(self._seeded) > Config.QUICK_PAYLOAD_CACHE_SIZE:
+                self._seeded.popitem(last=False)
+        return payload
+
+
+_payloads = None
+_payloads_lock = threading.Lock()
+
+
+def questionnaire_payloads(questionnaire):
+    """QuestionnairePayloads for this questionnaire version, rebuilt when the version changes"""
+    global _payloads
+    payloads = _payloads
+    if payloads is None or payloads.version != questionnaire.version:
+        with _payloads_lock:
+            if _payloads is None or _payloads.version != questionnaire.version:
+                _payloads = QuestionnairePayloads(questionnaire)
+            payloads = _payloads
+    return payloads
@@ -0,0 +1,110 @@
+import math
+from numbers import Real
+
+import numpy as np
+
+
+def invalid_answer_keys(answers):
+    """Keys whose answers are not finite numbers (strings, booleans, null, NaN, ...)"""
+    return [key for key, value in answers.items()
+            if isinstance(value, bool) or not isinstance(value, Real) or not math.isfinite(value)]
+
+
+class FeatureReport:
+    """What filling one answer set found: unknown answer keys and the columns it answered
+
+    Unanswered features are only listed when missing_features() is called, so
+    a report costs O(answers) to build rather than O(schema width).
+    """
+    __slots__ = ('index', 'unknown_keys', 'positions', 'error')
+
+    def __init__(self, index, unknown_keys=(), positions=(), error=None):
+        self.index = index
+        self.unknown_keys = list(unknown_keys)
+        self.positions = positions
+        self.error = error
+
+    @property
+    def n_missing(self):
+        # Answer keys are unique, so each answered column appears once
+        return 0 if self.error else self.index.n_features - len(self.positions)
+
+    def missing_features(self, limit=None):
+        """Names of unanswered feature columns, in schema order (the first limit of them)"""
+        if not self.n_missing:
+            return []
+        answered = set(self.positions)
+        missing = []
+        for position, name in enumerate(self.index.feature_names):
+            if position not in answered:
+                missing.append(name)
+                if limit is not None and len(missing) >= limit:
+                    break
+        return missing
+
+
+class FeatureIndex:
+    """Compiled feature-name -> column mapping for one model version
+
+    Built once when a model's feature list is loaded. Filling a row walks the
+    submitted answers only (a dict lookup per answer), so per-request cost
+    depends on the number of answers rather than the schema width. Unknown
+    answer keys and answered columns are collected in the same pass;
+    unanswered features stay 0, as in the training data's missing answers.
+    """
+
+    def __init__(self, feature_names):
+        self.feature_names = tuple(feature_names)
+        self.columns = {name: i for i, name in enumerate(self.feature_names)}
+        self.n_features = len(self.feature_names)
+
+    def __len__(self):
+        return self.n_features
+
+    def allocate(self, n_rows):
+        """Zeroed (n_rows, n_features) matrix for fill_matrix()"""
+        return np.zeros((n_rows, self.n_features))
+
+    def fill_row(self, answers, out):
+        """Write answers into the 1-D array out (assumed zeroed); return a FeatureReport"""
+        columns = self.columns
+        positions = []
+        values = []
+        unknown = []
+        for key, value in answers.items():
+            position = columns.get(key)
+            if position is None:
+                unknown.append(key)
+            else:
+                positions.append(position)
+                values.append(value)
+
+        if positions:
+            out[positions] = np.asarray(values, dtype=out.dtype)
+
+        return FeatureReport(self, unknown, positions)
+
+    def fill_vector(self, answers, out=None):
+        """Return (feature vector, report) for one answer set"""
+        if out is None:
+            out = np.zeros(self.n_features)
+        return out, self.fill_row(answers, out)
+
+    def fill_matrix(self, answers_list, out=None):
+        """Return (feature matrix, reports) for many answer sets
+
+        out may be a preallocated, zeroed matrix with at least len(answers_list)
+        rows (see allocate()); only its first len(answers_list) rows are used.
+        A row that can't be filled is left zeroed and its report carries an
+        error instead, so one malformed answer set doesn't fail the others.
+        """
+        if out is None:
+            out = self.allocate(len(answers_list))
+        reports = []
+        for row, answers in enumerate(answers_list):
+            try:
+                reports.append(self.fill_row(answers, out[row]))
+            except (TypeError, ValueError, AttributeError) as e:
+                out[row] = 0
+                reports.append(FeatureReport(self, error=str(e)))
+        return out[:len(answers_list)], reports
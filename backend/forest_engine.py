@@ -0,0 +1,287 @@
+import numpy as np
+
+
+class CompiledForestEngine:
+    """Flat-array evaluator for the per-target RandomForest models
+
+    All trees of all targets are packed into contiguous node arrays
+    (feature, threshold, interleaved children, normalized leaf distribution)
+    and walked level by level for every (row, tree) pair at once, so a row or
+    a batch is scored for every target in a single pass. Scaling is folded in
+    and inputs are cast to float32 before comparison, exactly as sklearn's
+    tree code does, so probabilities match RandomForestClassifier.predict_proba.
+
+    A multi-output forest (see from_multi_output) is packed once and shared by
+    its targets: each target reads its own column block of the leaf values.
+    """
+
+    # Rows evaluated per pass; bounds the (rows x trees) index matrix
+    CHUNK_SIZE = 4096
+
+    # Arrays that make up the compiled forest (see get_state/from_state)
+    ARRAY_FIELDS = ('feature', 'threshold', 'children', 'value', 'roots')
+
+    def __init__(self, models, scaler=None, target_columns=None):
+        targets = [t for t in (target_columns or list(models)) if t in models]
+        if not targets:
+            raise ValueError("No models to compile")
+
+        n_classes = {t: len(models[t].classes_) for t in targets}
+        max_classes = max(n_classes.values())
+
+        features, thresholds, lefts, rights, values = [], [], [], [], []
+        roots = []
+        tree_slices = {}
+        node_offset = 0
+        tree_offset = 0
+        max_depth = 0
+
+        for target in targets:
+            model = models[target]
+            if not hasattr(model, 'estimators_'):
+                raise ValueError(f"{target} model is not a fitted forest")
+
+            start = tree_offset
+            for estimator in model.estimators_:
+                tree = estimator.tree_
+                is_leaf = tree.children_left < 0
+                node_ids = np.arange(tree.node_count)
+
+                # Leaves point to themselves and always go "left", so extra
+                # iterations past a leaf are no-ops
+                feature = np.where(is_leaf, 0, tree.feature)
+                threshold = np.where(is_leaf, np.inf, tree.threshold)
+                left = np.where(is_leaf, node_ids, tree.children_left) + node_offset
+                right = np.where(is_leaf, node_ids, tree.children_right) + node_offset
+
+                value = tree.value[:, 0, :n_classes[target]].astype(np.float64)
+                totals = value.sum(axis=1, keepdims=True)
+                totals[totals == 0] = 1.0
+                leaf_value = np.zeros((tree.node_count, max_classes))
+                leaf_value[:, :n_classes[target]] = value / totals
+
+                features.append(feature)
+                thresholds.append(threshold)
+                lefts.append(left)
+                rights.append(right)
+                values.append(leaf_value)
+                roots.append(node_offset)
+
+                node_offset += tree.node_count
+                tree_offset += 1
+                max_depth = max(max_depth, tree.max_depth)
+
+            tree_slices[target] = (start, tree_offset)
+
+        self.target_columns = targets
+        self.n_classes = n_classes
+        self.classes = {t: np.asarray(models[t].classes_) for t in targets}
+        self.n_features = int(getattr(models[targets[0]], 'n_features_in_', 0))
+        self.tree_slices = tree_slices
+        self.value_offsets = {t: 0 for t in targets}
+        self.max_depth = max_depth
+
+        self.feature = np.ascontiguousarray(np.concatenate(features), dtype=np.intp)
+        self.threshold = np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64)
+        # Interleaved [left, right] pairs so one gather picks the next node
+        self.children = np.empty(2 * node_offset, dtype=np.intp)
+        self.children[0::2] = np.concatenate(lefts)
+        self.children[1::2] = np.concatenate(rights)
+        self.value = np.ascontiguousarray(np.concatenate(values), dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+
+        if scaler is not None and getattr(scaler, 'with_mean', True) and getattr(scaler, 'mean_', None) is not None:
+            self.mean = np.asarray(scaler.mean_, dtype=np.float64)
+        else:
+            self.mean = None
+        if scaler is not None and getattr(scaler, 'with_std', True) and getattr(scaler, 'scale_', None) is not None:
+            self.scale = np.asarray(scaler.scale_, dtype=np.float64)
+        else:
+            self.scale = None
+
+    @classmethod
+    def from_multi_output(cls, forest, target_columns, scaler=None):
+        """Compile one multi-output RandomForestClassifier whose outputs are target_columns, in order
+
+        The trees are stored once; target i reads leaf-value columns
+        [value_offsets[target], + n_classes[target]).
+        """
+        if not hasattr(forest, 'estimators_'):
+            raise ValueError("Multi-output model is not a fitted forest")
+        classes_list = forest.classes_ if forest.n_outputs_ > 1 else [forest.classes_]
+        if len(classes_list) != len(target_columns):
+            raise ValueError(f"Forest has {len(classes_list)} outputs for {len(target_columns)} targets")
+
+        n_classes = {t: len(classes) for t, classes in zip(target_columns, classes_list)}
+        max_classes = max(n_classes.values())
+        width = max_classes * len(target_columns)
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        node_offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            is_leaf = tree.children_left < 0
+            node_ids = np.arange(tree.node_count)
+
+            leaf_value = np.zeros((tree.node_count, width))
+            for output, target in enumerate(target_columns):
+                value = tree.value[:, output, :n_classes[target]].astype(np.float64)
+                totals = value.sum(axis=1, keepdims=True)
+                totals[totals == 0] = 1.0
+                start = output * max_classes
+                leaf_value[:, start:start + n_classes[target]] = value / totals
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + node_offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + node_offset)
+            values.append(leaf_value)
+            roots.append(node_offset)
+            node_offset += tree.node_count
+            max_depth = max(max_depth, tree.max_depth)
+
+        engine = cls.__new__(cls)
+        engine.target_columns = list(target_columns)
+        engine.n_classes = n_classes
+        engine.classes = {t: np.asarray(classes) for t, classes in zip(target_columns, classes_list)}
+        engine.n_features = int(getattr(forest, 'n_features_in_', 0))
+        n_trees = len(forest.estimators_)
+        engine.tree_slices = {t: (0, n_trees) for t in target_columns}
+        engine.value_offsets = {t: i * max_classes for i, t in enumerate(target_columns)}
+        engine.max_depth = max_depth
+
+        engine.feature = np.ascontiguousarray(np.concatenate(features), dtype=np.intp)
+        engine.threshold = np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64)
+        engine.children = np.empty(2 * node_offset, dtype=np.intp)
+        engine.children[0::2] = np.concatenate(lefts)
+        engine.children[1::2] = np.concatenate(rights)
+        engine.value = np.ascontiguousarray(np.concatenate(values), dtype=np.float64)
+        engine.roots = np.asarray(roots, dtype=np.intp)
+
+        engine.mean = engine.scale = None
+        if scaler is not None and getattr(scaler, 'with_mean', True) and getattr(scaler, 'mean_', None) is not None:
+            engine.mean = np.asarray(scaler.mean_, dtype=np.float64)
+        if scaler is not None and getattr(scaler, 'with_std', True) and getattr(scaler, 'scale_', None) is not None:
+            engine.scale = np.asarray(scaler.scale_, dtype=np.float64)
+        return engine
+
+    def compact(self, float32_values=False):
+        """Copy with float32 thresholds and int32 node indices (and optionally float32 leaf values)
+
+        Inputs are compared as float32, so rounding each threshold down to the
+        nearest float32 keeps every split decision, and therefore every
+        prediction, identical. float32_values also halves the leaf
+        distributions at about 1e-7 precision, which can flip exact ties.
+        """
+        if self.node_count * 2 >= np.iinfo(np.int32).max:
+            raise ValueError("Forest too large for 32-bit node indices")
+        engine = CompiledForestEngine.from_state(self.get_state())
+
+        threshold = self.threshold.astype(np.float32)
+        above = threshold > self.threshold  # rounded up past the split point
+        threshold[above] = np.nextafter(threshold[above], np.float32(-np.inf))
+        engine.threshold = threshold
+        engine.feature = self.feature.astype(np.int32)
+        engine.children = self.children.astype(np.int32)
+        engine.roots = self.roots.astype(np.int32)
+        if float32_values:
+            engine.value = self.value.astype(np.float32)
+        return engine
+
+    @property
+    def node_count(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.ARRAY_FIELDS)
+
+    def get_state(self):
+        """Plain dict of arrays and small metadata, suitable for joblib/np.save"""
+        state = {name: getattr(self, name) for name in self.ARRAY_FIELDS}
+        state.update({
+            'target_columns': list(self.target_columns),
+            'n_classes': dict(self.n_classes),
+            'classes': dict(self.classes),
+            'n_features': self.n_features,
+            'tree_slices': {t: list(bounds) for t, bounds in self.tree_slices.items()},
+            'value_offsets': dict(self.value_offsets),
+            'max_depth': self.max_depth,
+            'mean': self.mean,
+            'scale': self.scale
+        })
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild an engine from get_state() output without copying its arrays
+
+        Arrays may be read-only memory maps; evaluation never writes to them.
+        """
+        engine = cls.__new__(cls)
+        for name in cls.ARRAY_FIELDS:
+            setattr(engine, name, state[name])
+        engine.target_columns = list(state['target_columns'])
+        engine.n_classes = dict(state['n_classes'])
+        engine.classes = dict(state['classes'])
+        engine.n_features = state['n_features']
+        engine.tree_slices = {t: tuple(bounds) for t, bounds in state['tree_slices'].items()}
+        # Bundles from before multi-output support: every target starts at column 0
+        engine.value_offsets = dict(state.get('value_offsets') or {t: 0 for t in engine.target_columns})
+        engine.max_depth = state['max_depth']
+        engine.mean = state['mean']
+        engine.scale = state['scale']
+        return engine
+
+    def transform(self, features):
+        """Apply the folded StandardScaler the same way sklearn does"""
+        X = np.array(features, dtype=np.float64, ndmin=2)
+        if self.mean is not None:
+            X -= self.mean
+        if self.scale is not None:
+            X /= self.scale
+        return X
+
+    def predict_proba(self, features, scaled=False):
+        """Return {target: (n_rows, n_classes) probabilities} for raw (or pre-scaled) features"""
+        X = np.array(features, dtype=np.float64, ndmin=2) if scaled else self.transform(features)
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = X.astype(np.float32)
+
+        if len(X) <= self.CHUNK_SIZE:
+            return self._predict_proba_chunk(X)
+
+        chunks = [self._predict_proba_chunk(X[i:i + self.CHUNK_SIZE])
+                  for i in range(0, len(X), self.CHUNK_SIZE)]
+        return {target: np.concatenate([chunk[target] for chunk in chunks])
+                for target in self.target_columns}
+
+    def _predict_proba_chunk(self, X):
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+        if n_rows == 1:
+            row_offsets = 0
+            nodes = self.roots
+        else:
+            row_offsets = (np.arange(n_rows) * n_features)[:, None]
+            nodes = np.broadcast_to(self.roots, (n_rows, len(self.roots)))
+
+        for _ in range(self.max_depth):
+            go_right = np.take(flat, np.take(self.feature, nodes) + row_offsets) > np.take(self.threshold, nodes)
+            nodes = np.take(self.children, nodes * 2 + go_right)
+
+        nodes = nodes.reshape(n_rows, -1)
+
+        # (trees, rows, classes); reducing over the leading axis accumulates
+        # tree by tree, matching sklearn's summation order
+        leaf_values = self.value[nodes.T]
+
+        probabilities = {}
+        for target in self.target_columns:
+            start, stop = self.tree_slices[target]
+            column = self.value_offsets[target]
+            total = np.add.reduce(leaf_values[start:stop, :, column:column + self.n_classes[target]], axis=0)
+            probabilities[target] = total / (stop - start)
+
+        return probabilities
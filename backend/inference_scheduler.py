@@ -0,0 +1,142 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from config import Config
+from feature_index import invalid_answer_keys
+from metrics import FALLBACKS
+
+
+class _PendingRequest:
+    __slots__ = ('model', 'answers', 'questions_data', 'assessment_mode', 'future', 'feature_report')
+
+    def __init__(self, model, answers, questions_data, assessment_mode):
+        self.model = model
+        self.answers = answers
+        self.questions_data = questions_data
+        self.assessment_mode = assessment_mode
+        self.future = Future()
+        self.feature_report = None
+
+
+class InferenceScheduler:
+    """Micro-batches concurrent single-row predictions
+
+    Request threads enqueue their answers and wait on a future. A background
+    thread takes the first pending request, keeps collecting for up to
+    `window` seconds or `max_rows` rows, and scores the whole batch with one
+    predict_batch() call (one scaler pass and one forest pass per target).
+    Each request keeps the model that was live when it arrived; a request that
+    is not answered within `timeout` seconds gets the rule-based fallback.
+    """
+
+    def __init__(self, registry, window=None, max_rows=None, timeout=None):
+        self.registry = registry
+        self.window = Config.INFERENCE_BATCH_WINDOW_MS / 1000.0 if window is None else window
+        self.max_rows = max_rows or Config.INFERENCE_BATCH_MAX_ROWS
+        self.timeout = Config.INFERENCE_TIMEOUT if timeout is None else timeout
+
+        self.batches = 0
+        self.rows = 0
+        self.timeouts = 0
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def submit(self, answers, questions_data=None, assessment_mode='full'):
+        """Queue one answer set; returns a pending request whose .future resolves to its predictions"""
+        request = _PendingRequest(self.registry.current(), answers, questions_data, assessment_mode)
+        self._ensure_worker()
+        self._queue.put(request)
+        return request
+
+    def predict(self, answers, questions_data=None, assessment_mode='full', feature_report=None):
+        """Drop-in for predict_from_answers that is scored as part of a micro-batch"""
+        request = self.submit(answers, questions_data, assessment_mode)
+        try:
+            predictions = request.future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            request.future.cancel()
+            self.timeouts += 1
+            FALLBACKS.inc('timeout')
+            print(f"Inference timed out after {self.timeout}s, using rule-based fallback")
+            return request.model._get_fallback_predictions(answers, questions_data)
+        except Exception as e:
+            print(f"Batched prediction error: {e}")
+            FALLBACKS.inc('batch_error')
+            return request.model._get_fallback_predictions(answers, questions_data)
+
+        if feature_report is not None and request.feature_report is not None:
+            feature_report.append(request.feature_report)
+        return predictions
+
+    def _ensure_worker(self):
+        # Threads don't survive fork, so each worker process starts its own batcher
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, name='inference-batcher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_rows:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0
+                                 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                print(f"Inference batch error: {e}")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+    def _run_batch(self, batch):
+        # Requests that already timed out were cancelled; skip them
+        live = [request for request in batch if request.future.set_running_or_notify_cancel()]
+
+        # A malformed answer set fails its own request, never the batch it was grouped with
+        valid = []
+        for request in live:
+            invalid = (invalid_answer_keys(request.answers) if isinstance(request.answers, dict)
+                       else ['answers'])
+            if invalid:
+                request.future.set_exception(ValueError(f"Non-numeric answers: {', '.join(map(str, invalid))}"))
+            else:
+                valid.append(request)
+        live = valid
+
+        # Normally one group; two only if a model swap landed inside the window
+        groups = {}
+        for request in live:
+            groups.setdefault(id(request.model), []).append(request)
+
+        for requests in groups.values():
+            model = requests[0].model
+            reports = []
+            results = model.predict_batch(
+                [request.answers for request in requests],
+                requests[0].questions_data,
+                [request.assessment_mode for request in requests],
+                feature_report=reports
+            )
+            for i, request in enumerate(requests):
+                if i < len(reports):
+                    request.feature_report = reports[i]
+                request.future.set_result(results[i])
+
+            self.batches += 1
+            self.rows += len(requests)
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+
+def count_data_rows(csv_path, block_size=1 << 20):
+    """Upper bound on data rows (newlines minus the header) without parsing the file"""
+    newlines = 0
+    last = b'\n'
+    with open(csv_path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            newlines += block.count(b'\n')
+            last = block[-1:]
+    if last != b'\n':
+        newlines += 1  # final line without a trailing newline
+    return max(0, newlines - 1)
+
+
+def _smallest_dtype(values):
+    """int8/int16/int32 for integral values that fit, else float32"""
+    if values.size == 0:
+        return np.dtype(np.int8)
+    if not np.all(np.isfinite(values)) or not np.all(np.mod(values, 1) == 0):
+        return np.dtype(np.float32)
+    lo, hi = values.min(), values.max()
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return np.dtype(dtype)
+    return np.dtype(np.float32)
+
+
+def read_training_csv(csv_path, exclude_cols, target_columns, feature_names=None, chunksize=20000):
+    """Stream a training CSV into a compact feature matrix and categorical targets
+
+    Features are written chunk by chunk into one preallocated 2-D array whose
+    dtype starts at int8 (0-5 Likert answers) and is widened only if a later
+    chunk needs it; targets are kept as category codes. Columns are validated
+    against feature_names (when given) before any data is read and values are
+    checked per chunk, so bad uploads fail early. Peak memory stays close to
+    the final matrix plus one chunk.
+
+    Returns (X DataFrame, {target: categorical Series}, feature column names).
+    """
+    header = list(pd.read_csv(csv_path, nrows=0).columns)
+    feature_cols = [col for col in header if col not in exclude_cols]
+    targets = [target for target in target_columns if target in header]
+
+    if feature_names:
+        missing = [name for name in feature_names if name not in header]
+        if missing:
+            raise ValueError(f"{csv_path} is missing feature columns: {missing[:10]}")
+        feature_cols = list(feature_names)
+
+    capacity = count_data_rows(csv_path)
+    X = np.empty((capacity, len(feature_cols)), dtype=np.int8)
+    target_codes = {target: np.empty(capacity, dtype=np.int16) for target in targets}
+    target_categories = {target: {} for target in targets}
+
+    filled = 0
+    reader = pd.read_csv(
+        csv_path,
+        usecols=feature_cols + targets,
+        chunksize=chunksize,
+        dtype={target: 'category' for target in targets}
+    )
+    for chunk in reader:
+        rows = len(chunk)
+        features = chunk[feature_cols]
+
+        non_numeric = [col for col, dtype in features.dtypes.items() if not pd.api.types.is_numeric_dtype(dtype)]
+        if non_numeric:
+            raise ValueError(f"Non-numeric values in rows {filled + 1}-{filled + rows}: {non_numeric[:10]}")
+
+        values = features.to_numpy(dtype=np.float64)
+        if np.isnan(values).any():
+            bad_cols = [feature_cols[i] for i in np.where(np.isnan(values).any(axis=0))[0]]
+            raise ValueError(f"Missing values in rows {filled + 1}-{filled + rows}: {bad_cols[:10]}")
+
+        widened = np.promote_types(X.dtype, _smallest_dtype(values))
+        if widened != X.dtype:
+            X = X.astype(widened)
+        X[filled:filled + rows] = values
+
+        for target in targets:
+            column = chunk[target]
+            if column.isna().any():
+                raise ValueError(f"Missing {target} labels in rows {filled + 1}-{filled + rows}")
+            categories = target_categories[target]
+            for category in column.cat.categories:
+                categories.setdefault(category, len(categories))
+            remap = np.array([categories[c] for c in column.cat.categories], dtype=np.int16)
+            target_codes[target][filled:filled + rows] = remap[column.cat.codes.to_numpy()]
+
+        filled += rows
+
+    if filled < capacity:
+        # Quoted newlines made the line count an overestimate
+        X = X[:filled].copy()
+        target_codes = {target: codes[:filled].copy() for target, codes in target_codes.items()}
+
+    X_frame = pd.DataFrame(X, columns=feature_cols, copy=False)
+    y_dict = {}
+    for target in targets:
+        categories = sorted(target_categories[target], key=target_categories[target].get)
+        y_dict[target] = pd.Series(
+            pd.Categorical.from_codes(target_codes[target], categories=categories), name=target
+        )
+
+    return X_frame, y_dict, feature_cols
@@ -0,0 +1,241 @@
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import time
+import traceback
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from config import Config
+
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed')
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """Small SQLite-backed queue for background retraining
+
+    Jobs are rows in a `jobs` table; enqueue() inserts one and makes sure a
+    worker process is running. The worker is a fresh `python jobs.py`
+    interpreter (not forked from the threaded web server, and never importing
+    app.py, so it skips serving start-up), lowers its priority, claims queued
+    jobs atomically and exits when the queue is empty, so training never
+    shares the serving process's interpreter or GIL.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = Path(db_path or Config.JOBS_DB)
+        self._worker = None
+        self._init_db()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    stage TEXT,
+                    progress TEXT,
+                    result TEXT,
+                    error TEXT,
+                    worker_pid INTEGER,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)')
+
+    def enqueue(self, kind, params, start_worker=True):
+        """Add a job and return its ID"""
+        if kind not in JOB_HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex[:12]
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO jobs (id, kind, status, params, created_at) VALUES (?, ?, ?, ?, ?)',
+                (job_id, kind, 'queued', json.dumps(params), _now())
+            )
+        if start_worker:
+            self.ensure_worker()
+        return job_id
+
+    def get(self, job_id):
+        """Return a job as a dict, or None"""
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for field in ('params', 'progress', 'result'):
+            job[field] = json.loads(job[field]) if job[field] else None
+        return job
+
+    def ensure_worker(self):
+        """Start a worker process unless this process already has a live one"""
+        if self._worker is not None and self._worker.poll() is None:
+            return
+        self._worker = subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), '--db', str(self.db_path)]
+        )
+
+    def claim_next(self):
+        """Atomically mark the oldest queued job as running and return it"""
+        self._recover_stale()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker_pid = ?, started_at = ? WHERE id = ?",
+                (os.getpid(), _now(), row['id'])
+            )
+        return self.get(row['id'])
+
+    def update(self, job_id, **fields):
+        for field in ('progress', 'result'):
+            if field in fields and fields[field] is not None:
+                fields[field] = json.dumps(fields[field])
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        with self._connect() as conn:
+            conn.execute(f'UPDATE jobs SET {assignments} WHERE id = ?', (*fields.values(), job_id))
+
+    def _recover_stale(self):
+        """Requeue jobs whose worker died mid-run"""
+        with self._connect() as conn:
+            running = conn.execute("SELECT id, worker_pid FROM jobs WHERE status = 'running'").fetchall()
+            for row in running:
+                if row['worker_pid'] != os.getpid() and not _pid_alive(row['worker_pid']):
+                    conn.execute(
+                        "UPDATE jobs SET status = 'queued', worker_pid = NULL WHERE id = ?", (row['id'],)
+                    )
+
+
+def run_retrain_job(queue, job):
+    """Train a MentalHealthModel on the job's CSV and publish it as MODELS_DIR/<bundle_version>
+
+    params['mode'] == 'incremental' grows the bundle at params['base_path']
+    with trees fit on the new CSV only instead of running a full retrain; a
+    full retrain takes its tuned parameters from that bundle's metadata.
+    Unless params['promote'] is False, a bundle that validates is pinned in
+    MODELS_DIR/CURRENT, which every serving worker picks up.
+    """
+    from models import MentalHealthModel, load_tuning
+    from model_registry import pin_version
+
+    params = job['params']
+    staging_dir = Config.MODELS_DIR / f".staging_{job['id']}"
+
+    def report(stage, timings):
+        queue.update(job['id'], stage=stage, progress={'timings': timings})
+
+    model = MentalHealthModel()
+    try:
+        if params.get('mode') == 'incremental':
+            trained = model.update_models(
+                params['csv_path'], base_dir=params.get('base_path'),
+                n_new_trees=params.get('n_new_trees'), models_dir=staging_dir, progress=report
+            )
+        else:
+            # Staging starts empty, so tuned parameters come from the base bundle
+            model.tuned_params, model.tuning = load_tuning(params.get('base_path'))
+            trained = model.train_models(
+                params['csv_path'], params.get('student_csv_path'),
+                n_jobs=params.get('n_jobs'), models_dir=staging_dir, progress=report
+            )
+        if not trained or not (staging_dir / "model_metadata.json").exists():
+            raise RuntimeError('Training did not produce a model bundle')
+
+        version = model.metadata['bundle_version']
+        queue.update(job['id'], stage='publish')
+        os.replace(staging_dir, Config.MODELS_DIR / version)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+    problems = model.validate()
+    promoted = params.get('promote', True) and not problems
+    if promoted:
+        queue.update(job['id'], stage='promote')
+        pin_version(Config.MODELS_DIR, version)
+
+    return {
+        'bundle_version': version,
+        'path': str(Config.MODELS_DIR / version),
+        'promoted': promoted,
+        'validation_problems': problems,
+        'mode': params.get('mode', 'full'),
+        'parent_version': model.lineage[-1].get('parent_version') if model.lineage else None,
+        'training_metrics': model.training_metrics,
+        'training_timings': model.training_timings
+    }
+
+
+JOB_HANDLERS = {
+    'retrain': run_retrain_job
+}
+
+
+def run_worker(db_path=None, exit_when_idle=True):
+    """Process queued jobs until the queue is empty (or forever when exit_when_idle is False)"""
+    try:
+        os.nice(Config.JOB_WORKER_NICE)
+    except (AttributeError, OSError):
+        pass
+
+    queue = JobQueue(db_path)
+    while True:
+        job = queue.claim_next()
+        if job is None:
+            if exit_when_idle:
+                return
+            time.sleep(Config.JOB_POLL_INTERVAL)
+            continue
+
+        print(f"🛠️  Running {job['kind']} job {job['id']}")
+        try:
+            result = JOB_HANDLERS[job['kind']](queue, job)
+            queue.update(job['id'], status='succeeded', stage='done', result=result, finished_at=_now())
+            print(f"✅ Job {job['id']} finished")
+        except Exception as e:
+            traceback.print_exc()
+            queue.update(job['id'], status='failed', error=str(e), finished_at=_now())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='MindScope background job worker')
+    parser.add_argument('--forever', action='store_true', help='keep polling instead of exiting when idle')
+    parser.add_argument('--db', default=str(Config.JOBS_DB), help='job queue database')
+    args = parser.parse_args()
+    run_worker(args.db, exit_when_idle=not args.forever)
@@ -0,0 +1,304 @@
+"""Load generator for a running MindScope backend
+
+Each virtual user loops over a realistic session: fetch the questionnaire
+(full or quick), submit randomized but valid answers generated from
+questions.json option values, then sometimes share the result and leave
+feedback. Concurrency follows a ramp profile of stages; latencies go into
+log-linear (HdrHistogram-style) histograms per endpoint.
+
+    python app.py &
+    python load_test.py --concurrency 32 --duration 60
+    python load_test.py --stages 30s:8,60s:64,30s:64,15s:0 --output load.json
+"""
+import argparse
+import gzip
+import http.client
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from config import Config
+from benchmark import questionnaire_features, random_answers
+
+ENDPOINTS = ('GET /api/questions', 'POST /api/assess', 'POST /api/share', 'POST /api/feedback')
+PERCENTILES = (50, 95, 99, 99.9)
+
+
+class LatencyHistogram:
+    """Log-linear histogram of microsecond latencies (HdrHistogram-style, <1% relative error)
+
+    Values below 2**SUB_BITS are counted exactly; each higher power-of-two
+    range is split into 2**SUB_BITS linear buckets. Recording is a couple of
+    integer operations and a dict increment; histograms merge by adding counts.
+    """
+
+    SUB_BITS = 7
+    SUB_BUCKETS = 1 << SUB_BITS
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.max = 0
+
+    def record(self, value_us):
+        value = max(0, int(value_us))
+        if value < self.SUB_BUCKETS:
+            index = value
+        else:
+            shift = value.bit_length() - self.SUB_BITS - 1
+            index = (shift + 1) * self.SUB_BUCKETS + (value >> shift) - self.SUB_BUCKETS
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def _bucket_value(self, index):
+        """Midpoint of a bucket"""
+        if index < self.SUB_BUCKETS:
+            return index
+        shift = index // self.SUB_BUCKETS - 1
+        lower = (index % self.SUB_BUCKETS + self.SUB_BUCKETS) << shift
+        return lower + ((1 << shift) >> 1)
+
+    def percentile(self, q):
+        if not self.count:
+            return None
+        rank = max(1, int(round(q / 100.0 * self.count + 0.5 - 1e-9)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._bucket_value(index), self.max)
+        return self.max
+
+    def merge(self, other):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.max = max(self.max, other.max)
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.errors = 0
+        self.statuses = {}
+
+    def record(self, status, elapsed_us):
+        self.latency.record(elapsed_us)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not 200 <= status < 300:
+            self.errors += 1
+
+    def merge(self, other):
+        self.latency.merge(other.latency)
+        self.errors += other.errors
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+
+
+def parse_stages(spec):
+    """'30s:8,2m:64' -> [(30.0, 8), (120.0, 64)]; each stage ramps linearly to its concurrency"""
+    stages = []
+    for part in spec.split(','):
+        duration, concurrency = part.strip().split(':')
+        scale = 60.0 if duration.endswith('m') else 1.0
+        stages.append((float(duration.rstrip('sm')) * scale, int(concurrency)))
+    return stages
+
+
+def concurrency_at(stages, elapsed, start=0):
+    """Target number of active users elapsed seconds into the run"""
+    previous = start
+    for duration, target in stages:
+        if elapsed < duration:
+            return int(round(previous + (target - previous) * (elapsed / duration if duration else 1)))
+        elapsed -= duration
+        previous = target
+    return previous
+
+
+class VirtualUser:
+    """One keep-alive connection replaying assessment sessions"""
+
+    def __init__(self, base_url, features, args, seed):
+        url = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection_class(url.hostname, url.port, timeout=args.timeout)
+        self.prefix = url.path.rstrip('/')
+        self.features = features
+        self.args = args
+        self.rng = random.Random(seed)
+        self.stats = {endpoint: EndpointStats() for endpoint in ENDPOINTS}
+        self.sessions = 0
+
+    def request(self, method, path, body=None):
+        endpoint = f"{method} {path.split('?')[0]}"
+        headers = {'Accept-Encoding': 'gzip'}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+
+        started = time.perf_counter_ns()
+        try:
+            self.connection.request(method, self.prefix + path, body=payload, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+            status = response.status
+            if response.getheader('Content-Encoding') == 'gzip':
+                data = gzip.decompress(data)
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            status, data = 599, b''
+        self.stats[endpoint].record(status, (time.perf_counter_ns() - started) / 1000)
+
+        if 200 <= status < 300 and data:
+            try:
+                return json.loads(data)
+            except ValueError:
+                return None
+        return None
+
+    def session(self):
+        quick = self.rng.random() < self.args.quick_ratio
+        questions = self.request('GET', '/api/questions?mode=quick' if quick else '/api/questions')
+
+        if quick and questions and questions.get('quick_questions'):
+            answers = {
+                q['id']: self.rng.choice([o['value'] for o in q['options']])
+                for q in questions['quick_questions'] if q.get('options')
+            }
+        else:
+            answers = random_answers(self.features, self.rng)
+
+        timestamp = datetime.now().isoformat()
+        result = self.request('POST', '/api/assess', {
+            'answers': answers, 'mode': 'quick' if quick else 'full', 'timestamp': timestamp
+        })
+
+        assessment_id = result.get('assessment_id') if result else None
+        if assessment_id and self.rng.random() < self.args.share_ratio:
+            self.request('POST', '/api/share', {
+                'share_id': uuid.uuid4().hex[:12],
+                'assessment_id': assessment_id,
+                'overall_score': result.get('overall_score'),
+                'assessment_mode': result.get('assessment_mode'),
+                'timestamp': timestamp
+            })
+        if assessment_id and self.rng.random() < self.args.feedback_ratio:
+            self.request('POST', '/api/feedback', {
+                'assessment_id': assessment_id,
+                'rating': self.rng.randint(1, 5),
+                'feedback': 'load test',
+                'user_type': 'load_test'
+            })
+        self.sessions += 1
+
+
+def run(args):
+    with open(args.questions_file, 'r', encoding='utf-8') as f:
+        features = questionnaire_features(json.load(f))
+
+    stages = parse_stages(args.stages) if args.stages else [(0, args.concurrency), (args.duration, args.concurrency)]
+    total_duration = sum(duration for duration, _ in stages)
+    max_users = max(concurrency for _, concurrency in stages)
+    users = [VirtualUser(args.base_url, features, args, args.seed + i) for i in range(max_users)]
+
+    started = time.monotonic()
+    deadline = started + total_duration
+
+    def loop(i, user):
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                return
+            if i >= concurrency_at(stages, now - started):
+                time.sleep(0.05)  # parked until the ramp reaches this user
+                continue
+            user.session()
+            if args.think_ms:
+                time.sleep(args.think_ms / 1000.0)
+
+    threads = [threading.Thread(target=loop, args=(i, user), daemon=True) for i, user in enumerate(users)]
+    for thread in threads:
+        thread.start()
+
+    print(f"🔥 {args.base_url}: up to {max_users} users for {total_duration:.0f}s")
+    last_requests, last_report = 0, started
+    while any(thread.is_alive() for thread in threads):
+        time.sleep(max(0.05, min(last_report + args.report_interval, deadline) - time.monotonic()))
+        now = time.monotonic()
+        if now - last_report < args.report_interval and (now < deadline or last_report >= deadline):
+            continue
+        requests = sum(s.latency.count for user in users for s in user.stats.values())
+        errors = sum(s.errors for user in users for s in user.stats.values())
+        print(f"  t={now - started:6.1f}s users={concurrency_at(stages, now - started):4d} "
+              f"req/s={(requests - last_requests) / (now - last_report):8.1f} errors={errors}")
+        last_requests, last_report = requests, now
+    elapsed = time.monotonic() - started
+
+    totals = {endpoint: EndpointStats() for endpoint in ENDPOINTS}
+    for user in users:
+        for endpoint, stats in user.stats.items():
+            totals[endpoint].merge(stats)
+
+    report = {
+        'meta': {
+            'base_url': args.base_url,
+            'stages': stages,
+            'duration_s': round(elapsed, 2),
+            'sessions': sum(user.sessions for user in users),
+            'timestamp': datetime.now().isoformat()
+        },
+        'endpoints': {}
+    }
+    print(f"\n{'endpoint':22} {'requests':>9} {'errors':>7} {'req/s':>9} "
+          + ' '.join(f"{'p' + str(p):>9}" for p in PERCENTILES) + f" {'max':>9}   (ms)")
+    for endpoint, stats in totals.items():
+        if not stats.latency.count:
+            continue
+        percentiles = {f"p{p}": stats.latency.percentile(p) / 1000.0 for p in PERCENTILES}
+        report['endpoints'][endpoint] = {
+            'requests': stats.latency.count,
+            'errors': stats.errors,
+            'statuses': {str(status): count for status, count in sorted(stats.statuses.items())},
+            'throughput_rps': round(stats.latency.count / elapsed, 2),
+            **{name: round(value, 3) for name, value in percentiles.items()},
+            'max': round(stats.latency.max / 1000.0, 3)
+        }
+        print(f"{endpoint:22} {stats.latency.count:9d} {stats.errors:7d} {stats.latency.count / elapsed:9.1f} "
+              + ' '.join(f"{value:9.2f}" for value in percentiles.values())
+              + f" {stats.latency.max / 1000.0:9.2f}")
+
+    assessments = totals['POST /api/assess'].latency.count - totals['POST /api/assess'].errors
+    print(f"\n✅ {assessments / elapsed:.1f} assessments/s sustained over {elapsed:.1f}s")
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load-test a running MindScope backend')
+    parser.add_argument('--base-url', default=f"http://{Config.API_HOST}:{Config.API_PORT}")
+    parser.add_argument('--concurrency', type=int, default=16, help='virtual users (constant profile)')
+    parser.add_argument('--duration', type=float, default=30, help='seconds (constant profile)')
+    parser.add_argument('--stages', help="ramp profile, e.g. '30s:8,1m:64,30s:0' (overrides concurrency/duration)")
+    parser.add_argument('--quick-ratio', type=float, default=0.5, help='share of sessions in quick mode')
+    parser.add_argument('--share-ratio', type=float, default=0.2, help='share of sessions that share results')
+    parser.add_argument('--feedback-ratio', type=float, default=0.1, help='share of sessions that leave feedback')
+    parser.add_argument('--think-ms', type=float, default=0, help='pause between a user\'s sessions')
+    parser.add_argument('--timeout', type=float, default=30, help='per-request socket timeout (s)')
+    parser.add_argument('--report-interval', type=float, default=5, help='seconds between progress lines')
+    parser.add_argument('--questions-file', default=str(Config.QUESTIONS_FILE))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the report as JSON')
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"📊 Report written to {args.output}")
@@ -0,0 +1,277 @@
+"""Low-overhead pipeline metrics with Prometheus text exposition
+
+Counters and histograms live in plain per-process dicts; an observation is a
+bisect and two increments under a lock. Each process periodically writes a
+snapshot to <METRICS_DIR>/<pid>.json, and /metrics merges the snapshots of
+every live worker, so pre-forked servers report one aggregate.
+
+    with STAGE_SECONDS.time('render'):
+        ...
+    FALLBACKS.inc('timeout')
+"""
+import bisect
+import math
+import os
+import threading
+import time
+from pathlib import Path
+
+from config import Config
+import fast_json
+
+# Latency buckets (seconds): 100us .. 10s
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(labels), value] for labels, value in self.values.items()]
+
+    def merge(self, merged, series):
+        for labels, value in series:
+            key = tuple(labels)
+            merged[key] = merged.get(key, 0) + value
+
+    def render(self, merged):
+        return [f"{self.name}{_label_text(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in sorted(merged.items())]
+
+
+class Histogram:
+    """Cumulative-bucket histogram; observe() takes seconds"""
+
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.values = {}  # labels -> [per-bucket counts..., sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        if not self.registry.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.values.get(labels)
+            if series is None:
+                series = self.values[labels] = [0] * len(self.buckets) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, *labels):
+        """Context manager observing the elapsed time of its block"""
+        return _Timer(self, labels)
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(labels), list(series)] for labels, series in self.values.items()]
+
+    def merge(self, merged, series_list):
+        for labels, series in series_list:
+            key = tuple(labels)
+            current = merged.get(key)
+            if current is None or len(current) != len(series):
+                merged[key] = list(series)
+            else:
+                merged[key] = [a + b for a, b in zip(current, series)]
+
+    def render(self, merged):
+        lines = []
+        for labels, series in sorted(merged.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, labels, le)} {cumulative}")
+            label_text = _label_text(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics plus the per-process snapshot files used to aggregate workers"""
+
+    def __init__(self, enabled=None, directory=None, flush_interval=None):
+        self.enabled = Config.METRICS_ENABLED if enabled is None else enabled
+        self._directory = Path(directory) if directory else None
+        self.flush_interval = Config.METRICS_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.metrics = {}
+        self._lock = threading.Lock()
+        self._pid = None
+        self._thread = None
+
+    @property
+    def directory(self):
+        # Resolved late so a patched Config.DATA_DIR (tests, benchmarks) is honoured
+        return self._directory or Path(Config.METRICS_DIR or Config.DATA_DIR / "metrics")
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def start(self):
+        """Start this process's snapshot writer (again after a fork, dropping the parent's counts)"""
+        if not self.enabled or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Forked child: the parent keeps reporting its own observations
+                for metric in self.metrics.values():
+                    metric.values.clear()
+                    metric._lock = threading.Lock()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='metrics-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.write_snapshot()
+            except Exception as e:
+                print(f"Metrics snapshot error: {e}")
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def write_snapshot(self):
+        directory = self.directory
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{os.getpid()}.json"
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(fast_json.dumps(self.snapshot()))
+        os.replace(tmp_path, path)
+
+    def collect(self):
+        """Merge the snapshots of every live worker process (this one read live, not from disk)"""
+        snapshots = [self.snapshot()]
+        directory = self.directory
+        if directory.is_dir():
+            for path in directory.glob('*.json'):
+                try:
+                    pid = int(path.stem)
+                except ValueError:
+                    continue
+                if pid == os.getpid():
+                    continue
+                if not _pid_alive(pid):
+                    # Exited worker; a counter reset is what Prometheus expects then
+                    path.unlink(missing_ok=True)
+                    continue
+                try:
+                    snapshots.append(fast_json.loads(path.read_bytes()))
+                except (OSError, ValueError):
+                    continue
+
+        merged = {name: {} for name in self.metrics}
+        for snapshot in snapshots:
+            for name, series in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is not None:
+                    metric.merge(merged[name], series)
+        return merged
+
+    def render(self):
+        """All metrics in Prometheus text exposition format (version 0.0.4)"""
+        merged = self.collect()
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.render(merged[name]))
+        return '\n'.join(lines) + '\n'
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'mindscope_stage_duration_seconds', 'Assessment pipeline stage latency', ('stage',))
+INFERENCE_SECONDS = REGISTRY.histogram(
+    'mindscope_inference_duration_seconds',
+    'Model inference latency per target (target="all" for the compiled engine\'s shared pass)',
+    ('target', 'engine'))
+REQUEST_SECONDS = REGISTRY.histogram(
+    'mindscope_request_duration_seconds', 'HTTP request latency per endpoint', ('endpoint',))
+ASSESSMENTS = REGISTRY.counter(
+    'mindscope_assessments_total', 'Assessments scored, by mode', ('mode',))
+FALLBACKS = REGISTRY.counter(
+    'mindscope_fallback_predictions_total', 'Assessments scored by the rule-based fallback, by reason', ('reason',))
+ERRORS = REGISTRY.counter(
+    'mindscope_http_errors_total', 'HTTP responses with a 4xx or 5xx status', ('endpoint', 'status'))
@@ -0,0 +1,85 @@
+import os
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+BUNDLE_FILENAME = "model_bundle.joblib"
+BUNDLE_FORMAT = 'mindscope-bundle'
+BUNDLE_FORMAT_VERSION = 1
+
+
+class BundleLabels:
+    """Fitted-LabelEncoder stand-in rebuilt from a bundle's class array
+
+    Serving only needs classes_ (and the odd transform), so bundles avoid
+    importing sklearn.preprocessing, which pulls in most of scipy.
+    """
+
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes)
+
+    def transform(self, y):
+        y = np.asarray(y)
+        encoded = np.searchsorted(self.classes_, y)
+        valid = encoded < len(self.classes_)
+        if not valid.all() or not np.array_equal(self.classes_[encoded], y):
+            unseen = sorted(set(np.asarray(y).ravel().tolist()) - set(self.classes_.tolist()))
+            raise ValueError(f"y contains previously unseen labels: {unseen}")
+        return encoded
+
+    def inverse_transform(self, y):
+        return self.classes_[np.asarray(y)]
+
+
+def save_bundle(engine, label_encoders, metadata, models_dir):
+    """Write the compiled forests, encoder classes and metadata as one uncompressed file
+
+    joblib stores the node arrays inline and page-aligned, so load_bundle can
+    memory-map them read-only and pre-forked workers share one page-cache copy.
+    The file is written next to its destination and renamed into place, so
+    workers that already mapped the previous bundle keep a consistent view.
+    """
+    path = Path(models_dir) / BUNDLE_FILENAME
+    state = {
+        'format': BUNDLE_FORMAT,
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'metadata': metadata,
+        'engine': engine.get_state(),
+        'label_classes': {
+            target: np.asarray(encoder.classes_) for target, encoder in label_encoders.items()
+        }
+    }
+
+    _write_state(state, path)
+    return path
+
+
+def update_bundle_metadata(models_dir, updates):
+    """Merge updates into an existing bundle's metadata; False when there is no bundle"""
+    path = Path(models_dir) / BUNDLE_FILENAME
+    if not path.exists():
+        return False
+    state = load_bundle(models_dir, mmap=False)
+    state['metadata'] = dict(state['metadata'], **updates)
+    _write_state(state, path)
+    return True
+
+
+def _write_state(state, path):
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    joblib.dump(state, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_bundle(models_dir, mmap=True):
+    """Load a bundle written by save_bundle, memory-mapping its arrays when mmap is True"""
+    path = Path(models_dir) / BUNDLE_FILENAME
+    state = joblib.load(path, mmap_mode='r' if mmap else None)
+
+    if not isinstance(state, dict) or state.get('format') != BUNDLE_FORMAT:
+        raise ValueError(f"{path} is not a model bundle")
+    if state.get('format_version') != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle format version: {state.get('format_version')}")
+
+    return state
@@ -0,0 +1,168 @@
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from config import Config
+from models import MentalHealthModel
+
+# Names the promoted bundle version inside the models directory; empty means the root bundle
+POINTER_FILENAME = "CURRENT"
+
+
+def pin_version(models_dir, version):
+    """Atomically point models_dir's CURRENT at version; registries in every worker follow it"""
+    pointer_path = Path(models_dir) / POINTER_FILENAME
+    tmp_path = pointer_path.with_name(f".{POINTER_FILENAME}.{os.getpid()}.tmp")
+    tmp_path.write_text(f"{version}\n", encoding='utf-8')
+    os.replace(tmp_path, pointer_path)
+
+
+class ModelRegistry:
+    """Holds the live MentalHealthModel and swaps in new bundles atomically
+
+    Request handlers call current() once and keep that reference for the whole
+    request, so a concurrent swap never changes the model mid-request. New
+    bundles are loaded, validated and warmed off to the side; only a fully
+    ready model is published, and a failed load leaves the live one in place.
+
+    Promotions are recorded in the models directory's CURRENT pointer, so a
+    restart serves the same bundle; every worker process polls the pointer
+    (see watch()) and loads a version promoted by another worker.
+    """
+
+    def __init__(self, models_dir=None, check_interval=None):
+        self.models_dir = Path(models_dir) if models_dir else Config.MODELS_DIR
+        self.pointer_path = self.models_dir / POINTER_FILENAME
+        self.check_interval = Config.MODEL_POINTER_CHECK_INTERVAL if check_interval is None else check_interval
+        self._model = MentalHealthModel()
+        self._info = {'status': 'not_loaded'}
+        self._swap_lock = threading.Lock()
+        # Pointer value this process last acted on (None until the first load)
+        self._version = None
+        self._last_check = 0.0
+        self._watch_lock = threading.Lock()
+        self._reload_thread = None
+        self._reload_pid = None
+
+    def current(self):
+        """Return the live model (a plain attribute read, safe without locking)"""
+        return self._model
+
+    def info(self):
+        """Describe the live bundle for the admin endpoint"""
+        return dict(self._info)
+
+    def resolve_path(self, version=None):
+        """Map an optional bundle version to a directory inside the models directory"""
+        if not version:
+            return self.models_dir
+        path = (self.models_dir / version).resolve()
+        if path.parent != self.models_dir.resolve():
+            raise ValueError(f"Invalid bundle version: {version}")
+        return path
+
+    def pinned_version(self):
+        """Version named by the CURRENT pointer ('' for the root bundle or no pointer)"""
+        try:
+            return self.pointer_path.read_text(encoding='utf-8').strip()
+        except OSError:
+            return ''
+
+    def load(self, version=None, require_models=False):
+        """Load, validate and warm a bundle, then publish it; returns the new info dict
+
+        version None loads the pinned version; any other version ('' for the
+        root bundle) is pinned once it is live.
+        """
+        return self._load(version, require_models, pin=version is not None)
+
+    def _load(self, version, require_models=False, pin=False):
+        if version is None:
+            version = self.pinned_version()
+            if version and not self.resolve_path(version).is_dir():
+                print(f"Pinned model bundle {version} not found, loading the root bundle")
+                version = ''
+
+        path = self.resolve_path(version)
+        if not path.is_dir():
+            raise FileNotFoundError(f"Model bundle not found: {path}")
+
+        started = time.perf_counter()
+        model = MentalHealthModel()
+        model.load_models(path)
+
+        if model.available_targets():
+            problems = model.validate()
+            if problems:
+                raise ValueError(f"Invalid model bundle at {path}: {'; '.join(problems)}")
+        elif require_models:
+            raise ValueError(f"No models found at {path}")
+
+        # Warm-up also compiles the flat-array engine before any request sees it
+        model.warm_up()
+        elapsed = time.perf_counter() - started
+
+        info = {
+            'status': 'loaded' if model.available_targets() else 'fallback',
+            'bundle_version': model.bundle_version,
+            'path': str(path),
+            'engine': model.engine,
+            'targets': model.available_targets(),
+            'source': 'bundle' if not model.models and model.available_targets() else 'pickles',
+            'feature_count': len(model.feature_names),
+            'trained_at': model.metadata.get('timestamp'),
+            'loaded_at': datetime.now().isoformat(),
+            'load_seconds': round(elapsed, 3)
+        }
+        self.swap(model, info)
+        self._version = version
+        if pin:
+            self._write_pointer(version)
+        return self.info()
+
+    def watch(self):
+        """Pick up a version pinned by another process, checking the pointer at most once per interval
+
+        Cheap enough to call on every request; the load itself runs on a
+        background thread so no request waits for it.
+        """
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        with self._watch_lock:
+            if now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+            # Threads don't survive fork, so a reload running in the parent is not ours
+            if self._reload_pid == os.getpid() and self._reload_thread.is_alive():
+                return
+            version = self.pinned_version()
+            if version == self._version:
+                return
+            self._reload_pid = os.getpid()
+            self._reload_thread = threading.Thread(
+                target=self._reload_pinned, args=(version,), name='model-reload', daemon=True
+            )
+            self._reload_thread.start()
+
+    def _reload_pinned(self, version):
+        try:
+            self._load(version)
+        except Exception as e:
+            print(f"Reloading pinned model bundle {version or '(root)'} failed: {e}")
+            # Don't retry a broken bundle on every check
+            self._version = version
+
+    def _write_pointer(self, version):
+        pin_version(self.models_dir, version)
+
+    def swap(self, model, info=None):
+        """Publish an already-loaded model as the live one"""
+        with self._swap_lock:
+            previous = self._info.get('bundle_version')
+            self._model = model
+            self._info = dict(info or {'status': 'loaded', 'bundle_version': model.bundle_version})
+            self._info['previous_version'] = previous
+        print(f"🤖 Live model bundle: {self._info.get('bundle_version') or 'rule-based fallback'}")
@@ -1,14 +1,141 @@
-import pandas as pd
+# Serving imports only numpy and the compiled engine; pandas and sklearn (about a
+# second of cold start) are imported inside the training functions that need them
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.metrics import classification_report, accuracy_score, confusion_matrix
+import heapq
+import itertools
 import joblib
 import json
+import tempfile
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
+import uuid
 from config import Config
+from forest_engine import CompiledForestEngine
+from feature_index import FeatureIndex, invalid_answer_keys
+from questionnaire import QuickSampler
+from model_bundle import BUNDLE_FILENAME, BundleLabels, save_bundle, load_bundle
+from metrics import STAGE_SECONDS, INFERENCE_SECONDS, FALLBACKS
+
+# Recommendation urgency ranks (higher is shown first)
+URGENCY_ORDER = {'high': 3, 'medium': 2, 'low': 1}
+
+# Default forest configuration for every target
+FOREST_PARAMS = {
+    'n_estimators': 150,  # Increased for better performance
+    'max_depth': 15,
+    'min_samples_split': 3,
+    'min_samples_leaf': 1,
+    'random_state': 42,
+    'class_weight': 'balanced'  # Handle class imbalance
+}
+
+CV_FOLDS = 5
+
+# Training CSV columns that are not model features (targets and derived scores)
+EXCLUDE_COLUMNS = [
+    'Depression_Category', 'Anxiety_Category', 'Stress_Category',
+    'Wellbeing_Category', 'Overall_Wellbeing_Category',
+    'phq_score', 'gad_score', 'dass_s_score_raw', 'dass_s_score_interpreted',
+    'who_score_raw', 'who_score_interpreted', 'coping_score',
+    'clinical_consistency_score'
+]
+
+
+def _fit_forest_task(X, y, params, train_idx=None, eval_idx=None, X_eval=None, y_eval=None):
+    """Fit one forest (a CV fold when train_idx is given, else the final model) and score it"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score
+
+    started = time.perf_counter()
+    model = RandomForestClassifier(**params)
+
+    if train_idx is None:
+        model.fit(X, y)
+        score = accuracy_score(y_eval, model.predict(X_eval))
+        return {'model': model, 'score': score, 'seconds': time.perf_counter() - started}
+
+    model.fit(X[train_idx], y[train_idx])
+    score = accuracy_score(y[eval_idx], model.predict(X[eval_idx]))
+    return {'model': None, 'score': score, 'seconds': time.perf_counter() - started}
+
+
+def load_tuning(models_dir=None):
+    """(tuned_params, tuning summary) recorded by tuning.py in a models directory's metadata"""
+    metadata_path = Path(models_dir or Config.MODELS_DIR) / "model_metadata.json"
+    try:
+        with open(metadata_path, 'r') as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return {}, None
+    return metadata.get('tuned_params') or {}, metadata.get('tuning')
+
+
+def _stage_clock(timings, progress=None):
+    """Return end_stage(name): records the seconds since the previous stage and reports progress"""
+    stage_start = time.perf_counter()
+
+    def end_stage(name):
+        nonlocal stage_start
+        now = time.perf_counter()
+        timings[name] = round(now - stage_start, 3)
+        stage_start = now
+        if progress:
+            progress(name, dict(timings))
+
+    return end_stage
+
+
+def _rescale_thresholds(forest, old_mean, old_scale, new_mean, new_scale):
+    """Re-express split thresholds after the scaler changed so every split decides as before"""
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        split = tree.feature >= 0
+        features = tree.feature[split]
+        old_threshold = tree.threshold[split]
+        raw = old_threshold * old_scale[features] + old_mean[features]
+        threshold = (raw - new_mean[features]) / new_scale[features]
+
+        # A threshold landing exactly on an answer value (e.g. 2.0 between 1 and 3) is
+        # decided by float32 rounding of the scaled input; keep that value on its old side
+        values = np.round(raw)
+        tie = np.abs(raw - values) < 1e-6
+        if tie.any():
+            f = features[tie]
+            went_left = (((values[tie] - old_mean[f]) / old_scale[f]).astype(np.float32)
+                         <= old_threshold[tie])
+            encoded = ((values[tie] - new_mean[f]) / new_scale[f]).astype(np.float32).astype(np.float64)
+            threshold[tie] = np.where(went_left, encoded, np.nextafter(encoded, -np.inf))
+
+        # tree_.threshold is a view of the node array, so this updates the tree in place
+        tree.threshold[split] = threshold
+
+
+def _graft_trees(forest, new_forest):
+    """Append new_forest's trees to forest, padding them to forest's full class list
+
+    new_forest may have been fit on data missing some classes; its trees only
+    carry probability columns for the classes they saw, so their leaf values
+    are widened to forest.classes_ before they join the ensemble.
+    """
+    from sklearn.tree._tree import Tree
+
+    n_classes = len(forest.classes_)
+    columns = np.searchsorted(forest.classes_, new_forest.classes_)
+    for estimator in new_forest.estimators_:
+        if len(new_forest.classes_) != n_classes:
+            state = estimator.tree_.__getstate__()
+            values = np.zeros((state['values'].shape[0], 1, n_classes), dtype=state['values'].dtype)
+            values[:, :, columns] = state['values']
+            state['values'] = values
+            tree = Tree(estimator.n_features_in_, np.array([n_classes], dtype=np.intp), 1)
+            tree.__setstate__(state)
+            estimator.tree_ = tree
+            estimator.classes_ = forest.classes_
+            estimator.n_classes_ = n_classes
+        forest.estimators_.append(estimator)
+    forest.n_estimators = len(forest.estimators_)
 
 
 class MentalHealthModel:
@@ -17,6 +144,7 @@ class MentalHealthModel:
         self.scalers = {}
         self.label_encoders = {}
         self.feature_names = []
+        self._feature_index = None
         self.target_columns = [
             'Depression_Category',
             'Anxiety_Category',
@@ -24,13 +152,50 @@ class MentalHealthModel:
             'Wellbeing_Category',
             'Overall_Wellbeing_Category'
         ]
+        # Scoring engine: 'compiled' (flat-array forests) or 'sklearn'
+        self.engine = Config.INFERENCE_ENGINE
+        self._compiled_engine = None
+        self.metadata = {}
+        self.lineage = []
+        self.training_run = None
+        # Per-target RandomForestClassifier overrides found by tuning.py; None reads
+        # them from the output models directory's metadata when training starts
+        self.tuned_params = None
+        self.tuning = None
+        self.models_dir = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+
+    def load_and_prepare_data(self, main_csv_path, student_csv_path=None, chunksize=None):
+        """Load and prepare training data from both datasets
+
+        With chunksize (default Config.TRAINING_CSV_CHUNKSIZE, 0 disables) the
+        main dataset is streamed into a compact int8/categorical matrix
+        instead of being read whole with default 64-bit dtypes.
+        """
+        import pandas as pd
+        from ingest import read_training_csv
+
+        if chunksize is None:
+            chunksize = Config.TRAINING_CSV_CHUNKSIZE
 
-    def load_and_prepare_data(self, main_csv_path, student_csv_path=None):
-        """Load and prepare training data from both datasets"""
         try:
-            # Load main dataset
-            df_main = pd.read_csv(main_csv_path)
-            print(f"Loaded main dataset: {len(df_main)} samples, {len(df_main.columns)} features")
+            if chunksize:
+                X, y_dict, feature_cols = read_training_csv(
+                    main_csv_path, EXCLUDE_COLUMNS, self.target_columns, chunksize=chunksize
+                )
+                print(f"Loaded main dataset: {len(X)} samples, {X.shape[1]} features "
+                      f"({X.memory_usage(index=False).sum() / 1e6:.1f} MB in memory)")
+            else:
+                # Load main dataset
+                df_main = pd.read_csv(main_csv_path)
+                print(f"Loaded main dataset: {len(df_main)} samples, {len(df_main.columns)} features")
+
+                # Identify feature columns (exclude target columns and derived scores)
+                feature_cols = [col for col in df_main.columns if col not in EXCLUDE_COLUMNS]
+
+                X = df_main[feature_cols]
+                y_dict = {target: df_main[target] for target in self.target_columns if target in df_main.columns}
 
             # Load student dataset if provided
             if student_csv_path and Path(student_csv_path).exists():
@@ -40,21 +205,8 @@ class MentalHealthModel:
                 # Process student data for validation
                 self.process_student_data(df_student)
 
-            # Identify feature columns (exclude target columns and derived scores)
-            exclude_cols = [
-                'Depression_Category', 'Anxiety_Category', 'Stress_Category',
-                'Wellbeing_Category', 'Overall_Wellbeing_Category',
-                'phq_score', 'gad_score', 'dass_s_score_raw', 'dass_s_score_interpreted',
-                'who_score_raw', 'who_score_interpreted', 'coping_score',
-                'clinical_consistency_score'
-            ]
-
-            feature_cols = [col for col in df_main.columns if col not in exclude_cols]
             self.feature_names = feature_cols
 
-            X = df_main[feature_cols]
-            y_dict = {target: df_main[target] for target in self.target_columns if target in df_main.columns}
-
             print(f"Features: {len(feature_cols)} columns")
             print(f"Targets: {list(y_dict.keys())}")
 
@@ -92,85 +244,249 @@ class MentalHealthModel:
         except Exception as e:
             print(f"Error processing student data: {e}")
 
-    def train_models(self, main_csv_path=None, student_csv_path=None):
-        """Train models on the provided datasets"""
+    def train_models(self, main_csv_path=None, student_csv_path=None, n_jobs=None,
+                     models_dir=None, progress=None):
+        """Train models on the provided datasets
+
+        Every (target x CV fold) forest fit is an independent task; with
+        n_jobs > 1 (default Config.TRAINING_N_JOBS, -1 for all cores) they run
+        across a process pool that shares one read-only memory map of the
+        scaled training matrix instead of pickling it into every task.
+        progress(stage, timings) is called as each stage finishes.
+        """
+        from sklearn.model_selection import StratifiedKFold
+        from sklearn.preprocessing import StandardScaler, LabelEncoder
+
         if main_csv_path is None:
             main_csv_path = Config.DATA_DIR / "mental_health_data.csv"
 
         if student_csv_path is None:
             student_csv_path = Config.DATA_DIR / "Student_Mental_health.csv"
 
+        if n_jobs is None:
+            n_jobs = Config.TRAINING_N_JOBS
+
+        if self.tuned_params is None:
+            self.tuned_params, self.tuning = load_tuning(models_dir)
+
+        timings = {}
+        end_stage = _stage_clock(timings, progress)
+
         X, y_dict = self.load_and_prepare_data(main_csv_path, student_csv_path)
         if X is None:
             return False
+        end_stage('load_data')
+        self.lineage = []
+        self.training_run = {
+            'mode': 'full',
+            'parent_version': None,
+            'data_sources': [str(main_csv_path)],
+            'samples': len(X)
+        }
 
         # Split data
         X_train, X_test, y_train_dict, y_test_dict = self.train_test_split_multiple(X, y_dict)
+        end_stage('split')
 
         # Scale features
         self.scaler = StandardScaler()
         X_train_scaled = self.scaler.fit_transform(X_train)
         X_test_scaled = self.scaler.transform(X_test)
+        end_stage('scale')
 
-        print("\n🚀 Training enhanced models...")
-
-        # Store training metrics
-        self.training_metrics = {}
-
-        for target in self.target_columns:
-            if target not in y_dict:
-                continue
-
-            print(f"\n📊 Training {target} model...")
-
-            # Encode labels
+        # Encode labels
+        targets = [target for target in self.target_columns if target in y_dict]
+        encoders, y_train, y_test = {}, {}, {}
+        for target in targets:
             le = LabelEncoder()
-            y_train_encoded = le.fit_transform(y_train_dict[target])
-            y_test_encoded = le.transform(y_test_dict[target])
-
-            # Train enhanced model
-            model = RandomForestClassifier(
-                n_estimators=150,  # Increased for better performance
-                max_depth=15,
-                min_samples_split=3,
-                min_samples_leaf=1,
-                random_state=42,
-                class_weight='balanced'  # Handle class imbalance
+            y_train[target] = le.fit_transform(y_train_dict[target])
+            y_test[target] = le.transform(y_test_dict[target])
+            encoders[target] = le
+
+        print(f"\n🚀 Training enhanced models ({len(targets)} targets x {1 + CV_FOLDS} fits, n_jobs={n_jobs})...")
+        tuned = [target for target in targets if target in (self.tuned_params or {})]
+        if tuned:
+            print(f"   Tuned forest parameters for: {', '.join(tuned)}")
+
+        # One task per final fit and per CV fold (same folds as cross_val_score(cv=5))
+        tasks = []
+        for target in targets:
+            params = self.get_forest_params(target)
+            tasks.append((target, None, params, None, None))
+            folds = StratifiedKFold(n_splits=CV_FOLDS).split(X_train_scaled, y_train[target])
+            for fold, (train_idx, eval_idx) in enumerate(folds):
+                tasks.append((target, fold, params, train_idx, eval_idx))
+
+        with tempfile.TemporaryDirectory(prefix='mindscope_train_') as tmp_dir:
+            X_shared = X_train_scaled
+            if n_jobs != 1:
+                # Workers open the same file read-only; joblib passes memmaps by reference
+                shared_path = Path(tmp_dir) / 'X_train_scaled.joblib'
+                joblib.dump(X_train_scaled, shared_path)
+                X_shared = joblib.load(shared_path, mmap_mode='r')
+
+            results = joblib.Parallel(n_jobs=n_jobs)(
+                joblib.delayed(_fit_forest_task)(
+                    X_shared, y_train[target], params, train_idx, eval_idx,
+                    X_test_scaled if fold is None else None,
+                    y_test[target] if fold is None else None
+                )
+                for target, fold, params, train_idx, eval_idx in tasks
             )
+        end_stage('fit')
 
-            model.fit(X_train_scaled, y_train_encoded)
-
-            # Evaluate
-            y_pred = model.predict(X_test_scaled)
-            accuracy = accuracy_score(y_test_encoded, y_pred)
+        # Store training metrics
+        self.training_metrics = {}
+        fit_seconds = 0.0
 
-            # Cross-validation
-            cv_scores = cross_val_score(model, X_train_scaled, y_train_encoded, cv=5)
+        for target in targets:
+            target_results = [r for (t, _, _, _, _), r in zip(tasks, results) if t == target]
+            final = target_results[0]
+            cv_scores = np.array([r['score'] for r in target_results[1:]])
+            fit_seconds += sum(r['seconds'] for r in target_results)
+            le = encoders[target]
 
-            # Store metrics
             self.training_metrics[target] = {
-                'accuracy': accuracy,
+                'accuracy': final['score'],
                 'cv_mean': cv_scores.mean(),
                 'cv_std': cv_scores.std(),
                 'classes': le.classes_.tolist()
             }
 
             print(f"✅ {target}:")
-            print(f"   Accuracy: {accuracy:.3f}")
+            print(f"   Accuracy: {final['score']:.3f}")
             print(f"   CV Score: {cv_scores.mean():.3f} ± {cv_scores.std():.3f}")
             print(f"   Classes: {le.classes_}")
 
             # Store model and encoder
-            self.models[target] = model
+            self.models[target] = final['model']
             self.label_encoders[target] = le
 
+        self._compiled_engine = None
+        self._loaded = True
+        timings['fit_task_seconds'] = round(fit_seconds, 3)
+
         # Save models
-        self.save_models()
+        self.training_timings = timings
+        self.save_models(models_dir)
+        end_stage('save')
         print("\n✅ Models trained and saved successfully!")
 
         # Print overall performance summary
         self.print_performance_summary()
+        print("⏱️  Stage wall times: " + ", ".join(f"{k}={v}s" for k, v in timings.items()))
+
+        return True
+
+    def get_forest_params(self, target):
+        """RandomForestClassifier parameters used when training target (defaults plus tuned overrides)"""
+        params = dict(FOREST_PARAMS)
+        params.update((self.tuned_params or {}).get(target, {}))
+        return params
+
+    def update_models(self, csv_path, base_dir=None, n_new_trees=None, models_dir=None, progress=None):
+        """Grow the trained forests with extra trees fit on new data only
+
+        Loads the sklearn models from base_dir (default Config.MODELS_DIR),
+        folds the new rows into the scaler's running mean/variance
+        (StandardScaler.partial_fit), rewrites the existing trees' thresholds
+        for the updated scale, then adds n_new_trees trees per target fit on
+        the new rows alone. Cost scales with the new data, not the whole
+        corpus. The result is saved as a new bundle whose metadata lineage
+        records the parent version and data source.
+        """
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.metrics import accuracy_score
+        from ingest import read_training_csv
+
+        if n_new_trees is None:
+            n_new_trees = Config.INCREMENTAL_TREES
+
+        timings = {}
+        end_stage = _stage_clock(timings, progress)
+
+        base_dir = Path(base_dir) if base_dir else Config.MODELS_DIR
+        self.load_models(base_dir, use_bundle=False)
+        scaler = getattr(self, 'scaler', None)
+        if not self.models or scaler is None or not hasattr(scaler, 'n_samples_seen_'):
+            raise ValueError(f"No trained sklearn models and scaler at {base_dir}; run a full retrain first")
+        parent_version = self.bundle_version
+        parent_metrics = self.metadata.get('training_metrics', {})
+        self.lineage = list(self.metadata.get('lineage', []))
+        end_stage('load_base')
+
+        X, y_dict, _ = read_training_csv(
+            csv_path, EXCLUDE_COLUMNS, self.target_columns,
+            feature_names=self.feature_names, chunksize=Config.TRAINING_CSV_CHUNKSIZE or 20000
+        )
+        targets = [target for target in self.target_columns if target in y_dict and target in self.models]
+        if not targets:
+            raise ValueError(f"{csv_path} has no target columns for the trained models")
+        print(f"Loaded update dataset: {len(X)} samples for {len(targets)} targets")
+        end_stage('load_data')
+
+        X_train, X_test, y_train_dict, y_test_dict = self.train_test_split_multiple(
+            X, {target: y_dict[target] for target in targets}
+        )
+        end_stage('split')
+
+        # Running mean/variance update, then keep old trees consistent with the new scale
+        old_mean, old_scale = scaler.mean_.copy(), scaler.scale_.copy()
+        scaler.partial_fit(X_train)
+        for model in self.models.values():
+            _rescale_thresholds(model, old_mean, old_scale, scaler.mean_, scaler.scale_)
+        X_train_scaled = scaler.transform(X_train)
+        X_test_scaled = scaler.transform(X_test)
+        end_stage('scale')
+
+        print(f"\n🌱 Growing forests by {n_new_trees} trees per target on {len(X_train)} new rows...")
+        self.training_metrics = {}
+        for target in targets:
+            le = self.label_encoders[target]
+            unknown = set(y_train_dict[target]) - set(le.classes_)
+            if unknown:
+                raise ValueError(f"{target} has labels the model was not trained on: {sorted(unknown)}")
+            y_train = le.transform(y_train_dict[target])
+            y_test = le.transform(y_test_dict[target])
+
+            model = self.models[target]
+            params = self.get_forest_params(target)
+            params['n_estimators'] = n_new_trees
+            # Fresh seeds so the new trees differ from the ones already in the forest
+            params['random_state'] = (params.get('random_state') or 0) + len(model.estimators_)
+            _graft_trees(model, RandomForestClassifier(**params).fit(X_train_scaled, y_train))
+
+            accuracy = accuracy_score(y_test, model.predict(X_test_scaled))
+            parent = parent_metrics.get(target, {})
+            self.training_metrics[target] = {
+                'accuracy': accuracy,
+                'cv_mean': parent.get('cv_mean', accuracy),
+                'cv_std': parent.get('cv_std', 0.0),
+                'classes': le.classes_.tolist(),
+                'n_estimators': model.n_estimators
+            }
+            print(f"✅ {target}: {model.n_estimators} trees, accuracy on new data {accuracy:.3f}")
+
+        # Targets without new labels keep their parent metrics
+        for target, metrics in parent_metrics.items():
+            self.training_metrics.setdefault(target, metrics)
+        end_stage('fit')
+
+        self._compiled_engine = None
+        self._loaded = True
+        self.training_timings = timings
+        self.training_run = {
+            'mode': 'incremental',
+            'parent_version': parent_version,
+            'data_sources': [str(csv_path)],
+            'samples': len(X),
+            'trees_added': n_new_trees,
+            'targets': targets
+        }
+        self.save_models(models_dir)
+        end_stage('save')
 
+        print("⏱️  Stage wall times: " + ", ".join(f"{k}={v}s" for k, v in timings.items()))
         return True
 
     def print_performance_summary(self):
@@ -192,13 +508,17 @@ class MentalHealthModel:
 
     def train_test_split_multiple(self, X, y_dict, test_size=0.2, random_state=42):
         """Split data for multiple targets consistently"""
+        from sklearn.model_selection import train_test_split
+
         # Use the first target for consistent splitting
         first_target = list(y_dict.keys())[0]
+        # Small uploads can have classes too rare to stratify on
+        stratify = y_dict[first_target] if y_dict[first_target].value_counts().min() >= 2 else None
         X_train, X_test, _, _ = train_test_split(
             X, y_dict[first_target],
             test_size=test_size,
             random_state=random_state,
-            stratify=y_dict[first_target]
+            stratify=stratify
         )
 
         # Get corresponding y splits
@@ -210,122 +530,203 @@ class MentalHealthModel:
 
         return X_train, X_test, y_train_dict, y_test_dict
 
-    def predict_from_answers(self, answers, questions_data, assessment_mode='full'):
+    def predict_from_answers(self, answers, questions_data, assessment_mode='full', engine=None,
+                             feature_report=None):
         """Predict categories from user answers with assessment mode support"""
-        try:
-            # Load models if not already loaded
-            if not self.models:
-                self.load_models()
-
-            # Create feature vector from answers
-            features = self.create_feature_vector_from_answers(answers, questions_data)
-
-            if features is None:
-                return self._get_fallback_predictions(answers, questions_data)
-
-            # Scale features
-            if hasattr(self, 'scaler') and self.scaler:
-                features_scaled = self.scaler.transform(features.reshape(1, -1))
-            else:
-                features_scaled = features.reshape(1, -1)
+        return self.predict_batch([answers], questions_data, assessment_mode, engine, feature_report)[0]
+
+    def predict_batch(self, answers_list, questions_data=None, assessment_mode='full', engine=None,
+                      feature_report=None):
+        """Predict categories for many answer sets with one scaler/predict_proba pass per target
+
+        assessment_mode may be a single mode or one mode per answer set.
+        engine overrides self.engine ('compiled' or 'sklearn') for this call.
+        feature_report, if a list, receives each answer set's FeatureReport
+        (unknown keys and, on request, missing features).
+        """
+        if isinstance(assessment_mode, str):
+            modes = [assessment_mode] * len(answers_list)
+        else:
+            modes = list(assessment_mode)
 
-            predictions = {}
+        if not answers_list:
+            return []
 
-            # Make predictions for each target
-            for target in self.target_columns:
-                if target in self.models:
-                    model = self.models[target]
-                    label_encoder = self.label_encoders.get(target)
-
-                    pred = model.predict(features_scaled)[0]
-                    prob = model.predict_proba(features_scaled)[0]
-
-                    if label_encoder:
-                        pred_label = label_encoder.inverse_transform([pred])[0]
-                        probabilities = {
-                            label_encoder.classes_[i]: float(prob[i])
-                            for i in range(len(prob))
-                        }
-                    else:
-                        pred_label = pred
-                        probabilities = {}
-
-                    # Adjust confidence based on assessment mode
-                    confidence = float(max(prob))
-                    if assessment_mode == 'quick':
-                        confidence *= 0.85  # Slightly lower confidence for quick assessments
+        try:
+            # Load models once; an empty models directory means rule-based fallback
+            if not self._loaded:
+                with self._load_lock:
+                    if not self._loaded:
+                        self.load_models()
+
+            # Create one feature matrix for all submissions
+            reports = []
+            with STAGE_SECONDS.time('feature_vector'):
+                features = self.create_feature_matrix_from_answers(answers_list, questions_data, report=reports)
+            if feature_report is not None:
+                feature_report.extend(reports)
 
+            if features is None:
+                FALLBACKS.inc('no_model' if not self.feature_names else 'feature_error', amount=len(answers_list))
+                return [self._get_fallback_predictions(answers, questions_data) for answers in answers_list]
+
+            probabilities = self._predict_probabilities(features, engine or self.engine)
+
+            quick_rows = np.array([mode == 'quick' for mode in modes])
+            batch_predictions = [{} for _ in answers_list]
+
+            # One predict_proba per target; the label is the argmax of its probabilities
+            for target in self.available_targets():
+                label_encoder = self.label_encoders.get(target)
+
+                probs = probabilities[target]
+                best = probs.argmax(axis=1)
+                model_classes = self._model_classes(target)
+                encoded = model_classes.take(best)
+                confidences = probs[np.arange(len(best)), best]
+                # Slightly lower confidence for quick assessments
+                confidences = np.where(quick_rows, confidences * 0.85, confidences)
+
+                if label_encoder:
+                    labels = label_encoder.classes_[encoded].tolist()
+                    # Probability columns follow the model's classes, which may skip encoder
+                    # classes (e.g. a distilled student that never saw one)
+                    class_names = label_encoder.classes_[model_classes].tolist()
+                else:
+                    labels = encoded.tolist()
+                    class_names = None
+
+                for row, predictions in enumerate(batch_predictions):
                     predictions[target] = {
-                        'category': pred_label,
-                        'confidence': confidence,
-                        'probabilities': probabilities,
-                        'assessment_mode': assessment_mode
+                        'category': labels[row],
+                        'confidence': float(confidences[row]),
+                        'probabilities': dict(zip(class_names, probs[row].tolist())) if class_names else {},
+                        'assessment_mode': modes[row]
                     }
 
-            return predictions
+            # Rows whose answers couldn't be read were scored as zeros; only they fall back
+            for row, row_report in enumerate(reports):
+                if row_report.error:
+                    FALLBACKS.inc('feature_error')
+                    batch_predictions[row] = self._get_fallback_predictions(answers_list[row], questions_data)
+
+            return batch_predictions
 
         except Exception as e:
             print(f"Prediction error: {e}")
-            return self._get_fallback_predictions(answers, questions_data)
+            FALLBACKS.inc('prediction_error', amount=len(answers_list))
+            return [self._get_fallback_predictions(answers, questions_data) for answers in answers_list]
+
+    def available_targets(self):
+        """Targets that can be scored, from sklearn forests or a loaded compiled bundle"""
+        if self.models:
+            return [target for target in self.target_columns if target in self.models]
+        if self._compiled_engine is not None:
+            return [target for target in self.target_columns if target in self._compiled_engine.classes]
+        return []
+
+    def _model_classes(self, target):
+        if target in self.models:
+            return self.models[target].classes_
+        return self._compiled_engine.classes[target]
+
+    def get_compiled_engine(self):
+        """Compile the loaded forests into a CompiledForestEngine (cached until models change)"""
+        if self._compiled_engine is None and self.models:
+            try:
+                self._compiled_engine = CompiledForestEngine(
+                    self.models, getattr(self, 'scaler', None), self.target_columns
+                )
+            except Exception as e:
+                print(f"Forest compilation error, using sklearn engine: {e}")
+                return None
+        return self._compiled_engine
+
+    def _predict_probabilities(self, features, engine):
+        """Return {target: class probabilities} for an unscaled feature matrix"""
+        # Bundles loaded from model_bundle.joblib carry only the compiled forests
+        if engine == 'compiled' or not self.models:
+            compiled = self.get_compiled_engine()
+            if compiled is not None:
+                with STAGE_SECONDS.time('scaling'):
+                    features_scaled = compiled.transform(features)
+                # One traversal scores every target's trees together
+                with INFERENCE_SECONDS.time('all', 'compiled'):
+                    return compiled.predict_proba(features_scaled, scaled=True)
 
-    def create_feature_vector_from_answers(self, answers, questions_data):
-        """Create feature vector matching training data structure"""
+        # Scale features
+        with STAGE_SECONDS.time('scaling'):
+            if hasattr(self, 'scaler') and self.scaler:
+                features_scaled = self.scaler.transform(features)
+            else:
+                features_scaled = features
+
+        probabilities = {}
+        for target, model in self.models.items():
+            with INFERENCE_SECONDS.time(target, 'sklearn'):
+                probabilities[target] = model.predict_proba(features_scaled)
+        return probabilities
+
+    def get_feature_index(self):
+        """Compiled name -> column mapping for the loaded feature list (rebuilt when it changes)"""
+        index = self._feature_index
+        if index is None or index.feature_names != tuple(self.feature_names):
+            index = self._feature_index = FeatureIndex(self.feature_names)
+        return index
+
+    def create_feature_vector_from_answers(self, answers, questions_data, report=None):
+        """Create feature vector matching training data structure
+
+        Unanswered features are zero-filled; when report is a list, the
+        answer set's FeatureReport is appended to it.
+        """
         try:
-            # Initialize feature vector with zeros
             if not self.feature_names:
                 return None
 
-            features = np.zeros(len(self.feature_names))
-
-            # Map answers to feature positions
-            for i, feature_name in enumerate(self.feature_names):
-                if feature_name in answers:
-                    features[i] = answers[feature_name]
-
+            features, row_report = self.get_feature_index().fill_vector(answers)
+            if report is not None:
+                report.append(row_report)
             return features
 
         except Exception as e:
             print(f"Error creating feature vector: {e}")
             return None
 
-    def get_quick_assessment_questions(self, questions, num_questions=12):
-        """Select balanced questions for quick assessment"""
+    def create_feature_matrix_from_answers(self, answers_list, questions_data=None, out=None, report=None):
+        """Create an (n_submissions, n_features) matrix matching training data structure
+
+        out may be a preallocated zeroed matrix (see FeatureIndex.allocate);
+        when report is a list, it is extended with one FeatureReport per submission.
+        """
         try:
-            # Group questions by category/domain
-            categories = {}
-            for q in questions:
-                cat = q.get('section', 'general')
-                if cat not in categories:
-                    categories[cat] = []
-                categories[cat].append(q)
-
-            # Select questions proportionally from each category
-            selected = []
-            questions_per_cat = max(1, num_questions // len(categories))
-
-            for cat, cat_questions in categories.items():
-                # Randomly sample from this category
-                sample_size = min(questions_per_cat, len(cat_questions))
-                selected.extend(np.random.choice(cat_questions, sample_size, replace=False))
-
-            # If we need more questions, add randomly from remaining
-            if len(selected) < num_questions:
-                remaining = [q for q in questions if q not in selected]
-                additional_needed = num_questions - len(selected)
-                if remaining:
-                    additional = np.random.choice(remaining,
-                                                  min(additional_needed, len(remaining)),
-                                                  replace=False)
-                    selected.extend(additional)
-
-            return selected[:num_questions]
+            if not self.feature_names:
+                return None
+
+            features, reports = self.get_feature_index().fill_matrix(answers_list, out)
+            if report is not None:
+                report.extend(reports)
+            return features
 
         except Exception as e:
-            print(f"Error selecting quick questions: {e}")
-            return questions[:num_questions]  # Fallback to first N questions
+            print(f"Error creating feature matrix: {e}")
+            return None
+
+    def get_quick_assessment_questions(self, questions, num_questions=12, seed=None):
+        """Select balanced questions for quick assessment (see questionnaire.QuickSampler)"""
+        return QuickSampler.from_questions(questions).sample(num_questions, seed)
 
     def _get_fallback_predictions(self, answers, questions_data):
-        """Enhanced fallback rule-based predictions"""
+        """Enhanced fallback rule-based predictions (answers that aren't numbers are ignored)"""
+        with STAGE_SECONDS.time('fallback'):
+            if not isinstance(answers, dict):
+                answers = {}
+            invalid = set(invalid_answer_keys(answers))
+            if invalid:
+                answers = {key: value for key, value in answers.items() if key not in invalid}
+            return self._rule_based_predictions(answers, questions_data)
+
+    def _rule_based_predictions(self, answers, questions_data):
         # Calculate basic scores from different question types
         phq_questions = [f'phq_{i}' for i in range(1, 10)]
         gad_questions = [f'gad_{i}' for i in range(1, 8)]
@@ -405,10 +806,67 @@ class MentalHealthModel:
 
         return predictions
 
-    def load_models(self):
-        """Load trained models"""
+    @property
+    def bundle_version(self):
+        """Identifier of the loaded model bundle (None when no bundle is loaded)"""
+        if not self.available_targets():
+            return None
+        return self.metadata.get('bundle_version') or self.metadata.get('timestamp') or 'unversioned'
+
+    def validate(self):
+        """Return a list of problems with the loaded bundle (empty when it is servable)"""
+        problems = []
+        if not self.feature_names:
+            problems.append('model_metadata.json has no feature_names')
+
+        n_features = len(self.feature_names)
+        scaler = getattr(self, 'scaler', None)
+        if scaler is not None and getattr(scaler, 'n_features_in_', n_features) != n_features:
+            problems.append(f'scaler expects {scaler.n_features_in_} features, metadata lists {n_features}')
+
+        compiled = self._compiled_engine
+        if not self.models and compiled is not None and compiled.n_features != n_features:
+            problems.append(f'compiled forests expect {compiled.n_features} features, metadata lists {n_features}')
+
+        available = self.available_targets()
+        for target in self.target_columns:
+            if target not in available:
+                problems.append(f'missing model for {target}')
+                continue
+            model = self.models.get(target)
+            if model is not None and getattr(model, 'n_features_in_', n_features) != n_features:
+                problems.append(f'{target} model expects {model.n_features_in_} features, metadata lists {n_features}')
+            encoder = self.label_encoders.get(target)
+            if encoder is None:
+                problems.append(f'missing label encoder for {target}')
+            elif np.max(self._model_classes(target)) >= len(encoder.classes_):
+                problems.append(f'{target} label encoder has fewer classes than the model')
+
+        return problems
+
+    def warm_up(self):
+        """Run a dummy prediction so compilation and first-call costs happen before serving"""
+        dummy_answers = {name: 0 for name in self.feature_names}
+        return self.predict_from_answers(dummy_answers, None)
+
+    def load_models(self, models_dir=None, use_bundle=None):
+        """Load trained models
+
+        Serving prefers the single-file model_bundle.joblib (memory-mapped,
+        compiled forests only); pass use_bundle=False to load the sklearn
+        pickles, e.g. for retraining or the sklearn engine.
+        """
+        self._loaded = True
         try:
-            models_dir = Config.MODELS_DIR
+            models_dir = Path(models_dir) if models_dir else Config.MODELS_DIR
+            self.models_dir = models_dir
+            self._compiled_engine = None
+
+            if use_bundle is None:
+                use_bundle = Config.USE_MODEL_BUNDLE and self.engine == 'compiled'
+            if use_bundle and (models_dir / BUNDLE_FILENAME).exists():
+                self._load_bundle(models_dir)
+                return
 
             # Load scaler
             scaler_path = models_dir / "scaler.joblib"
@@ -431,16 +889,34 @@ class MentalHealthModel:
             if metadata_path.exists():
                 with open(metadata_path, 'r') as f:
                     metadata = json.load(f)
+                    self.metadata = metadata
                     self.feature_names = metadata.get('feature_names', [])
+                    self.lineage = metadata.get('lineage', [])
+                    self.tuned_params = metadata.get('tuned_params') or {}
+                    self.tuning = metadata.get('tuning')
 
         except Exception as e:
             print(f"Model loading error: {e}")
 
-    def save_models(self):
+    def _load_bundle(self, models_dir):
+        """Load the memory-mapped compiled bundle written by save_models"""
+        state = load_bundle(models_dir, mmap=Config.MODEL_BUNDLE_MMAP)
+        self._compiled_engine = CompiledForestEngine.from_state(state['engine'])
+
+        for target, classes in state['label_classes'].items():
+            self.label_encoders[target] = BundleLabels(classes)
+
+        self.metadata = state['metadata']
+        self.feature_names = self.metadata.get('feature_names', [])
+        self.lineage = self.metadata.get('lineage', [])
+        self.tuned_params = self.metadata.get('tuned_params') or {}
+        self.tuning = self.metadata.get('tuning')
+
+    def save_models(self, models_dir=None):
         """Save trained models with enhanced metadata"""
         try:
-            models_dir = Config.MODELS_DIR
-            models_dir.mkdir(exist_ok=True)
+            models_dir = Path(models_dir) if models_dir else Config.MODELS_DIR
+            models_dir.mkdir(parents=True, exist_ok=True)
 
             # Save scaler
             if hasattr(self, 'scaler') and self.scaler:
@@ -455,17 +931,36 @@ class MentalHealthModel:
                     joblib.dump(self.label_encoders[target], models_dir / f"{target}_label_encoder.joblib")
 
             # Save enhanced metadata
+            now = datetime.now()
+            bundle_version = f"{now.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+            lineage = list(self.lineage)
+            if self.training_run:
+                lineage.append(dict(self.training_run, bundle_version=bundle_version, trained_at=now.isoformat()))
             metadata = {
                 'feature_names': self.feature_names,
                 'target_columns': self.target_columns,
                 'training_metrics': getattr(self, 'training_metrics', {}),
-                'timestamp': datetime.now().isoformat(),
+                'training_timings': getattr(self, 'training_timings', {}),
+                'timestamp': now.isoformat(),
                 'model_version': '2.0',
+                'bundle_version': bundle_version,
+                'lineage': lineage,
+                'tuned_params': self.tuned_params or {},
+                'tuning': self.tuning,
                 'student_data_integrated': hasattr(self, 'student_validation_data')
             }
 
             with open(models_dir / "model_metadata.json", 'w') as f:
                 json.dump(metadata, f, indent=2)
+            self.metadata = metadata
+            self.models_dir = models_dir
+            self.lineage = lineage
+            self.training_run = None
+
+            # Single-file compiled bundle for fast, shared (mmap) serving loads
+            compiled = self.get_compiled_engine()
+            if compiled is not None:
+                save_bundle(compiled, self.label_encoders, metadata, models_dir)
 
             print(f"💾 Models saved to {models_dir}")
 
@@ -473,8 +968,25 @@ class MentalHealthModel:
             print(f"Model saving error: {e}")
 
 
+def urgency_confidence_score(rec, prediction):
+    """Default recommendation score: urgency first, then the source prediction's confidence"""
+    return (URGENCY_ORDER.get(rec.get('urgency'), 0), prediction['confidence'])
+
+
 class RecommendationEngine:
-    def __init__(self):
+    """Recommendation catalog indexed by category level
+
+    The catalog (built in, or a JSON file of {category level: [recommendation,
+    ...]}) is compiled into records addressed by integer ID and a per-level
+    tuple of IDs pre-sorted by urgency. Ranking works on IDs and copies only
+    the `limit` recommendations it returns. With the default scoring the
+    per-level lists are already in score order, so ranking is a k-way merge
+    that stops after `limit` items; a custom scoring(rec, prediction)
+    function ranks the candidates with a top-k heap instead.
+    """
+
+    def __init__(self, catalog_path=None, scoring=None):
+        self.scoring = scoring or urgency_confidence_score
         self.recommendations_db = {
             'High Concern': [
                 {
@@ -586,40 +1098,83 @@ class RecommendationEngine:
             ]
         }
 
+        catalog_path = Path(catalog_path or Config.RECOMMENDATIONS_FILE)
+        if catalog_path.exists():
+            self.load_catalog(catalog_path)
+        else:
+            self._build_index()
+
+    def load_catalog(self, path):
+        """Replace the catalog with a JSON file of {category level: [recommendation, ...]}"""
+        with open(path, 'r', encoding='utf-8') as f:
+            catalog = json.load(f)
+        if not isinstance(catalog, dict) or not all(isinstance(recs, list) for recs in catalog.values()):
+            raise ValueError(f"{path} must map category levels to lists of recommendations")
+        self.recommendations_db = catalog
+        self._build_index()
+
+    def _build_index(self):
+        records = []
+        level_index = {}
+        for level, recs in self.recommendations_db.items():
+            ids = range(len(records), len(records) + len(recs))
+            records.extend(recs)
+            # Stable sort keeps catalog order within an urgency
+            level_index[level] = tuple(sorted(ids, key=lambda i: -URGENCY_ORDER.get(records[i].get('urgency'), 0)))
+
+        titles = {}
+        self.records = tuple(records)
+        self.title_ids = tuple(titles.setdefault(rec['title'], len(titles)) for rec in records)
+        self.level_index = level_index
+
     def get_recommendations(self, predictions, limit=3):
         """Get personalized recommendations based on predictions"""
-        recommendations = []
+        categories = tuple((target, result['category']) for target, result in predictions.items())
+        return self.rank(self.candidates(categories), predictions, limit)
 
-        # Collect recommendations from all prediction categories
-        for target, result in predictions.items():
-            category_level = result['category']
-            confidence = result['confidence']
-            assessment_mode = result.get('assessment_mode', 'full')
+    def candidates(self, categories):
+        """Per-target recommendation IDs for a tuple of (target, category level)
 
-            # Get recommendations for this category level
-            category_recs = self.recommendations_db.get(category_level, [])
-
-            for rec in category_recs:
-                rec_copy = rec.copy()
-                rec_copy['source_category'] = target
-                rec_copy['confidence'] = confidence
-                rec_copy['assessment_mode'] = assessment_mode
-                recommendations.append(rec_copy)
-
-        # Remove duplicates and sort by urgency and confidence
-        unique_recs = []
+        Titles already offered for an earlier target are dropped. Depends only
+        on the predicted categories, so callers may cache it.
+        """
+        candidates = []
         seen_titles = set()
+        for target, category_level in categories:
+            ids = []
+            for rec_id in self.level_index.get(category_level, ()):
+                title_id = self.title_ids[rec_id]
+                if title_id not in seen_titles:
+                    ids.append(rec_id)
+                    seen_titles.add(title_id)
+            candidates.append((target, tuple(ids)))
+        return tuple(candidates)
+
+    def rank(self, candidates, predictions, limit=3):
+        """Return the `limit` best candidates (ties keep target, then catalog order) as fresh dicts"""
+        if self.scoring is urgency_confidence_score:
+            # Each target's IDs are sorted by urgency and share one confidence: merge, stop early
+            streams = [self._scored_stream(target, ids, predictions[target]) for target, ids in candidates]
+            top = [(target, rec_id) for _, target, rec_id in
+                   itertools.islice(heapq.merge(*streams, key=lambda item: item[0], reverse=True), limit)]
+        else:
+            top = heapq.nlargest(
+                limit,
+                ((target, rec_id) for target, ids in candidates for rec_id in ids),
+                key=lambda c: self.scoring(self.records[c[1]], predictions[c[0]])
+            )
 
-        for rec in recommendations:
-            if rec['title'] not in seen_titles:
-                unique_recs.append(rec)
-                seen_titles.add(rec['title'])
-
-        # Sort by urgency (high first) and confidence
-        urgency_order = {'high': 3, 'medium': 2, 'low': 1}
-        unique_recs.sort(
-            key=lambda x: (urgency_order.get(x['urgency'], 0), x['confidence']),
-            reverse=True
-        )
-
-        return unique_recs[:limit]
+        recommendations = []
+        for target, rec_id in top:
+            rec_copy = dict(self.records[rec_id])
+            rec_copy['source_category'] = target
+            rec_copy['confidence'] = predictions[target]['confidence']
+            rec_copy['assessment_mode'] = predictions[target].get('assessment_mode', 'full')
+            recommendations.append(rec_copy)
+        return recommendations
+
+    def _scored_stream(self, target, ids, prediction):
+        """(default score, target, ID) for one target's IDs, in descending score order"""
+        confidence = prediction['confidence']
+        for rec_id in ids:
+            yield (URGENCY_ORDER.get(self.records[rec_id].get('urgency'), 0), confidence), target, rec_id
@@ -0,0 +1,281 @@
+import argparse
+import bisect
+import json
+import math
+import os
+import random
+import threading
+import time
+from pathlib import Path
+
+from config import Config
+
+# Visualization score per predicted category (0-100)
+LEVEL_SCORES = {
+    'Low Concern': 20, 'Low Well-being': 25,
+    'Mild to Moderate Concern': 55, 'Moderate Well-being': 60,
+    'High Concern': 85, 'High Well-being': 90,
+    'Good Well-being': 80
+}
+
+
+def prediction_score(prediction):
+    """Continuous 0-100 score for one target: level scores weighted by class probabilities"""
+    probabilities = prediction.get('probabilities') or {}
+    if probabilities:
+        total = sum(probabilities.values())
+        if total > 0:
+            return sum(LEVEL_SCORES.get(level, 50) * p for level, p in probabilities.items()) / total
+    return float(LEVEL_SCORES.get(prediction.get('category'), 50))
+
+
+class KLLSketch:
+    """Mergeable KLL quantile sketch
+
+    Keeps O(k log(n/k)) items in levelled compactors; an item at level h
+    stands for 2**h observations. Rank queries use a sorted, cumulative-weight
+    summary that is rebuilt lazily, so a lookup is a bisect (O(log m)).
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.n = 0
+        self.compactors = [[]]
+        self._rng = random.Random(seed)
+        self._summary = None
+
+    def __len__(self):
+        return self.n
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _size(self):
+        return sum(len(c) for c in self.compactors)
+
+    def _max_size(self):
+        return sum(self._capacity(h) for h in range(len(self.compactors)))
+
+    def update(self, value):
+        self.compactors[0].append(float(value))
+        self.n += 1
+        self._summary = None
+        if len(self.compactors[0]) >= self._capacity(0):
+            self._compress()
+
+    def merge(self, other):
+        """Fold another sketch into this one"""
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.n += other.n
+        self._summary = None
+        self._compress()
+
+    def _compress(self):
+        while self._size() >= self._max_size():
+            for level in range(len(self.compactors)):
+                if len(self.compactors[level]) >= self._capacity(level):
+                    if level + 1 == len(self.compactors):
+                        self.compactors.append([])
+                    items = sorted(self.compactors[level])
+                    # An odd item out stays at this level
+                    keep = [items.pop()] if len(items) % 2 else []
+                    offset = self._rng.randint(0, 1)
+                    self.compactors[level + 1].extend(items[offset::2])
+                    self.compactors[level] = keep
+                    break
+
+    def _build_summary(self):
+        """Return (values, cumulative weights, total), cached for the current count
+
+        Readers may run while a refresh thread updates the sketch, so the cache
+        holds (n, summary) and is used only while n still matches; readers work
+        on the returned tuple rather than re-reading self._summary.
+        """
+        cached = self._summary
+        n = self.n
+        if cached is not None and cached[0] == n:
+            return cached[1]
+        compactors = [list(items) for items in self.compactors]
+        weighted = sorted(
+            (value, 1 << level) for level, items in enumerate(compactors) for value in items
+        )
+        values = [value for value, _ in weighted]
+        cumulative = []
+        total = 0
+        for _, weight in weighted:
+            total += weight
+            cumulative.append(total)
+        summary = (values, cumulative, total)
+        self._summary = (n, summary)
+        return summary
+
+    def percentile(self, value):
+        """Percentage of observations below value (ties count half)"""
+        values, cumulative, total = self._build_summary()
+        if not total:
+            return None
+        lo = bisect.bisect_left(values, value)
+        hi = bisect.bisect_right(values, value)
+        below = cumulative[lo - 1] if lo else 0
+        through = cumulative[hi - 1] if hi else 0
+        return 100.0 * (below + (through - below) / 2) / total
+
+    def quantile(self, q):
+        values, cumulative, total = self._build_summary()
+        if not total:
+            return None
+        index = bisect.bisect_left(cumulative, q * total)
+        return values[min(index, len(values) - 1)]
+
+    def to_dict(self):
+        return {'k': self.k, 'n': self.n, 'compactors': self.compactors}
+
+    @classmethod
+    def from_dict(cls, state):
+        sketch = cls(k=state['k'])
+        sketch.n = state['n']
+        sketch.compactors = [list(items) for items in state['compactors']] or [[]]
+        return sketch
+
+
+class PopulationStats:
+    """Per-target score distributions for population percentiles
+
+    Sketches are fed by tailing user_assessments.jsonl, so every worker
+    process sees every assessment, and are snapshotted with the log offset
+    they cover, so a restart only replays newer lines. The training CSV is
+    folded in once with `python population_stats.py --seed-csv ...`.
+    """
+
+    def __init__(self, log_path=None, snapshot_path=None, target_columns=None):
+        self.log_path = Path(log_path or Config.DATA_DIR / "user_assessments.jsonl")
+        self.snapshot_path = Path(snapshot_path or Config.DATA_DIR / "population_sketches.json")
+        self.target_columns = target_columns
+        self.sketches = {}
+        self.log_offset = 0
+        self.seed_sources = []
+        self._last_refresh = 0.0
+        self._updates_since_snapshot = 0
+        self._lock = threading.Lock()
+
+        self._load_snapshot()
+        self.refresh(force=True)
+
+    def _sketch(self, target):
+        sketch = self.sketches.get(target)
+        if sketch is None:
+            sketch = self.sketches[target] = KLLSketch(Config.POPULATION_SKETCH_K)
+        return sketch
+
+    def add(self, target, score):
+        self._sketch(target).update(score)
+
+    def add_predictions(self, predictions):
+        """Fold one assessment's per-target predictions into the sketches"""
+        for target, prediction in predictions.items():
+            if self.target_columns is None or target in self.target_columns:
+                score = prediction.get('score')
+                self.add(target, prediction_score(prediction) if score is None else score)
+
+    def percentile(self, target, score):
+        """Population percentile of score for target, or None without enough data"""
+        self.refresh()
+        sketch = self.sketches.get(target)
+        if sketch is None or sketch.n < Config.POPULATION_MIN_SAMPLES:
+            return None
+        return sketch.percentile(score)
+
+    def refresh(self, force=False):
+        """Ingest complete lines appended to the assessments log since the last refresh"""
+        now = time.monotonic()
+        if not force and now - self._last_refresh < Config.POPULATION_REFRESH_INTERVAL:
+            return
+        if not self._lock.acquire(blocking=force):
+            return  # another thread is already refreshing
+        try:
+            self._last_refresh = now
+            if not self.log_path.exists():
+                return
+            ingested = 0
+            with open(self.log_path, 'rb') as f:
+                if self.log_offset > os.fstat(f.fileno()).st_size:
+                    self.log_offset = 0  # log was rotated or replaced
+                f.seek(self.log_offset)
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break  # partially written line; pick it up next time
+                    self.log_offset += len(line)
+                    try:
+                        self.add_predictions(json.loads(line).get('predictions', {}))
+                        ingested += 1
+                    except (ValueError, AttributeError):
+                        continue
+            self._updates_since_snapshot += ingested
+            snapshot_due = self._updates_since_snapshot >= Config.POPULATION_SNAPSHOT_EVERY
+        finally:
+            self._lock.release()
+
+        if snapshot_due:
+            try:
+                self.snapshot()
+            except Exception as e:
+                print(f"Error saving population sketches: {e}")
+
+    def snapshot(self):
+        """Persist sketches and the log offset they cover"""
+        with self._lock:
+            state = {
+                'log_offset': self.log_offset,
+                'seed_sources': self.seed_sources,
+                'sketches': {target: sketch.to_dict() for target, sketch in self.sketches.items()}
+            }
+            self._updates_since_snapshot = 0
+
+        tmp_path = self.snapshot_path.with_name(f".{self.snapshot_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.sketches = {t: KLLSketch.from_dict(s) for t, s in state.get('sketches', {}).items()}
+            self.log_offset = state.get('log_offset', 0)
+            self.seed_sources = state.get('seed_sources', [])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Population snapshot unusable, replaying assessment log: {e}")
+            self.sketches = {}
+            self.log_offset = 0
+
+    def seed_from_csv(self, csv_path, model):
+        """Score every row of a training CSV with model and add the results"""
+        import pandas as pd
+
+        for chunk in pd.read_csv(csv_path, chunksize=Config.POPULATION_SEED_CHUNK_SIZE):
+            answers_list = chunk.reindex(columns=model.feature_names, fill_value=0).to_dict('records')
+            for predictions in model.predict_batch(answers_list):
+                self.add_predictions(predictions)
+        self.seed_sources.append(str(csv_path))
+
+
+if __name__ == '__main__':
+    from models import MentalHealthModel
+
+    parser = argparse.ArgumentParser(description='Seed population sketches from a training CSV')
+    parser.add_argument('--seed-csv', default=str(Config.DATA_DIR / "mental_health_data.csv"))
+    args = parser.parse_args()
+
+    model = MentalHealthModel()
+    model.load_models()
+    stats = PopulationStats(target_columns=model.target_columns)
+    stats.seed_from_csv(args.seed_csv, model)
+    stats.snapshot()
+    print(f"📊 Population sketches seeded from {args.seed_csv}: "
+          f"{ {target: sketch.n for target, sketch in stats.sketches.items()} }")
@@ -0,0 +1,221 @@
+"""On-demand request profiling for live workers
+
+Disarmed, the only cost on the request path is one attribute read
+(`profiler.armed`). Once armed through the admin API, it profiles the next
+N matching requests and/or a sampled fraction of them, with either:
+
+- 'sampling': a background thread snapshots the stacks of threads serving
+  profiled requests (and of the inference batcher while any are in flight)
+  every interval, aggregated per endpoint as collapsed stacks
+  (flamegraph.pl, speedscope, inferno).
+- 'cprofile': deterministic cProfile of one request at a time, aggregated
+  per endpoint into pstats (snakeviz, gprof2dot, `python -m pstats`).
+
+cProfile only sees the request thread, so with INFERENCE_BATCHING on the
+model pass shows up as a wait on the batcher; the sampling mode covers it.
+State is per process; with pre-forked servers the admin call arms whichever
+worker serves it.
+"""
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+MODES = ('sampling', 'cprofile')
+
+# Threads sampled whenever a profiled request is in flight (they do work on its behalf)
+HELPER_THREADS = ('inference-batcher',)
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse_stack(frame):
+    """'root;...;leaf' for a frame, the collapsed-stack format flame graph tools read"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class RequestProfiler:
+    """Arms, collects and exports per-endpoint profiles (see module docstring)"""
+
+    def __init__(self):
+        self.armed = False
+        self._lock = threading.Lock()
+        self._cprofile_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.mode = None
+        self.remaining = None
+        self.sample_rate = 1.0
+        self.endpoints = None
+        self.interval = 0.005
+        self.started_at = None
+        self.requests = Counter()  # endpoint -> profiled requests
+        self.samples = {}  # endpoint -> Counter(collapsed stack -> samples)
+        self.stats = {}  # endpoint -> pstats.Stats
+        self._active = {}  # thread id -> endpoint, requests being sampled
+        self._sampler = None
+
+    def start(self, mode='sampling', requests=None, sample_rate=1.0, endpoints=None, interval_ms=5.0):
+        """Arm for the next `requests` matching requests (None: until stopped), each taken with sample_rate"""
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode} (expected one of {', '.join(MODES)})")
+        if requests is not None and int(requests) < 1:
+            raise ValueError('requests must be at least 1')
+        if not 0 < float(sample_rate) <= 1:
+            raise ValueError('sample_rate must be in (0, 1]')
+
+        with self._lock:
+            self.armed = False
+            self._reset()
+            self.mode = mode
+            self.remaining = int(requests) if requests is not None else None
+            self.sample_rate = float(sample_rate)
+            self.endpoints = frozenset(endpoints) if endpoints else None
+            self.interval = max(0.001, float(interval_ms) / 1000.0)
+            self.started_at = time.time()
+            self.armed = True
+            if mode == 'sampling':
+                self._sampler = threading.Thread(target=self._sample_loop, name='request-profiler', daemon=True)
+                self._sampler.start()
+        return self.status()
+
+    def stop(self):
+        """Disarm; collected profiles stay available until the next start() or clear()"""
+        self.armed = False
+        return self.status()
+
+    def clear(self):
+        with self._lock:
+            self.armed = False
+            self._reset()
+
+    def begin(self, endpoint):
+        """Called at request start while armed; returns a token for end() or None if not profiled"""
+        if self.endpoints is not None and endpoint not in self.endpoints:
+            return None
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return None
+
+        profile = None
+        if self.mode == 'cprofile':
+            # One deterministic profiler at a time (newer Pythons allow only one per process)
+            if not self._cprofile_lock.acquire(blocking=False):
+                return None
+            profile = cProfile.Profile()
+
+        with self._lock:
+            if not self.armed or (self.remaining is not None and self.remaining <= 0):
+                if profile is not None:
+                    self._cprofile_lock.release()
+                return None
+            if self.remaining is not None:
+                self.remaining -= 1
+                if self.remaining == 0:
+                    self.armed = False  # requests already begun still finish and count
+            if profile is None:
+                self._active[threading.get_ident()] = endpoint
+
+        if profile is not None:
+            profile.enable()
+        return endpoint, profile
+
+    def end(self, token):
+        endpoint, profile = token
+        if profile is not None:
+            profile.disable()
+            self._cprofile_lock.release()
+            with self._lock:
+                stats = pstats.Stats(profile)
+                if endpoint in self.stats:
+                    self.stats[endpoint].add(stats)
+                else:
+                    self.stats[endpoint] = stats
+                self.requests[endpoint] += 1
+            return
+
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+            self.requests[endpoint] += 1
+
+    def _sample_loop(self):
+        me = threading.current_thread()
+        while self._sampler is me and (self.armed or self._active):
+            time.sleep(self.interval)
+            active = dict(self._active)
+            if not active:
+                continue
+
+            helpers = {thread.ident: f"[{thread.name}]"
+                       for thread in threading.enumerate() if thread.name in HELPER_THREADS}
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, frame in frames.items():
+                    endpoint = active.get(thread_id) or helpers.get(thread_id)
+                    if endpoint is None:
+                        continue
+                    self.samples.setdefault(endpoint, Counter())[collapse_stack(frame)] += 1
+
+    def status(self):
+        return {
+            'armed': self.armed,
+            'mode': self.mode,
+            'remaining': self.remaining,
+            'sample_rate': self.sample_rate,
+            'endpoints': sorted(self.endpoints) if self.endpoints else None,
+            'interval_ms': round(self.interval * 1000, 3),
+            'started_at': self.started_at,
+            'pid': os.getpid(),
+            'profiled_requests': dict(self.requests),
+            'sampled_stacks': {endpoint: sum(counts.values()) for endpoint, counts in self.samples.items()},
+            'available': sorted(set(self.samples) | set(self.stats))
+        }
+
+    def collapsed(self, endpoint=None):
+        """Collapsed stacks ('frame;frame;frame count' lines) for one endpoint, or all prefixed by endpoint"""
+        with self._lock:
+            if endpoint is not None:
+                items = self.samples.get(endpoint, Counter()).items()
+            else:
+                items = [(f"{name};{stack}", count)
+                         for name, counts in self.samples.items() for stack, count in counts.items()]
+            return ''.join(f"{stack} {count}\n" for stack, count in sorted(items))
+
+    def _merged_stats(self, endpoint=None, stream=None):
+        with self._lock:
+            if endpoint is not None:
+                selected = [self.stats[endpoint]] if endpoint in self.stats else []
+            else:
+                selected = list(self.stats.values())
+            if not selected:
+                return None
+            merged = pstats.Stats(stream=stream)
+            merged.add(*selected)
+            return merged
+
+    def pstats_bytes(self, endpoint=None):
+        """Marshalled pstats (the Stats.dump_stats format) for one endpoint, or all endpoints merged"""
+        merged = self._merged_stats(endpoint)
+        return marshal.dumps(merged.stats) if merged is not None else None
+
+    def pstats_text(self, endpoint=None, limit=40):
+        """Human-readable top functions by cumulative time"""
+        stream = io.StringIO()
+        merged = self._merged_stats(endpoint, stream)
+        if merged is None:
+            return ''
+        merged.sort_stats('cumulative').print_stats(limit)
+        return stream.getvalue()
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from types import MappingProxyType
+
+from config import Config
+
+
+def freeze(value):
+    """Recursively convert dicts/lists into read-only mappings/tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+class QuickSampler:
+    """Stratified quick-assessment selection over precomputed section pools
+
+    Pools are tuples of question indices per section, built once per
+    questionnaire version. select() samples indices (reproducibly when given a
+    seed) and questions() maps them back to the shared, read-only question
+    objects, so a quick quiz costs a few random draws and no copying.
+    """
+
+    def __init__(self, questions, sections):
+        self.questions = questions
+        self.pools = tuple(sections.values())
+        self.total = len(questions)
+
+    @classmethod
+    def from_questions(cls, questions):
+        """Build a sampler from a flat question list grouped by section_name (or section)"""
+        sections = {}
+        for i, q in enumerate(questions):
+            sections.setdefault(q.get('section_name', q.get('section', 'general')), []).append(i)
+        return cls(tuple(questions), sections)
+
+    def select(self, num_questions=12, seed=None):
+        """Return a tuple of question indices, balanced across sections"""
+        if not self.pools:
+            return ()
+        rng = random.Random(seed)
+        per_section = max(1, num_questions // len(self.pools))
+
+        selected = []
+        for pool in self.pools:
+            selected.extend(rng.sample(pool, min(per_section, len(pool))))
+
+        # Top up from the questions not already chosen
+        needed = num_questions - len(selected)
+        if needed > 0:
+            chosen = set(selected)
+            remaining = [i for i in range(self.total) if i not in chosen]
+            selected.extend(rng.sample(remaining, min(needed, len(remaining))))
+
+        return tuple(selected[:num_questions])
+
+    def questions_for(self, indices):
+        return [self.questions[i] for i in indices]
+
+    def sample(self, num_questions=12, seed=None):
+        """Selected question objects (shared references, not copies)"""
+        return self.questions_for(self.select(num_questions, seed))
+
+
+class Questionnaire:
+    """Immutable, precompiled view of questions.json"""
+
+    def __init__(self, raw_data, version, mtime_ns):
+        self.version = version
+        self.mtime_ns = mtime_ns
+        self.data = freeze(raw_data)
+        self.option_sets = self.data.get('option_sets', MappingProxyType({}))
+
+        questions = []
+        section_index = {}
+        for section in raw_data.get('sections', []):
+            section_name = section.get('category', 'general')
+            indices = section_index.setdefault(section_name, [])
+            for question in section.get('questions', []):
+                compiled = dict(question)
+                compiled['section_name'] = section_name
+                options_id = question.get('options_id')
+                if options_id in raw_data.get('option_sets', {}):
+                    compiled['options'] = raw_data['option_sets'][options_id]
+                indices.append(len(questions))
+                questions.append(freeze(compiled))
+
+        # Flattened questions with section_name and resolved options attached
+        self.questions = tuple(questions)
+        # Section name -> tuple of indices into self.questions
+        self.sections = MappingProxyType({k: tuple(v) for k, v in section_index.items()})
+        self.question_ids = tuple(q['id'] for q in self.questions if 'id' in q)
+        self.total_questions = len(self.questions)
+        self.quick_sampler = QuickSampler(self.questions, self.sections)
+
+
+class QuestionnaireCache:
+    """Load questions.json once and reload only when the file changes"""
+
+    def __init__(self, path=None, check_interval=None):
+        self.path = path or Config.QUESTIONS_FILE
+        self.check_interval = Config.QUESTIONS_CHECK_INTERVAL if check_interval is None else check_interval
+        self._snapshot = None
+        self._stat_key = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the current Questionnaire, re-validating against the file at most once per interval"""
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - self._last_check < self.check_interval:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not None and now - self._last_check < self.check_interval:
+                return self._snapshot
+            try:
+                self._refresh()
+            except Exception as e:
+                # Keep serving the last good copy if a reload fails mid-edit
+                if self._snapshot is None:
+                    raise
+                print(f"Error reloading questions, serving version {self._snapshot.version}: {e}")
+            self._last_check = now
+            return self._snapshot
+
+    def invalidate(self):
+        """Force the next get() to re-check the file"""
+        self._last_check = 0.0
+        self._stat_key = None
+
+    def _refresh(self):
+        stat = os.stat(self.path)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        if self._snapshot is not None and stat_key == self._stat_key:
+            return
+
+        with open(self.path, 'rb') as f:
+            raw_bytes = f.read()
+        version = hashlib.sha256(raw_bytes).hexdigest()[:12]
+
+        if self._snapshot is None or version != self._snapshot.version:
+            print(f"Loading questions from: {self.path}")
+            raw_data = json.loads(raw_bytes.decode('utf-8'))
+            self._snapshot = Questionnaire(raw_data, version, stat.st_mtime_ns)
+            print(f"Successfully loaded questions data (version {version})")
+
+        self._stat_key = stat_key
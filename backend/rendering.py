@@ -0,0 +1,188 @@
+import functools
+
+from config import Config
+from metrics import STAGE_SECONDS
+from population_stats import LEVEL_SCORES, prediction_score
+from questionnaire import freeze
+
+# User-friendly names per target
+DISPLAY_NAMES = {
+    'Depression_Category': 'Mood & Energy',
+    'Anxiety_Category': 'Anxiety Level',
+    'Stress_Category': 'Stress Management',
+    'Wellbeing_Category': 'Overall Wellbeing',
+    'Overall_Wellbeing_Category': 'General Health'
+}
+
+# Description per predicted category level
+DESCRIPTIONS = {
+    'Low Concern': 'Your responses suggest this area is well-managed. Keep up the good work!',
+    'Mild to Moderate Concern': 'Some areas may benefit from attention and self-care practices.',
+    'High Concern': 'This area shows signs that may benefit from professional support or focused attention.',
+    'Low Well-being': 'There are opportunities to enhance your wellbeing in this area through small, positive changes.',
+    'Moderate Well-being': 'Your wellbeing shows room for growth. Consider exploring new wellness practices.',
+    'High Well-being': 'Excellent! You demonstrate strong wellbeing in this area.',
+    'Good Well-being': 'You show positive wellbeing patterns. Continue nurturing this strength.'
+}
+DEFAULT_DESCRIPTION = 'Assessment completed successfully.'
+
+# Chart colour per display name
+CHART_COLORS = {
+    'Mood & Energy': '#6366F1',
+    'Anxiety Level': '#10B981',
+    'Stress Management': '#F59E0B',
+    'Overall Wellbeing': '#EF4444',
+    'General Health': '#8B5CF6'
+}
+DEFAULT_CHART_COLOR = '#6B7280'
+
+
+def display_name(target):
+    return DISPLAY_NAMES.get(target, target.replace('_', ' ').title())
+
+
+def calculate_overall_wellness_score(results):
+    """Calculate overall wellness score from individual results"""
+    total_score = 0
+    count = 0
+
+    for target, result in results.items():
+        score = result['score']
+        # Weight wellbeing categories positively, concerns negatively
+        if 'wellbeing' in target.lower() or 'Well-being' in result['level']:
+            total_score += score
+        else:
+            total_score += (100 - score)  # Invert concern scores
+        count += 1
+
+    overall = total_score / count if count > 0 else 50
+    return min(100, max(0, overall))
+
+
+def generate_chart_data(results):
+    """Generate data for different chart types"""
+    labels = []
+    scores = []
+    colors = []
+
+    for target, result in results.items():
+        labels.append(result['name'])
+        scores.append(result['score'])
+        colors.append(CHART_COLORS.get(result['name'], DEFAULT_CHART_COLOR))
+
+    return {
+        'radar': {
+            'labels': labels,
+            'datasets': [{
+                'label': 'Your Scores',
+                'data': scores,
+                'backgroundColor': 'rgba(99, 102, 241, 0.2)',
+                'borderColor': '#6366F1',
+                'borderWidth': 2
+            }]
+        },
+        'donut': {
+            'labels': labels,
+            'datasets': [{
+                'data': scores,
+                'backgroundColor': colors,
+                'borderWidth': 2,
+                'borderColor': '#FFFFFF'
+            }]
+        },
+        'bar': {
+            'labels': labels,
+            'datasets': [{
+                'label': 'Wellness Scores',
+                'data': scores,
+                'backgroundColor': colors,
+                'borderRadius': 8
+            }]
+        }
+    }
+
+
+class ResultRenderer:
+    """Formats predictions for the frontend, memoizing everything that depends only on categories
+
+    With five targets of three or four levels each there are only a few
+    hundred distinct (categories, mode) signatures, so result fragments,
+    overall score, chart data and recommendation candidates are built once per
+    signature and kept in a bounded LRU cache (read-only, shared between
+    requests). Confidence, population percentile and recommendation order by
+    confidence are filled in per request.
+    """
+
+    def __init__(self, recommendation_engine, population_stats=None, cache_size=None, recommendation_limit=4):
+        self.recommendation_engine = recommendation_engine
+        self.population_stats = population_stats
+        self.recommendation_limit = recommendation_limit
+        self._static = functools.lru_cache(maxsize=cache_size or Config.RENDER_CACHE_SIZE)(self._build_static)
+
+    @staticmethod
+    def signature(predictions):
+        """Hashable (target, category) tuple in prediction order"""
+        return tuple((target, prediction['category']) for target, prediction in predictions.items())
+
+    def cache_info(self):
+        return self._static.cache_info()
+
+    def clear(self):
+        """Drop memoized output, e.g. after the recommendation catalog changes"""
+        self._static.cache_clear()
+
+    def _build_static(self, signature, assessment_mode):
+        fragments = {}
+        for target, category_level in signature:
+            fragments[target] = {
+                'name': display_name(target),
+                'level': category_level,
+                'score': LEVEL_SCORES.get(category_level, 50),
+                'description': DESCRIPTIONS.get(category_level, DEFAULT_DESCRIPTION),
+                'assessment_mode': assessment_mode
+            }
+        return (
+            freeze(fragments),
+            calculate_overall_wellness_score(fragments),
+            freeze(generate_chart_data(fragments)),
+            self.recommendation_engine.candidates(signature)
+        )
+
+    def render(self, predictions, assessment_mode):
+        """Return the results, recommendations, overall_score and chart_data parts of a response"""
+        with STAGE_SECONDS.time('render'):
+            fragments, overall_score, chart_data, candidates = self._static(
+                self.signature(predictions), assessment_mode
+            )
+
+            results = {}
+            for target, prediction in predictions.items():
+                fragment = fragments[target]
+                results[target] = {
+                    'name': fragment['name'],
+                    'level': fragment['level'],
+                    'score': fragment['score'],
+                    'confidence': round(prediction['confidence'] * 100, 1),
+                    'description': fragment['description'],
+                    'population_percentile': self._population_percentile(target, prediction, fragment['score']),
+                    'assessment_mode': assessment_mode
+                }
+
+        with STAGE_SECONDS.time('recommendations'):
+            recommendations = self.recommendation_engine.rank(candidates, predictions, self.recommendation_limit)
+
+        return {
+            'results': results,
+            'recommendations': recommendations,
+            'overall_score': overall_score,
+            'chart_data': chart_data
+        }
+
+    def _population_percentile(self, target, prediction, percentage):
+        # Compare against the population distribution of this target's score
+        percentile = None
+        if self.population_stats is not None:
+            percentile = self.population_stats.percentile(target, prediction_score(prediction))
+        if percentile is None:
+            percentile = percentage  # not enough population data yet
+        return int(min(99, max(1, round(percentile))))
@@ -0,0 +1,179 @@
+import itertools
+import json
+import os
+import threading
+from pathlib import Path
+
+from config import Config
+from append_log import get_append_log
+
+
+_ID_PREFIX = b'{"id": "'
+
+# Process-wide, so stores sharing one AppendLog never see each other's tags as their own
+_sequence = itertools.count()
+
+
+def _extract_id(line):
+    """Read the share ID from a log line, skipping a full JSON parse for the common layout"""
+    if line.startswith(_ID_PREFIX):
+        end = line.find(b'"', len(_ID_PREFIX))
+        if end != -1 and line.find(b'\\', len(_ID_PREFIX), end) == -1:
+            return line[len(_ID_PREFIX):end].decode('utf-8')
+    try:
+        share_id = json.loads(line).get('id')
+    except ValueError:
+        return None
+    return None if share_id is None else str(share_id)
+
+
+class ShareStore:
+    """Share records in an append-only JSONL log with an in-memory ID -> byte offset index
+
+    Writes go through the shared write-behind AppendLog; the log reports each
+    line's byte offset once it is on disk, and records still in flight are
+    served from memory. Lookups are a dict hit plus one seek+read. The index is
+    snapshotted next to the log, so start-up only scans lines appended since
+    the last snapshot; a lookup miss also catches up on lines written by other
+    worker processes.
+    """
+
+    def __init__(self, log_path=None, index_path=None):
+        self.log_path = Path(log_path or Config.DATA_DIR / "shared_results.jsonl")
+        self.index_path = Path(index_path or self.log_path.with_name(self.log_path.name + '.idx'))
+        self._index = {}
+        self._pending = {}
+        self._scanned_to = 0
+        self._writes_since_snapshot = 0
+        # Offsets of this store's own lines, until put() has checked them
+        self._written = {}
+        self._lock = threading.Lock()
+
+        self._load_snapshot()
+        self._catch_up()
+
+        self._log = get_append_log(self.log_path)
+        self._log.add_listener(self._on_written)
+
+    def __len__(self):
+        return len(self._index.keys() | self._pending.keys())
+
+    def put(self, record):
+        """Append a share record (must have an 'id'); True once it is on disk and owns its ID
+
+        Share IDs are write-once, so a public link can't be pointed at other
+        content: returns False when the ID is already taken. Other workers
+        share the log, so put waits for its line to be written, catches up,
+        and only succeeds if its line is the first one for the ID.
+        """
+        share_id = str(record['id'])
+        if self._exists(share_id):
+            return False
+        tag = (share_id, next(_sequence))
+        with self._lock:
+            if share_id in self._pending or share_id in self._index:
+                return False
+            self._pending[share_id] = (tag, record)
+        self._log.append(record, tag=tag)
+
+        self._log.flush()
+        self._catch_up()
+        with self._lock:
+            offset = self._written.pop(tag, None)
+            return offset is not None and self._index.get(share_id) == offset
+
+    def get(self, share_id):
+        """Return the record for share_id, or None"""
+        share_id = str(share_id)
+        pending = self._pending.get(share_id)
+        if pending is not None:
+            return pending[1]
+
+        offset = self._index.get(share_id)
+        if offset is None:
+            # Another worker may have written it since we last looked
+            self._catch_up()
+            offset = self._index.get(share_id)
+            if offset is None:
+                return None
+
+        return self._read_at(offset)
+
+    def _exists(self, share_id):
+        if share_id in self._pending or share_id in self._index:
+            return True
+        # Another worker may have taken it since we last looked
+        self._catch_up()
+        return share_id in self._index
+
+    def snapshot(self):
+        """Persist the index so the next start-up only scans newer log lines"""
+        with self._lock:
+            state = {'log_size': self._scanned_to, 'index': dict(self._index)}
+            self._writes_since_snapshot = 0
+
+        tmp_path = self.index_path.with_name(f".{self.index_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, separators=(',', ':'))
+        os.replace(tmp_path, self.index_path)
+
+    def _on_written(self, written):
+        with self._lock:
+            for tag, offset in written:
+                share_id = tag[0]
+                self._index_line(share_id, offset)
+                pending = self._pending.get(share_id)
+                if pending is not None and pending[0] == tag:
+                    del self._pending[share_id]
+                    self._written[tag] = offset
+            self._writes_since_snapshot += len(written)
+            snapshot_due = self._writes_since_snapshot >= Config.SHARE_INDEX_SNAPSHOT_EVERY
+
+        if snapshot_due:
+            try:
+                self.snapshot()
+            except Exception as e:
+                print(f"Error saving share index: {e}")
+
+    def _index_line(self, share_id, offset):
+        # The earliest line for an ID wins, even if two workers raced to claim it
+        current = self._index.get(share_id)
+        if current is None or offset < current:
+            self._index[share_id] = offset
+
+    def _read_at(self, offset):
+        with open(self.log_path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def _load_snapshot(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            log_size = self.log_path.stat().st_size if self.log_path.exists() else 0
+            # A log smaller than the snapshot was truncated or replaced; rebuild
+            if state.get('log_size', 0) <= log_size:
+                self._index = state.get('index', {})
+                self._scanned_to = state.get('log_size', 0)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Share index snapshot unusable, rebuilding from log: {e}")
+
+    def _catch_up(self):
+        """Index complete lines appended after the last scanned offset"""
+        if not self.log_path.exists():
+            return
+
+        with self._lock:
+            with open(self.log_path, 'rb') as f:
+                f.seek(self._scanned_to)
+                offset = self._scanned_to
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break  # partially written line; pick it up next time
+                    share_id = _extract_id(line)
+                    if share_id is not None:
+                        self._index_line(share_id, offset)
+                    offset += len(line)
+                self._scanned_to = offset
@@ -0,0 +1,25 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Backend modules import each other as top-level modules (as app.py runs them)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def small_model():
+    """A MentalHealthModel with tiny two-class forests over phq_1 and gad_1"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import LabelEncoder
+    from models import MentalHealthModel
+
+    model = MentalHealthModel()
+    model.feature_names = ['phq_1', 'gad_1']
+    X = np.random.default_rng(0).integers(0, 4, size=(200, 2)).astype(float)
+    for target in model.target_columns:
+        model.label_encoders[target] = LabelEncoder().fit(['High', 'Low'])
+        model.models[target] = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, (X[:, 0] < 2).astype(int))
+    model._loaded = True
+    return model
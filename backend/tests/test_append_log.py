@@ -0,0 +1,55 @@
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from append_log import AppendLog
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def test_sigterm_drains_queued_records(tmp_path):
+    log_path = tmp_path / 'log.jsonl'
+    script = textwrap.dedent(f"""
+        import sys, time
+        from append_log import AppendLog, _logs, install_signal_handlers
+        log = _logs['test'] = AppendLog({str(log_path)!r}, flush_interval=30)
+        install_signal_handlers()
+        for i in range(100):
+            log.append({{'i': i}})
+        print('ready', flush=True)
+        time.sleep(60)
+    """)
+    process = subprocess.Popen([sys.executable, '-c', script], cwd=BACKEND_DIR,
+                               stdout=subprocess.PIPE, text=True)
+    assert process.stdout.readline().strip() == 'ready'
+    process.send_signal(signal.SIGTERM)
+    assert process.wait(timeout=30) == 128 + signal.SIGTERM
+    assert len(log_path.read_text().splitlines()) == 100
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires fork')
+def test_forked_child_gets_its_own_queue(tmp_path):
+    log_path = tmp_path / 'log.jsonl'
+    log = AppendLog(log_path, flush_interval=30)
+    # The parent's flusher holds 'first' while it gathers; 'queued' is still in the queue at fork
+    log.append({'from': 'first'})
+    log.append({'from': 'queued'})
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            log.flush_interval = 0
+            log.append({'from': 'child'})
+            log.flush()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    log.close()
+
+    text = log_path.read_text()
+    assert [text.count(f'"{name}"') for name in ('first', 'queued', 'child')] == [1, 1, 1]
@@ -0,0 +1,22 @@
+import numpy as np
+
+from feature_index import FeatureIndex
+
+
+def test_report_lists_missing_features_only_on_request():
+    index = FeatureIndex([f'q{i}' for i in range(10)])
+    vector, report = index.fill_vector({'q1': 2, 'q8': 1, 'extra': 5})
+
+    assert vector.tolist() == [0, 2, 0, 0, 0, 0, 0, 0, 1, 0]
+    assert report.unknown_keys == ['extra']
+    assert report.n_missing == 8
+    assert report.missing_features(limit=3) == ['q0', 'q2', 'q3']
+    assert len(report.missing_features()) == 8
+
+
+def test_fill_matrix_isolates_bad_rows():
+    index = FeatureIndex(['q0', 'q1'])
+    matrix, reports = index.fill_matrix([{'q0': 1}, {'q0': 'abc', 'q1': 2}, {'q1': 3}])
+
+    assert np.array_equal(matrix, [[1, 0], [0, 0], [0, 3]])
+    assert [report.error is not None for report in reports] == [False, True, False]
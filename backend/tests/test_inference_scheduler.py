@@ -0,0 +1,35 @@
+import pytest
+
+from inference_scheduler import InferenceScheduler
+
+
+class StaticRegistry:
+    def __init__(self, model):
+        self.model = model
+
+    def current(self):
+        return self.model
+
+
+def test_bad_request_does_not_spoil_its_batch(small_model):
+    good = {'phq_1': 3, 'gad_1': 1}
+    expected = small_model.predict_from_answers(good, None)
+
+    scheduler = InferenceScheduler(StaticRegistry(small_model), window=0.5, max_rows=2, timeout=10)
+    bad_request = scheduler.submit({'phq_1': 'abc', 'gad_1': 1})
+    good_request = scheduler.submit(good)
+
+    assert good_request.future.result(timeout=10) == expected
+    with pytest.raises(ValueError):
+        bad_request.future.result(timeout=10)
+    assert scheduler.batches == 1
+
+
+def test_predict_batch_isolates_unreadable_rows(small_model):
+    good = {'phq_1': 3, 'gad_1': 1}
+    expected = small_model.predict_from_answers(good, None)
+
+    results = small_model.predict_batch([{'phq_1': 'abc'}, good])
+
+    assert results[1] == expected
+    assert results[0]['Depression_Category']['assessment_mode'] == 'fallback'
@@ -0,0 +1,33 @@
+from jobs import JobQueue
+
+
+def test_worker_runs_as_a_separate_jobs_py_process(tmp_path):
+    queue = JobQueue(tmp_path / 'jobs.sqlite3')
+    job_id = queue.enqueue('retrain', {'csv_path': str(tmp_path / 'missing.csv')})
+
+    assert queue._worker.args[1].endswith('jobs.py')
+    assert queue._worker.wait(timeout=120) == 0
+
+    job = queue.get(job_id)
+    assert job['status'] == 'failed'
+    assert job['worker_pid'] == queue._worker.pid
+
+
+def test_successful_retrain_is_promoted(tmp_path, monkeypatch):
+    import json
+    from benchmark import generate_training_csv
+    from config import Config
+    from jobs import run_retrain_job
+    from model_registry import ModelRegistry
+
+    monkeypatch.setattr(Config, 'MODELS_DIR', tmp_path / 'models')
+    Config.MODELS_DIR.mkdir()
+    with open(Config.QUESTIONS_FILE, encoding='utf-8') as f:
+        csv_path = generate_training_csv(tmp_path / 'data.csv', json.load(f), rows=300)
+
+    queue = JobQueue(tmp_path / 'jobs.sqlite3')
+    queue.enqueue('retrain', {'csv_path': str(csv_path)}, start_worker=False)
+    result = run_retrain_job(queue, queue.claim_next())
+
+    assert result['promoted']
+    assert ModelRegistry().pinned_version() == result['bundle_version']
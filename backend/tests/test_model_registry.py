@@ -0,0 +1,43 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder
+
+from model_registry import ModelRegistry
+from models import MentalHealthModel
+
+
+def save_bundle_dir(path):
+    model = MentalHealthModel()
+    model.feature_names = ['q1', 'q2']
+    X = np.random.default_rng(0).integers(0, 4, size=(100, 2)).astype(float)
+    for target in model.target_columns:
+        model.label_encoders[target] = LabelEncoder().fit(['High', 'Low'])
+        model.models[target] = RandomForestClassifier(n_estimators=3, random_state=0).fit(X, X[:, 0] >= 2)
+    model.save_models(path)
+    return model.bundle_version
+
+
+def test_reload_is_pinned_for_restarts_and_other_workers(tmp_path):
+    root_version = save_bundle_dir(tmp_path)
+    promoted = save_bundle_dir(tmp_path / 'v2')
+
+    worker_a = ModelRegistry(tmp_path, check_interval=0)
+    worker_b = ModelRegistry(tmp_path, check_interval=0)
+    worker_a.load()
+    worker_b.load()
+    assert worker_b.info()['bundle_version'] == root_version
+
+    worker_a.load('v2', require_models=True)
+    assert (tmp_path / 'CURRENT').read_text().strip() == 'v2'
+
+    worker_b.watch()
+    worker_b._reload_thread.join(timeout=30)
+    assert worker_b.info()['bundle_version'] == promoted
+
+    restarted = ModelRegistry(tmp_path)
+    restarted.load()
+    assert restarted.info()['bundle_version'] == promoted
+
+    # An explicit empty version pins the root bundle again
+    restarted.load('')
+    assert ModelRegistry(tmp_path).pinned_version() == ''
@@ -0,0 +1,57 @@
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder
+
+from forest_engine import CompiledForestEngine
+from models import MentalHealthModel
+
+
+def test_probabilities_follow_student_classes_when_a_class_is_missing():
+    """A distilled student that never saw an encoder class must not shift class names"""
+    model = MentalHealthModel()
+    model.feature_names = ['q1', 'q2']
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 4, size=(200, 2)).astype(float)
+
+    encoders, columns = {}, []
+    for target in model.target_columns:
+        encoder = LabelEncoder().fit(['High', 'Low', 'Moderate'])
+        encoders[target] = encoder
+        # The teacher never predicts 'Low' (code 1): the student knows only codes 0 and 2
+        columns.append(np.where(X[:, 0] >= 2, 0, 2))
+    student = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, np.column_stack(columns))
+
+    model.label_encoders = encoders
+    model._compiled_engine = CompiledForestEngine.from_multi_output(student, model.target_columns)
+    model._loaded = True
+
+    predictions = model.predict_batch([{'q1': 3, 'q2': 0}, {'q1': 0, 'q2': 0}], engine='compiled')
+
+    for prediction, expected in zip(predictions, ('High', 'Moderate')):
+        for target in model.target_columns:
+            result = prediction[target]
+            assert result['category'] == expected
+            assert set(result['probabilities']) == {'High', 'Moderate'}
+            assert max(result['probabilities'], key=result['probabilities'].get) == expected
+
+
+def test_write_tuned_params_updates_bundle_metadata(tmp_path):
+    from model_bundle import load_bundle
+    from tuning import write_tuned_params
+
+    model = MentalHealthModel()
+    model.feature_names = ['q1', 'q2']
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 4, size=(100, 2)).astype(float)
+    for target in model.target_columns:
+        model.label_encoders[target] = LabelEncoder().fit(['High', 'Low'])
+        model.models[target] = RandomForestClassifier(n_estimators=3, random_state=0).fit(X, X[:, 0] >= 2)
+    model.save_models(tmp_path)
+
+    tuned = {'Depression_Category': {'max_depth': 6}}
+    assert write_tuned_params(tmp_path, tuned, {'eta': 3})
+
+    assert load_bundle(tmp_path)['metadata']['tuned_params'] == tuned
+    reloaded = MentalHealthModel()
+    reloaded.load_models(tmp_path)
+    assert reloaded.tuned_params == tuned
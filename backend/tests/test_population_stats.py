@@ -0,0 +1,27 @@
+from population_stats import KLLSketch
+
+
+def test_update_between_summary_build_and_read():
+    sketch = KLLSketch(k=50, seed=0)
+    for value in range(100):
+        sketch.update(value)
+
+    build = sketch._build_summary
+
+    def build_then_update():
+        summary = build()
+        sketch.update(1000)  # a refresh on another thread lands here
+        return summary
+
+    sketch._build_summary = build_then_update
+    assert 0 <= sketch.percentile(50) <= 100
+    assert sketch.quantile(0.5) is not None
+
+
+def test_summary_is_rebuilt_after_update():
+    sketch = KLLSketch(k=50, seed=0)
+    for value in range(10):
+        sketch.update(value)
+    assert sketch.percentile(100) == 100.0
+    sketch.update(200)
+    assert sketch.percentile(100) < 100.0
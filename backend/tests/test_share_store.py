@@ -0,0 +1,34 @@
+from share_store import ShareStore
+
+
+def test_share_ids_are_write_once_across_workers(tmp_path):
+    log_path = tmp_path / 'shares.jsonl'
+    store = ShareStore(log_path)
+    assert store.put({'id': 'abc', 'insights': 'mine'})
+    assert not store.put({'id': 'abc', 'insights': 'hijacked'})
+
+    store._log.flush()
+    other_worker = ShareStore(log_path, index_path=tmp_path / 'other.idx')
+    assert not other_worker.put({'id': 'abc', 'insights': 'hijacked'})
+    assert other_worker.get('abc')['insights'] == 'mine'
+    assert store.get('abc')['insights'] == 'mine'
+
+
+def test_losing_a_cross_worker_race_is_reported(tmp_path):
+    from append_log import AppendLog
+
+    log_path = tmp_path / 'shares.jsonl'
+    worker_a = ShareStore(log_path)
+    worker_b = ShareStore(log_path, index_path=tmp_path / 'b.idx')
+    # Give worker B its own writer, as a separate process would have
+    worker_a._log._listeners.remove(worker_b._on_written)
+    worker_b._log = AppendLog(log_path)
+    worker_b._log.add_listener(worker_b._on_written)
+    # Both checked the ID before either had written it
+    worker_b._exists = lambda share_id: False
+
+    assert worker_a.put({'id': 'abc', 'insights': 'first'})
+    assert not worker_b.put({'id': 'abc', 'insights': 'second'})
+    assert worker_a.get('abc')['insights'] == 'first'
+    assert worker_b.get('abc')['insights'] == 'first'
+    worker_b._log.close()
@@ -0,0 +1,312 @@
+"""Successive-halving hyperparameter search for the per-target forests
+
+Samples forest configurations (the current FOREST_PARAMS always among them)
+and races them on every target at once: each rung scores the surviving
+configurations by CV_FOLDS-fold cross-validation with a growing number of
+trees, and only the best 1/eta go on to the next rung. The last rung runs at
+full size and its winner becomes the target's tuned parameters.
+
+Only the training split is searched, so the held-out accuracy train_models
+reports afterwards stays unbiased. The split, scaled training matrix, label
+encodings and fold indices are computed once and cached under
+<cache-dir>/<key> (the key hashes the CSV and split settings); every fold
+fit is a task in one process pool sharing a memory map of that matrix.
+Each finished fit is appended to evaluations.jsonl, so an interrupted
+search re-run with the same arguments picks up where it stopped.
+
+The winners are written to the models directory's metadata as
+'tuned_params', which MentalHealthModel.get_forest_params applies to every
+later full retrain (including /api/upload jobs).
+
+    python tuning.py
+    python tuning.py --candidates 81 --eta 3 --n-jobs -1 --retrain
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+import time
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from config import Config
+from model_bundle import update_bundle_metadata
+from models import MentalHealthModel, FOREST_PARAMS, CV_FOLDS, _fit_forest_task
+
+# Values tried per RandomForestClassifier parameter; n_estimators is the halving resource
+SEARCH_SPACE = {
+    'max_depth': [8, 10, 12, 15, 20, None],
+    'min_samples_split': [2, 3, 5, 10],
+    'min_samples_leaf': [1, 2, 4],
+    'max_features': ['sqrt', 'log2', 0.5],
+    'class_weight': ['balanced', 'balanced_subsample', None]
+}
+
+# Bump when the cached arrays change layout
+CACHE_VERSION = 1
+
+
+def candidate_key(candidate):
+    return json.dumps(candidate, sort_keys=True)
+
+
+def sample_candidates(n_candidates, seed=42, space=SEARCH_SPACE):
+    """The current defaults plus n_candidates - 1 distinct random configurations"""
+    # 'sqrt' is RandomForestClassifier's own max_features default
+    defaults = {name: FOREST_PARAMS.get(name, 'sqrt' if name == 'max_features' else None) for name in space}
+    grid = [dict(zip(space, values)) for values in itertools.product(*space.values())]
+    grid = [candidate for candidate in grid if candidate != defaults]
+    rng = random.Random(seed)
+    return [defaults] + rng.sample(grid, min(n_candidates - 1, len(grid)))
+
+
+def rung_schedule(n_candidates, eta, max_trees, min_trees):
+    """[(candidates entering the rung, trees per forest)], ending at max_trees"""
+    sizes = [n_candidates]
+    while sizes[-1] > eta:
+        sizes.append(-(-sizes[-1] // eta))
+    last = len(sizes) - 1
+    return [(size, max(min_trees, round(max_trees / eta ** (last - rung)))) for rung, size in enumerate(sizes)]
+
+
+def cache_key(csv_path):
+    digest = hashlib.sha1(f"v{CACHE_VERSION}:folds={CV_FOLDS}:".encode())
+    with open(csv_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _dump_atomic(value, path):
+    tmp_path = path.with_suffix('.tmp')
+    joblib.dump(value, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def prepare_data(csv_path, cache_dir):
+    """Memory-mapped scaled training matrix and {target: {'y', 'classes', 'folds'}}, cached in cache_dir
+
+    Same split, scaling and folds as train_models, computed once per CSV.
+    """
+    matrix_path = cache_dir / 'X_train_scaled.joblib'
+    targets_path = cache_dir / 'targets.joblib'  # written last: its presence marks a complete cache
+
+    if not targets_path.exists():
+        from sklearn.model_selection import StratifiedKFold
+        from sklearn.preprocessing import StandardScaler, LabelEncoder
+
+        model = MentalHealthModel()
+        X, y_dict = model.load_and_prepare_data(csv_path, None)
+        if X is None:
+            raise ValueError(f"Could not load {csv_path}")
+        X_train, _, y_train_dict, _ = model.train_test_split_multiple(X, y_dict)
+        X_train_scaled = StandardScaler().fit_transform(X_train)
+
+        targets = {}
+        for target in model.target_columns:
+            if target not in y_train_dict:
+                continue
+            le = LabelEncoder()
+            y = le.fit_transform(y_train_dict[target])
+            targets[target] = {
+                'y': y,
+                'classes': le.classes_.tolist(),
+                'folds': list(StratifiedKFold(n_splits=CV_FOLDS).split(X_train_scaled, y))
+            }
+
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        _dump_atomic(X_train_scaled, matrix_path)
+        _dump_atomic(targets, targets_path)
+        print(f"📦 Cached split, scaling and {CV_FOLDS} folds for {len(targets)} targets in {cache_dir}")
+    else:
+        print(f"📦 Reusing cached folds from {cache_dir}")
+
+    return joblib.load(matrix_path, mmap_mode='r'), joblib.load(targets_path)
+
+
+def load_evaluations(log_path):
+    """{(target, candidate key, trees, fold): record} of the fits already finished"""
+    done = {}
+    if not log_path.exists():
+        return done
+    with open(log_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by an interruption
+            done[(record['target'], record['candidate'], record['trees'], record['fold'])] = record
+    return done
+
+
+def run_rung(X, data, candidates, survivors, trees, done, log_path, n_jobs):
+    """Fit every (target, surviving candidate, fold) not already in done; returns the number fit"""
+    tasks = [(target, key, fold)
+             for target, keys in survivors.items() for key in keys for fold in range(CV_FOLDS)
+             if (target, key, trees, fold) not in done]
+    if not tasks:
+        return 0
+
+    results = joblib.Parallel(n_jobs=n_jobs, return_as='generator')(
+        joblib.delayed(_fit_forest_task)(
+            X, data[target]['y'], dict(FOREST_PARAMS, **candidates[key], n_estimators=trees),
+            *data[target]['folds'][fold]
+        )
+        for target, key, fold in tasks
+    )
+    with open(log_path, 'a', encoding='utf-8') as f:
+        for (target, key, fold), result in zip(tasks, results):
+            record = {'target': target, 'candidate': key, 'trees': trees, 'fold': fold,
+                      'score': result['score'], 'seconds': round(result['seconds'], 4)}
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            done[(target, key, trees, fold)] = record
+    return len(tasks)
+
+
+def rung_scores(done, target, keys, trees):
+    """{candidate key: (cv mean, cv std)} at one rung"""
+    scores = {}
+    for key in keys:
+        folds = np.array([done[(target, key, trees, fold)]['score'] for fold in range(CV_FOLDS)])
+        scores[key] = (float(folds.mean()), float(folds.std()))
+    return scores
+
+
+def search(X, data, candidates, schedule, eta, done, log_path, n_jobs):
+    """Race the candidates through the rungs; returns {target: per-target result}"""
+    order = {key: index for index, key in enumerate(candidates)}
+    survivors = {target: list(candidates) for target in data}
+    history = {target: [] for target in data}
+
+    for rung, (size, trees) in enumerate(schedule):
+        started = time.perf_counter()
+        fitted = run_rung(X, data, candidates, survivors, trees, done, log_path, n_jobs)
+        resumed = len(data) * size * CV_FOLDS - fitted
+        print(f"  rung {rung + 1}/{len(schedule)}: {size} candidates x {trees} trees x {CV_FOLDS} folds "
+              f"x {len(data)} targets, {fitted} fits in {time.perf_counter() - started:.1f}s"
+              + (f" ({resumed} resumed)" if resumed else ''))
+
+        for target in data:
+            scores = rung_scores(done, target, survivors[target], trees)
+            history[target].append({'trees': trees, 'scores': scores})
+            # Ties go to the earlier candidate, so the current defaults win a draw
+            ranked = sorted(survivors[target], key=lambda key: (-scores[key][0], order[key]))
+            survivors[target] = ranked[:-(-len(ranked) // eta)] if rung < len(schedule) - 1 else ranked[:1]
+
+    baseline = next(iter(candidates))
+    results = {}
+    for target in data:
+        best = survivors[target][0]
+        final = history[target][-1]
+        # The defaults' score at the last rung they reached, for comparison
+        reached = [entry for entry in history[target] if baseline in entry['scores']][-1]
+        results[target] = {
+            'params': dict(candidates[best], n_estimators=final['trees']),
+            'cv_mean': round(final['scores'][best][0], 4),
+            'cv_std': round(final['scores'][best][1], 4),
+            'default_cv_mean': round(reached['scores'][baseline][0], 4),
+            'default_trees': reached['trees']
+        }
+    return results
+
+
+def print_results(results):
+    print(f"\n{'target':28} {'cv mean':>8} {'± std':>7} {'default':>8} {'@trees':>7}  best parameters")
+    for target, result in results.items():
+        params = ', '.join(f"{name}={value}" for name, value in result['params'].items())
+        print(f"{target:28} {result['cv_mean']:8.4f} {result['cv_std']:7.4f} "
+              f"{result['default_cv_mean']:8.4f} {result['default_trees']:7d}  {params}")
+
+
+def write_tuned_params(models_dir, tuned_params, tuning):
+    """Record the winners in models_dir's model_metadata.json and model bundle (other keys untouched)"""
+    metadata_path = Path(models_dir) / "model_metadata.json"
+    if not metadata_path.exists():
+        return False
+    with open(metadata_path, 'r') as f:
+        metadata = json.load(f)
+    metadata['tuned_params'] = tuned_params
+    metadata['tuning'] = tuning
+    tmp_path = metadata_path.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp_path, metadata_path)
+    # Serving and incremental updates read the metadata embedded in the bundle
+    update_bundle_metadata(models_dir, {'tuned_params': tuned_params, 'tuning': tuning})
+    return True
+
+
+def run(args):
+    csv_path = Path(args.csv)
+    key = cache_key(csv_path)
+    cache_dir = Path(args.cache_dir or Config.DATA_DIR / "tuning") / key
+    X, data = prepare_data(csv_path, cache_dir)
+
+    candidates = {candidate_key(c): c for c in sample_candidates(args.candidates, args.seed)}
+    schedule = rung_schedule(len(candidates), args.eta, args.max_trees, args.min_trees)
+    log_path = cache_dir / 'evaluations.jsonl'
+    done = load_evaluations(log_path)
+
+    total_fits = sum(size for size, _ in schedule) * CV_FOLDS * len(data)
+    print(f"\n🔎 Successive halving: {len(candidates)} candidates, eta={args.eta}, "
+          f"trees {' → '.join(str(trees) for _, trees in schedule)}, "
+          f"{total_fits} fits on {X.shape[0]} rows, n_jobs={args.n_jobs}")
+
+    started = time.perf_counter()
+    results = search(X, data, candidates, schedule, args.eta, done, log_path, args.n_jobs)
+    print_results(results)
+
+    tuned_params = {target: result['params'] for target, result in results.items()}
+    tuning = {
+        'completed_at': datetime.now().isoformat(),
+        'data_source': str(csv_path),
+        'cache_key': key,
+        'candidates': len(candidates),
+        'eta': args.eta,
+        'seed': args.seed,
+        'rungs': [trees for _, trees in schedule],
+        'search_seconds': round(time.perf_counter() - started, 3),
+        'results': results
+    }
+    with open(cache_dir / 'result.json', 'w', encoding='utf-8') as f:
+        json.dump(tuning, f, indent=2)
+
+    models_dir = Path(args.models_dir)
+    if args.retrain:
+        model = MentalHealthModel()
+        model.tuned_params = tuned_params
+        model.tuning = tuning
+        model.train_models(csv_path, n_jobs=args.n_jobs, models_dir=models_dir)
+    elif write_tuned_params(models_dir, tuned_params, tuning):
+        print(f"\n💾 Tuned parameters written to {models_dir / 'model_metadata.json'}; "
+              f"the next retrain uses them (or re-run with --retrain)")
+    else:
+        print(f"\nNo model_metadata.json in {models_dir}; results kept in {cache_dir / 'result.json'} "
+              f"(re-run with --retrain to train with them)")
+    return tuning
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tune the per-target forests by successive halving')
+    parser.add_argument('--csv', default=str(Config.DATA_DIR / "mental_health_data.csv"))
+    parser.add_argument('--models-dir', default=str(Config.MODELS_DIR),
+                        help='whose metadata receives the tuned parameters')
+    parser.add_argument('--candidates', type=int, default=27, help='configurations sampled (defaults included)')
+    parser.add_argument('--eta', type=int, default=3, help='keep the best 1/eta candidates at each rung')
+    parser.add_argument('--max-trees', type=int, default=FOREST_PARAMS['n_estimators'], help='trees at the last rung')
+    parser.add_argument('--min-trees', type=int, default=10, help='fewest trees at the first rung')
+    parser.add_argument('--seed', type=int, default=42, help='candidate sampling seed')
+    parser.add_argument('--n-jobs', type=int, default=-1, help='worker processes for the fold fits (-1: every core)')
+    parser.add_argument('--cache-dir', help='fold / matrix cache and resume log (default DATA_DIR/tuning)')
+    parser.add_argument('--retrain', action='store_true', help='train and save models with the winners')
+    args = parser.parse_args()
+    if args.candidates < 1 or args.eta < 2:
+        parser.error('--candidates must be at least 1 and --eta at least 2')
+
+    run(args)